@@ -0,0 +1,200 @@
+"""
+Fixtures HTTP gravadas e replay offline para os benchmarks.
+
+`replay_http()` intercepta todas as requisições feitas via `requests` (as
+ferramentas usam as sessões do cliente de `http_client.py`) e responde com
+os arquivos de `benchmarks/fixtures/`. Nada sai para a rede.
+
+Para regravar as fixtures a partir dos serviços reais:
+
+    python3 -m benchmarks.fixtures --record
+"""
+import argparse
+import io
+import json
+import os
+import random
+import time
+import urllib.parse
+from contextlib import contextmanager
+from email.utils import formatdate
+from unittest import mock
+
+import requests
+from requests.adapters import BaseAdapter
+from requests.structures import CaseInsensitiveDict
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+COINGECKO_PAGE = 'coingecko_markets_p{page}.json'
+NEWS_RSS = 'google_news_rss.xml'
+NEWS_HTML = 'google_news_search.html'
+
+# Marcador substituído pela consulta no replay, para cada símbolo receber manchetes próprias
+QUERY_PLACEHOLDER = '{{query}}'
+
+
+def _fixture_path(name: str) -> str:
+    return os.path.join(FIXTURES_DIR, name)
+
+
+def _read(name: str) -> bytes:
+    with open(_fixture_path(name), 'rb') as handle:
+        return handle.read()
+
+
+class FixtureAdapter(BaseAdapter):
+    """Adapter do `requests` que responde a partir das fixtures, com latência opcional simulada."""
+
+    def __init__(self, latency: float = 0.0):
+        super().__init__()
+        self.latency = latency
+        self.calls = 0
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        url = urllib.parse.urlsplit(request.url)
+        query = urllib.parse.parse_qs(url.query)
+
+        status, body, content_type = 404, b'', 'text/plain'
+        if url.netloc == 'api.coingecko.com' and url.path.endswith('/coins/markets'):
+            name = COINGECKO_PAGE.format(page=query.get('page', ['1'])[0])
+            if os.path.exists(_fixture_path(name)):
+                per_page = int(query.get('per_page', ['250'])[0])
+                body = json.dumps(json.loads(_read(name))[:per_page]).encode('utf-8')
+                status, content_type = 200, 'application/json'
+        elif url.netloc == 'news.google.com':
+            term = query.get('q', [''])[0].split(' ')[0]
+            name = NEWS_RSS if url.path.startswith('/rss') else NEWS_HTML
+            body = _read(name).replace(QUERY_PLACEHOLDER.encode(), term.encode('utf-8'))
+            status = 200
+            content_type = 'application/rss+xml' if name == NEWS_RSS else 'text/html'
+
+        response = requests.Response()
+        response.status_code = status
+        response.headers = CaseInsensitiveDict({'Content-Type': content_type, 'Content-Length': str(len(body))})
+        response.raw = _BytesRaw(body)
+        response.url = request.url
+        response.request = request
+        response.encoding = 'utf-8'
+        response.connection = self
+        return response
+
+    def close(self):
+        pass
+
+
+class _BytesRaw:
+    """Corpo mínimo compatível com `iter_content`/`content` do requests."""
+
+    def __init__(self, body: bytes):
+        self._buffer = io.BytesIO(body)
+
+    def read(self, amt=None, decode_content=None):
+        return self._buffer.read(amt)
+
+    def stream(self, amt=2 ** 16, decode_content=None):
+        while True:
+            chunk = self._buffer.read(amt)
+            if not chunk:
+                break
+            yield chunk
+
+    def close(self):
+        pass
+
+    def release_conn(self):
+        pass
+
+
+@contextmanager
+def replay_http(latency: float = 0.0):
+    """Serve todas as requisições HTTP do processo a partir das fixtures."""
+    adapter = FixtureAdapter(latency)
+    with mock.patch.object(requests.Session, 'get_adapter', lambda self, url: adapter):
+        yield adapter
+
+
+def record(symbol: str = 'BTC'):
+    """Grava as fixtures a partir da CoinGecko e do Google News reais."""
+    os.makedirs(FIXTURES_DIR, exist_ok=True)
+    response = requests.get('https://api.coingecko.com/api/v3/coins/markets', timeout=30, params={
+        'vs_currency': 'usd', 'order': 'volume_desc', 'per_page': 250, 'page': 1, 'sparkline': 'false'})
+    response.raise_for_status()
+    with open(_fixture_path(COINGECKO_PAGE.format(page=1)), 'w') as handle:
+        json.dump(response.json(), handle)
+
+    query = urllib.parse.quote(f"{symbol} cryptocurrency news")
+    for path, name in ((f"rss/search?q={query}", NEWS_RSS), (f"search?q={query}", NEWS_HTML)):
+        response = requests.get(f"https://news.google.com/{path}&hl=pt-BR&gl=BR&ceid=BR:pt-419", timeout=30,
+                                headers={'User-Agent': 'Mozilla/5.0'})
+        response.raise_for_status()
+        with open(_fixture_path(name), 'wb') as handle:
+            handle.write(response.content.replace(symbol.encode(), QUERY_PLACEHOLDER.encode()))
+
+
+def synthesize(seed: int = 7, coins: int = 250, headlines: int = 100):
+    """Gera fixtures determinísticas no formato das respostas reais (quando não há acesso à rede)."""
+    rng = random.Random(seed)
+    os.makedirs(FIXTURES_DIR, exist_ok=True)
+
+    markets = []
+    for rank in range(1, coins + 1):
+        symbol = ''.join(rng.choice('ABCDEFGHIJKLMNOPQRSTUVWXYZ') for _ in range(rng.randint(3, 5))).lower()
+        price = round(10 ** rng.uniform(-4, 4.8), 8)
+        markets.append({
+            'id': f"{symbol}-coin-{rank}", 'symbol': symbol, 'name': f"{symbol.upper()} Coin",
+            'image': f"https://assets.coingecko.com/coins/images/{rank}/large/{symbol}.png",
+            'current_price': price, 'market_cap': round(price * 10 ** rng.uniform(6, 9)),
+            'market_cap_rank': rank, 'total_volume': round(10 ** rng.uniform(5, 10.5), 2),
+            'high_24h': round(price * 1.05, 8), 'low_24h': round(price * 0.95, 8),
+            'price_change_24h': round(price * rng.uniform(-0.1, 0.1), 8),
+            'price_change_percentage_24h': round(rng.uniform(-15, 15), 5),
+            'circulating_supply': round(10 ** rng.uniform(6, 11)),
+            'last_updated': '2025-01-01T00:00:00.000Z',
+        })
+    markets.sort(key=lambda coin: -coin['total_volume'])
+    with open(_fixture_path(COINGECKO_PAGE.format(page=1)), 'w') as handle:
+        json.dump(markets, handle)
+
+    verbs = ['sobe', 'cai', 'dispara', 'recua', 'atinge máxima', 'lidera ganhos', 'enfrenta pressão', 'consolida']
+    items = []
+    for i in range(headlines):
+        title = f"{QUERY_PLACEHOLDER} {rng.choice(verbs)} {rng.uniform(1, 30):.1f}% após notícia #{i} - Portal Cripto {i % 17}"
+        items.append(
+            f"<item><title>{title}</title>"
+            f"<link>https://news.google.com/rss/articles/{QUERY_PLACEHOLDER}-{seed}-{i}?oc=5</link>"
+            f"<guid isPermaLink=\"false\">{QUERY_PLACEHOLDER}-{seed}-{i}</guid>"
+            f"<pubDate>{formatdate(1735689600 - i * 1800, usegmt=True)}</pubDate>"
+            f"<description>&lt;a href=\"https://example.com/{i}\"&gt;{title}&lt;/a&gt;</description>"
+            f"<source url=\"https://example.com\">Portal Cripto {i % 17}</source></item>")
+    with open(_fixture_path(NEWS_RSS), 'w') as handle:
+        handle.write('<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                     '<rss version="2.0" xmlns:media="http://search.yahoo.com/mrss/"><channel>'
+                     f'<title>"{QUERY_PLACEHOLDER} cryptocurrency news" - Google Notícias</title>'
+                     + ''.join(items) + '</channel></rss>')
+
+    articles = ''.join(
+        f"<article><a href=\"./read/{QUERY_PLACEHOLDER}-{i}\"></a>"
+        f"<h3><a href=\"./articles/{QUERY_PLACEHOLDER}-{i}\">{QUERY_PLACEHOLDER} {rng.choice(verbs)} "
+        f"{rng.uniform(1, 30):.1f}% em meio a volatilidade #{i}</a></h3>"
+        f"<div><span>Portal Cripto {i % 17}</span><time>há {i + 1} horas</time></div></article>"
+        for i in range(40))
+    with open(_fixture_path(NEWS_HTML), 'w') as handle:
+        handle.write('<!doctype html><html lang="pt-BR"><head><meta charset="utf-8"><title>Google Notícias</title>'
+                     + '<script>' + 'var x=1;' * 2000 + '</script></head><body><main>'
+                     + articles + '</main></body></html>')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Grava ou gera as fixtures HTTP dos benchmarks.")
+    parser.add_argument('--record', action='store_true', help="Gravar a partir dos serviços reais (requer rede).")
+    parser.add_argument('--symbol', default='BTC', help="Símbolo usado na gravação das notícias.")
+    args = parser.parse_args()
+    if args.record:
+        record(args.symbol)
+    else:
+        synthesize()
+    print(f"Fixtures em {FIXTURES_DIR}")
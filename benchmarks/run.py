@@ -0,0 +1,274 @@
+"""
+Benchmark offline do pipeline: ferramentas, ações da SQLiteTool, consultas do
+dashboard e o crew completo com LLM determinístico.
+
+Nada acessa a rede: a CoinGecko e o Google News são servidos pelas fixtures
+gravadas e o LLM é o `StubLLM`. Exemplos:
+
+    python3 -m benchmarks.run                       # tudo, banco de 10k linhas
+    python3 -m benchmarks.run --sizes 10k,1m,10m --suites sqlite,dashboard
+    python3 -m benchmarks.run --suites crew --llm-latency 0.5 --json bench.json
+    python3 -m benchmarks.run --compare bench.json  # diferença contra um resultado salvo
+"""
+import argparse
+import contextlib
+import json
+import os
+import shutil
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List
+
+from benchmarks.fixtures import COINGECKO_PAGE, _fixture_path, replay_http
+from benchmarks.stub_llm import StubLLM, default_script
+from benchmarks.synthetic import build_database, parse_size
+
+SUITES = ('tools', 'sqlite', 'dashboard', 'crew')
+
+# Mesmas consultas brutas do dashboard/app.py (os painéis agregados usam o módulo rollups)
+DASHBOARD_SQL = {
+    'moedas_recentes': "SELECT symbol, name, price, date FROM moedas ORDER BY ts DESC LIMIT 50",
+    'sentimentos_recentes': "SELECT symbol, sentiment, score, date FROM sentimento ORDER BY ts DESC LIMIT 50",
+    'latest_run_key': "SELECT (SELECT MAX(id) FROM runs), (SELECT MAX(ts) FROM moedas), (SELECT MAX(ts) FROM sentimento)",
+}
+
+
+def measure(fn: Callable, repeat: int, warmup: int = 1) -> Dict[str, float]:
+    """Executa `fn` (após `warmup` execuções descartadas) e retorna min/mediana/p95/máx em ms."""
+    samples = []
+    # Os prints de diagnóstico das tools não entram na medição nem poluem a saída
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        for _ in range(warmup):
+            fn()
+        for _ in range(repeat):
+            started = time.perf_counter()
+            fn()
+            samples.append((time.perf_counter() - started) * 1000.0)
+    samples.sort()
+    return {'n': repeat, 'min_ms': samples[0], 'median_ms': statistics.median(samples),
+            'p95_ms': samples[min(len(samples) - 1, int(round(0.95 * (len(samples) - 1))))],
+            'max_ms': samples[-1]}
+
+
+class Report:
+    def __init__(self):
+        self.rows: List[dict] = []
+
+    def add(self, suite: str, name: str, size: str, stats: Dict[str, float], **extra):
+        row = {'suite': suite, 'name': name, 'size': size, **stats, **extra}
+        self.rows.append(row)
+        print(f"  {suite:<10} {name:<34} {size:>6} {stats['median_ms']:>11.2f} ms "
+              f"(min {stats['min_ms']:.2f}, p95 {stats['p95_ms']:.2f}, n={stats['n']})", flush=True)
+
+    def save(self, path: str, meta: dict):
+        with open(path, 'w') as handle:
+            json.dump({'meta': meta, 'results': self.rows}, handle, indent=2, ensure_ascii=False)
+
+    def compare(self, path: str):
+        """Imprime a razão mediana atual / mediana salva para cada medição em comum."""
+        with open(path) as handle:
+            baseline = {(r['suite'], r['name'], r['size']): r for r in json.load(handle)['results']}
+        print(f"\nComparação com {path} (razão > 1 = mais lento):")
+        for row in self.rows:
+            base = baseline.get((row['suite'], row['name'], row['size']))
+            if base and base['median_ms'] > 0:
+                ratio = row['median_ms'] / base['median_ms']
+                flag = '  <-- regressão' if ratio > 1.2 else ''
+                print(f"  {row['suite']:<10} {row['name']:<34} {row['size']:>6} {ratio:>6.2f}x{flag}")
+
+
+def _copy_database(source: str, target: str):
+    """Cópia consistente via backup API (as escritas do benchmark não sujam o banco em cache)."""
+    src, dst = sqlite3.connect(source), sqlite3.connect(target)
+    try:
+        src.backup(dst)
+    finally:
+        src.close()
+        dst.close()
+
+
+def _fixture_markets() -> list:
+    with open(_fixture_path(COINGECKO_PAGE.format(page=1))) as handle:
+        return json.load(handle)
+
+
+def bench_tools(report: Report, repeat: int, db_path: str, size: str, workdir: str, http_latency: float):
+    from project.src.project.cache import ResponseCache
+    from project.src.project.tools.coingecko_tool import CoinGeckoTool
+    from project.src.project.tools.news_tool import NewsTool
+    from project.src.project.tools.trend_tool import TrendTool
+
+    symbols = [coin['symbol'].upper() for coin in _fixture_markets()[:10]]
+    # Artefatos das ferramentas de coleta no banco descartável do benchmark
+    tools_db = os.path.join(workdir, 'news.db')
+    with replay_http(http_latency):
+        counter = iter(range(10 ** 9))
+
+        def coingecko_cold():
+            cache = ResponseCache(f"bench-{next(counter)}", path=os.path.join(workdir, 'cache.db'))
+            CoinGeckoTool(cache=cache, db_path=tools_db)._run(top_n=250)
+
+        report.add('tools', 'coingecko_top250_cold', '-', measure(coingecko_cold, repeat))
+        warm = CoinGeckoTool(cache=ResponseCache('bench-warm', path=os.path.join(workdir, 'cache.db')), db_path=tools_db)
+        report.add('tools', 'coingecko_top250_warm', '-', measure(lambda: warm._run(top_n=250), repeat))
+
+        news = NewsTool(db_path=tools_db)
+        report.add('tools', 'news_rss_single', '-', measure(lambda: news._run(query='BTC', only_new=False), repeat))
+        report.add('tools', 'news_rss_batch10', '-', measure(lambda: news._run(symbols=symbols, only_new=False), repeat))
+        report.add('tools', 'news_batch10_only_new', '-', measure(lambda: news._run(symbols=symbols), repeat))
+        report.add('tools', 'news_html_fallback', '-', measure(lambda: news._fetch_headlines('BTC'), repeat))
+
+    trend = TrendTool(db_path)
+    report.add('tools', 'trend_all_72h', size, measure(lambda: trend._run(), repeat))
+    synthetic_symbols = [f"S{i:04d}" for i in range(10)]
+    report.add('tools', 'trend_10_symbols', size, measure(lambda: trend._run(symbols=synthetic_symbols), repeat))
+
+
+def bench_sqlite(report: Report, repeat: int, db_path: str, size: str, workdir: str):
+    from project.src.project.tools.sqlite_tool import SQLiteTool
+
+    tool = SQLiteTool(db_path)
+    reads = [
+        ('get_moedas', None), ('get_sentimentos', None), ('list_runs', None), ('diff_runs', None),
+        ('top_movers', None), ('top_movers', '{"direction": "up", "limit": 50}'),
+        ('aggregates', '{"hours": 24}'), ('aggregates', '{"hours": 24, "cursor": 100}'), ('deltas', None),
+        ('query', 'SELECT symbol, COUNT(*) FROM moedas GROUP BY symbol'),
+        ('query', 'SELECT symbol, AVG(price) FROM moedas WHERE ts >= (SELECT MAX(ts) FROM moedas) - 86400 GROUP BY symbol'),
+    ]
+    for action, data in reads:
+        name = action if data is None else f"{action} {data}"[:34]
+        report.add('sqlite', name, size, measure(lambda: tool._run(action, data), repeat))
+
+    # Escritas numa cópia descartável, para o banco em cache continuar reprodutível
+    copy = os.path.join(workdir, f"writes_{size}.db")
+    _copy_database(db_path, copy)
+    writer = SQLiteTool(copy)
+    writer.start_run('bench')
+    coins = json.dumps(_fixture_markets())
+    report.add('sqlite', 'save_moedas_json250', size, measure(lambda: writer._run('save_moedas', coins), repeat))
+    text = "\n".join(f"{c['symbol'].upper()} - {c['name']} (${c['current_price']})" for c in _fixture_markets()[:50])
+    report.add('sqlite', 'save_moedas_text50', size, measure(lambda: writer._run('save_moedas', text), repeat))
+    blocks = "\n\n".join(f"Notícias recentes sobre S{i:04d}:\n- manchete um\n- manchete dois" for i in range(10))
+    report.add('sqlite', 'save_sentimento_batch10', size, measure(lambda: writer._run('save_sentimento', blocks), repeat))
+    writer.finish_run('ok')
+
+
+def bench_dashboard(report: Report, repeat: int, db_path: str, size: str):
+    from project.src.project.db import get_manager
+    from project.src.project.rollups import price_candles, rollup_symbols, sentiment_ranking
+
+    db = get_manager(db_path)
+    conn = db.connection()
+    for name, sql in DASHBOARD_SQL.items():
+        report.add('dashboard', name, size, measure(lambda: conn.execute(sql).fetchall(), repeat))
+    symbol = (rollup_symbols(db, limit=1) or ['BTC'])[0]
+    report.add('dashboard', 'sentiment_ranking_24h', size, measure(lambda: sentiment_ranking(db), repeat))
+    report.add('dashboard', 'rollup_symbols', size, measure(lambda: rollup_symbols(db), repeat))
+    report.add('dashboard', 'candles_1h', size, measure(lambda: price_candles(db, symbol, '1h'), repeat))
+    report.add('dashboard', 'candles_1d', size, measure(lambda: price_candles(db, symbol, '1d'), repeat))
+
+
+def bench_crew(report: Report, db_path: str, size: str, workdir: str, modes: List[str],
+               llm_latency: float, http_latency: float) -> dict:
+    """Roda o crew completo por modo de execução; tempos por tarefa vêm do task_callback."""
+    from project.src.project import crew as crew_module
+    from project.src.project.cache import ResponseCache
+    from project.src.project.tools.coingecko_tool import CoinGeckoTool
+    from project.src.project.tools.news_tool import NewsTool
+    from project.src.project.tools.sqlite_tool import SQLiteTool
+    from project.src.project.tools.trend_tool import TrendTool
+
+    symbols = [coin['symbol'].upper() for coin in _fixture_markets()[:10]]
+    llm_usage = {}
+    for mode in modes:
+        copy = os.path.join(workdir, f"crew_{mode}_{size}.db")
+        _copy_database(db_path, copy)
+        # As tools do crew são globais do módulo: apontá-las para a cópia e para o LLM roteirizado
+        crew_module.coingecko_tool = CoinGeckoTool(cache=ResponseCache(f"crew-{mode}", path=os.path.join(workdir, 'cache.db')),
+                                                    db_path=copy)
+        crew_module.news_tool = NewsTool(db_path=copy)
+        crew_module.sqlite_tool = SQLiteTool(copy)
+        crew_module.trend_tool = TrendTool(copy)
+        crew_module.EXECUTION_MODE = mode
+        llm = StubLLM(default_script(symbols), latency=llm_latency)
+        crew_module.agent_llm = llm
+
+        crew = crew_module.CryptoTrendCrew().crew()
+        crew.verbose = False
+        for agent in crew.agents:
+            agent.verbose = False
+        finished = {}
+        started = time.perf_counter()
+        crew.task_callback = lambda output: finished.setdefault(output.name, time.perf_counter() - started)
+        with replay_http(http_latency), open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            crew.kickoff(inputs=dict(crew_module.DEFAULT_INPUTS))
+        total = time.perf_counter() - started
+
+        previous = 0.0
+        for name, offset in sorted(finished.items(), key=lambda item: item[1]):
+            stats = {'n': 1, 'min_ms': (offset - previous) * 1000, 'median_ms': (offset - previous) * 1000,
+                     'p95_ms': (offset - previous) * 1000, 'max_ms': (offset - previous) * 1000}
+            report.add(f"crew[{mode}]", name, size, stats, finished_at_ms=offset * 1000)
+            previous = offset
+        report.add(f"crew[{mode}]", 'kickoff_total', size,
+                   {'n': 1, 'min_ms': total * 1000, 'median_ms': total * 1000, 'p95_ms': total * 1000, 'max_ms': total * 1000})
+        llm_usage[mode] = {role: {'calls': llm.calls[role], 'prompt_tokens_est': llm.prompt_chars[role] // 4}
+                           for role in llm.calls}
+        for role, usage in llm_usage[mode].items():
+            print(f"    LLM {role}: {usage['calls']} chamadas, ~{usage['prompt_tokens_est']} tokens de prompt")
+    return llm_usage
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark offline (fixtures + LLM determinístico) do Crypto Trend Crew.")
+    parser.add_argument('--sizes', default='10k', help="Tamanhos dos bancos sintéticos em linhas de moedas (ex.: 10k,1m,10m).")
+    parser.add_argument('--suites', default=','.join(SUITES), help=f"Suítes a executar: {', '.join(SUITES)}.")
+    parser.add_argument('--repeat', type=int, default=5, help="Repetições por medição.")
+    parser.add_argument('--modes', default='sequential,dag', help="Modos de execução do crew a medir.")
+    parser.add_argument('--llm-latency', type=float, default=0.0, help="Latência simulada por chamada ao LLM (s).")
+    parser.add_argument('--http-latency', type=float, default=0.0, help="Latência simulada por requisição HTTP (s).")
+    parser.add_argument('--rebuild', action='store_true', help="Regerar os bancos sintéticos.")
+    parser.add_argument('--json', default=None, help="Salvar os resultados neste arquivo JSON.")
+    parser.add_argument('--compare', default=None, help="Comparar com um resultado JSON salvo anteriormente.")
+    args = parser.parse_args(argv)
+
+    suites = [s.strip() for s in args.suites.split(',') if s.strip()]
+    unknown = set(suites) - set(SUITES)
+    if unknown:
+        parser.error(f"Suítes desconhecidas: {', '.join(sorted(unknown))}")
+
+    report = Report()
+    workdir = tempfile.mkdtemp(prefix='crypto-bench-')
+    llm_usage = {}
+    try:
+        for label in [s.strip() for s in args.sizes.split(',') if s.strip()]:
+            rows = parse_size(label)
+            started = time.perf_counter()
+            db_path = build_database(rows, rebuild=args.rebuild)
+            print(f"\nBanco sintético {label} ({rows} linhas): {db_path} [{time.perf_counter() - started:.1f}s]")
+            if 'tools' in suites:
+                bench_tools(report, args.repeat, db_path, label, workdir, args.http_latency)
+            if 'sqlite' in suites:
+                bench_sqlite(report, args.repeat, db_path, label, workdir)
+            if 'dashboard' in suites:
+                bench_dashboard(report, args.repeat, db_path, label)
+            if 'crew' in suites:
+                modes = [m.strip() for m in args.modes.split(',') if m.strip()]
+                llm_usage[label] = bench_crew(report, db_path, label, workdir, modes, args.llm_latency, args.http_latency)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    if args.json:
+        report.save(args.json, {'argv': argv if argv is not None else sys.argv[1:], 'python': sys.version.split()[0],
+                                'sqlite': sqlite3.sqlite_version, 'created_at': int(time.time()), 'llm_usage': llm_usage})
+        print(f"\nResultados salvos em {args.json}")
+    if args.compare:
+        report.compare(args.compare)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,112 @@
+"""
+LLM determinístico para rodar o crew completo sem provedor.
+
+Cada agente segue um roteiro fixo de chamadas de ferramenta no formato ReAct
+que o crewai interpreta (Action / Action Input), e encerra com um Final Answer
+montado a partir da última observação. Assim o benchmark exercita as
+ferramentas, o banco e a orquestração reais; só a inferência é substituída.
+"""
+import json
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Union
+
+from crewai.llms.base_llm import BaseLLM
+from crewai.utilities.events import LLMCallCompletedEvent, LLMCallStartedEvent, crewai_event_bus
+from crewai.utilities.events.llm_events import LLMCallType
+
+from project.src.project.artifacts import find_handle
+
+# Marcador no roteiro: substituído pela última observação recebida pelo agente
+LAST_OBSERVATION = object()
+# Marcador no roteiro: substituído pelo handle de artefato citado na última observação
+LAST_HANDLE = object()
+
+
+def default_script(news_symbols: List[str]) -> Dict[str, list]:
+    """Roteiro por papel do agente (texto de `role` no agents.yaml)."""
+    return {
+        'Identificador de Moedas em Evidência': [
+            ('CoinGecko Tool', {'coin': 'all', 'top_n': 50}),
+            ('SQLite Tool', {'action': 'save_moedas', 'data': LAST_HANDLE}),
+        ],
+        'Analista de Sentimento de Notícias': [
+            ('News Tool', {'symbols': news_symbols, 'only_new': False}),
+            ('SQLite Tool', {'action': 'save_sentimento', 'data': LAST_HANDLE}),
+        ],
+        'Armazenador de Dados': [
+            ('SQLite Tool', {'action': 'aggregates', 'data': '{"hours": 1}'}),
+        ],
+        'Analista de Tendências': [
+            ('Trend Tool', {'hours': 72, 'limit': 30}),
+        ],
+        'Comparador Temporal de Dados': [
+            ('SQLite Tool', {'action': 'deltas'}),
+            ('Trend Tool', {'hours': 24, 'limit': 20}),
+        ],
+        'Gerador de Relatórios': [
+            ('SQLite Tool', {'action': 'top_movers'}),
+            ('SQLite Tool', {'action': 'aggregates'}),
+        ],
+    }
+
+
+class StubLLM(BaseLLM):
+    """LLM roteirizado com latência simulada opcional e contagem de chamadas/prompt por agente."""
+
+    def __init__(self, script: Dict[str, list], latency: float = 0.0, model: str = 'stub'):
+        super().__init__(model=model, temperature=0)
+        self.script = script
+        self.latency = latency
+        self._lock = threading.Lock()
+        self.calls = defaultdict(int)
+        self.prompt_chars = defaultdict(int)
+
+    def call(self, messages: Union[str, List[Dict[str, str]]], tools: Optional[List[dict]] = None,
+             callbacks: Optional[List[Any]] = None, available_functions: Optional[Dict[str, Any]] = None) -> str:
+        if isinstance(messages, str):
+            messages = [{'role': 'user', 'content': messages}]
+        # Mesmos eventos do LLM do crewai, para a telemetria contar chamadas e tokens estimados
+        crewai_event_bus.emit(self, event=LLMCallStartedEvent(messages=messages, tools=tools, callbacks=callbacks,
+                                                              available_functions=available_functions))
+        response = self._respond(messages)
+        crewai_event_bus.emit(self, event=LLMCallCompletedEvent(response=response, call_type=LLMCallType.LLM_CALL))
+        return response
+
+    def _respond(self, messages: List[Dict[str, str]]) -> str:
+        role = self._role(messages)
+        with self._lock:
+            self.calls[role] += 1
+            self.prompt_chars[role] += sum(len(m.get('content') or '') for m in messages)
+        if self.latency:
+            time.sleep(self.latency)
+
+        assistant = [m['content'] for m in messages if m.get('role') == 'assistant']
+        observations = [text.split('Observation:', 1)[1].strip() for text in assistant if 'Observation:' in text]
+        steps = self.script.get(role, [])
+        last = observations[-1] if observations else ''
+
+        if len(observations) < len(steps):
+            tool, args = steps[len(observations)]
+            markers = {id(LAST_OBSERVATION): last, id(LAST_HANDLE): find_handle(last) or last}
+            args = {key: markers.get(id(value), value) for key, value in args.items()}
+            return (f"Thought: Vou usar a ferramenta {tool}.\n"
+                    f"Action: {tool}\n"
+                    f"Action Input: {json.dumps(args, ensure_ascii=False)}")
+        return f"Thought: Tenho o necessário.\nFinal Answer: Resumo ({role}):\n{last[:2000]}"
+
+    def _role(self, messages: List[Dict[str, str]]) -> str:
+        # O prompt de sistema do crewai começa com "You are {role}."; o contexto de tarefas
+        # anteriores pode citar outros papéis, então só essa frase identifica o agente
+        head = ' '.join(m.get('content') or '' for m in messages[:2])
+        for role in self.script:
+            if f"You are {role}" in head:
+                return role
+        return 'desconhecido'
+
+    def supports_function_calling(self) -> bool:
+        return False
+
+    def get_context_window_size(self) -> int:
+        return 128000
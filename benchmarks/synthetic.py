@@ -0,0 +1,103 @@
+"""
+Gerador de bancos SQLite sintéticos de tamanho configurável.
+
+O banco segue o schema real (migrações aplicadas por `ensure_schema`): runs
+periódicos com um snapshot de `symbols` moedas cada, sentimentos para parte
+delas e os agregados hora/dia consolidados ao final. Os bancos gerados ficam
+em `benchmarks/.data/` e são reaproveitados entre execuções.
+"""
+import os
+import random
+import time
+
+from project.src.project import rollups
+from project.src.project.db import get_manager
+from project.src.project.ingest import DATE_FORMAT
+from project.src.project.schema import ensure_schema
+
+BENCH_DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.data')
+
+CHUNK = 50_000
+
+
+def parse_size(value: str) -> int:
+    """'10k', '1m', '10M', '2500' -> número de linhas."""
+    value = value.strip().lower()
+    multiplier = {'k': 1_000, 'm': 1_000_000}.get(value[-1:], 1)
+    return int(float(value.rstrip('km')) * multiplier)
+
+
+def database_path(rows: int) -> str:
+    return os.path.join(BENCH_DATA_DIR, f"bench_{rows}.db")
+
+
+def build_database(rows: int, symbols: int = 500, interval: int = 300, sentiment_ratio: float = 0.1,
+                   seed: int = 42, path: str = None, rebuild: bool = False) -> str:
+    """
+    Gera (ou reaproveita) um banco com `rows` linhas em `moedas`.
+
+    Cada run grava `symbols` moedas a cada `interval` segundos, terminando agora;
+    `sentiment_ratio` das moedas de cada run recebem um sentimento.
+    """
+    path = path or database_path(rows)
+    if os.path.exists(path) and not rebuild:
+        return path
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+
+    rng = random.Random(seed)
+    db = get_manager(path)
+    ensure_schema(db)
+
+    names = [f"S{i:04d}" for i in range(symbols)]
+    prices = [10 ** rng.uniform(-3, 4.5) for _ in names]
+    volumes = [10 ** rng.uniform(5, 10) for _ in names]
+    runs = max(1, -(-rows // symbols))
+    per_run = min(symbols, rows)
+    with_sentiment = max(1, int(per_run * sentiment_ratio))
+    start = int(time.time()) - runs * interval
+
+    def moedas():
+        produced = 0
+        for run in range(runs):
+            ts = start + run * interval
+            date = time.strftime(DATE_FORMAT, time.localtime(ts))
+            for i in range(min(per_run, rows - produced)):
+                # Passeio aleatório multiplicativo por símbolo
+                prices[i] *= 1 + rng.gauss(0, 0.004)
+                change = rng.gauss(0, 4)
+                yield (names[i], names[i], prices[i], volumes[i] * rng.uniform(0.5, 1.5), change,
+                       ts, date, run + 1)
+            produced += per_run
+
+    def sentimentos():
+        for run in range(runs):
+            ts = start + run * interval
+            date = time.strftime(DATE_FORMAT, time.localtime(ts))
+            for i in range(with_sentiment):
+                news = rng.randint(0, 10)
+                score = min(news * 0.1, 1.0)
+                label = 'positivo' if score > 0.5 else 'neutro'
+                yield names[i], label, score, news, ts, date, run + 1
+
+    with db.transaction() as conn:
+        conn.executemany('INSERT INTO runs (id, kind, status, started_at, finished_at) VALUES (?, ?, ?, ?, ?)',
+                         ((run + 1, 'bench', 'ok', start + run * interval, start + run * interval + 5)
+                          for run in range(runs)))
+    for sql, generator in (
+            ('INSERT INTO moedas (symbol, name, price, volume, change_24h, ts, date, run_id) '
+             'VALUES (?, ?, ?, ?, ?, ?, ?, ?)', moedas()),
+            ('INSERT INTO sentimento (symbol, sentiment, score, news_count, ts, date, run_id) '
+             'VALUES (?, ?, ?, ?, ?, ?, ?)', sentimentos())):
+        while True:
+            chunk = [row for _, row in zip(range(CHUNK), generator)]
+            if not chunk:
+                break
+            with db.transaction() as conn:
+                conn.executemany(sql, chunk)
+
+    with db.transaction() as conn:
+        rollups.backfill(conn)
+    return path
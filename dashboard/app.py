@@ -1,104 +1,155 @@
 import streamlit as st
-import sqlite3
 import os
-from datetime import datetime, timedelta
+import sys
+from datetime import datetime
+
+# Raiz do repositório no path para importar o pacote do projeto
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from project.src.project.collector import fetch_latest, fetch_window
+from project.src.project.db import DEFAULT_DB_PATH, get_manager
+from project.src.project.jobs import DONE, CrewJob
+from project.src.project.rollups import price_candles, rollup_symbols, sentiment_ranking
+from project.src.project.schema import ensure_schema
 
 # Caminho do banco de dados
-DB_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), '../data/crypto_trend.db'))
+DB_PATH = DEFAULT_DB_PATH
+
+# Validade máxima das leituras em cache; uma nova coleta invalida antes disso
+CACHE_TTL = int(os.getenv('DASHBOARD_CACHE_TTL', 300))
 
+# Atualização do painel ao vivo (leituras da janela em memória do coletor contínuo)
+LIVE_REFRESH = int(os.getenv('DASHBOARD_LIVE_REFRESH', 5))
+
+st.set_page_config(page_title="Crypto Trend Crew Dashboard", layout="wide")
 
-# Função para rodar o pipeline CrewAI
-def rodar_crew():
-    import sys
-    sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../project/src')))
-    from project.crew import CryptoTrendCrew
-    crew = CryptoTrendCrew().crew().kickoff()
 
+def _criar_crew():
+    from project.src.project.crew import CryptoTrendCrew
+    return CryptoTrendCrew().crew()
 
-# Botão para executar os agentes
+
+@st.cache_resource
+def get_job() -> CrewJob:
+    # Um único job por processo do Streamlit, compartilhado entre sessões e reruns
+    return CrewJob()
+
+
+# Botão para executar os agentes em segundo plano (a interface continua respondendo)
 st.sidebar.title('Execução do Pipeline')
-if st.sidebar.button('Executar Análise Multiagente'):
-    with st.spinner('Executando agentes do CrewAI...'):
-        rodar_crew()
-    st.success('Execução concluída! Atualize os painéis para ver os novos resultados.')
+job = get_job()
+if st.sidebar.button('Executar Análise Multiagente', disabled=job.running()):
+    from project.src.project.crew import DEFAULT_INPUTS
+    if job.start(_criar_crew, dict(DEFAULT_INPUTS)):
+        st.session_state['job_visto'] = None
+
+
+@st.fragment(run_every=2)
+def progresso_crew():
+    state = job.snapshot()
+    if state['status'] == 'idle':
+        return
+    if state['status'] == 'running':
+        st.progress(state['progress'], text=f"Executando agentes... {state['elapsed']:.0f}s, {state['steps']} passos")
+    elif state['status'] == 'ok':
+        st.success(f"Execução concluída em {state['elapsed']:.0f}s.")
+    else:
+        st.error(f"Execução falhou: {state['error']}")
+    for name, status in state['tasks'].items():
+        st.caption(f"{'✅' if status == DONE else '⏳'} {name}")
+
+    # Ao terminar, recarrega a página inteira uma vez para exibir os novos dados
+    if state['finished_at'] and st.session_state.get('job_visto') != state['finished_at']:
+        st.session_state['job_visto'] = state['finished_at']
+        st.rerun()
+
+
+with st.sidebar:
+    progresso_crew()
 
 
 def get_connection():
-    return sqlite3.connect(DB_PATH)
+    # Conexão persistente por thread em modo WAL: lê enquanto o crew escreve
+    return get_manager(DB_PATH).connection()
 
 
+@st.cache_resource
 def ensure_tables():
-    """Cria as tabelas se não existirem"""
-    conn = get_connection()
-    c = conn.cursor()
-    c.execute('''CREATE TABLE IF NOT EXISTS moedas (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        symbol TEXT,
-        name TEXT,
-        price REAL,
-        date TEXT
-    )''')
-    c.execute('''CREATE TABLE IF NOT EXISTS sentimento (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        symbol TEXT,
-        sentiment TEXT,
-        score REAL,
-        date TEXT
-    )''')
-    conn.commit()
-    conn.close()
-
-
-def get_moedas():
+    """Aplica as migrações pendentes do schema (uma vez por processo)"""
+    ensure_schema(get_manager(DB_PATH))
+
+
+def latest_run_key() -> tuple:
+    """Identifica a última coleta gravada; muda a cada run e invalida o cache de leituras."""
+    ensure_tables()
+    return tuple(get_connection().execute(
+        "SELECT (SELECT MAX(id) FROM runs), (SELECT MAX(ts) FROM moedas), (SELECT MAX(ts) FROM sentimento)").fetchone())
+
+
+@st.cache_data(ttl=CACHE_TTL, show_spinner=False)
+def _consultar(sql: str, params: tuple, run_key: tuple) -> list:
+    # run_key faz parte da chave do cache: uma nova coleta gera uma nova entrada
+    return get_connection().execute(sql, params).fetchall()
+
+
+def get_moedas(run_key):
     try:
-        ensure_tables()
-        conn = get_connection()
-        c = conn.cursor()
-        c.execute("SELECT symbol, name, price, date FROM moedas ORDER BY date DESC LIMIT 50")
-        data = c.fetchall()
-        conn.close()
-        return data
+        return _consultar("SELECT symbol, name, price, date FROM moedas ORDER BY ts DESC LIMIT 50", (), run_key)
     except Exception as e:
         st.error(f"Erro ao buscar moedas: {e}")
         return []
 
 
-def get_sentimentos():
+def get_sentimentos(run_key):
     try:
-        ensure_tables()
-        conn = get_connection()
-        c = conn.cursor()
-        c.execute("SELECT symbol, sentiment, score, date FROM sentimento ORDER BY date DESC LIMIT 50")
-        data = c.fetchall()
-        conn.close()
-        return data
+        return _consultar("SELECT symbol, sentiment, score, date FROM sentimento ORDER BY ts DESC LIMIT 50", (), run_key)
     except Exception as e:
         st.error(f"Erro ao buscar sentimentos: {e}")
         return []
 
 
-def get_tendencias():
+@st.cache_data(ttl=CACHE_TTL, show_spinner=False)
+def _ranking_sentimento(run_key: tuple) -> list:
+    return sentiment_ranking(get_manager(DB_PATH), hours=24, limit=10)
+
+
+@st.cache_data(ttl=CACHE_TTL, show_spinner=False)
+def _candles(symbol: str, period: str, run_key: tuple) -> list:
+    return price_candles(get_manager(DB_PATH), symbol, period, limit=48 if period == '1h' else 30)
+
+
+@st.cache_data(ttl=CACHE_TTL, show_spinner=False)
+def _simbolos(run_key: tuple) -> list:
+    return rollup_symbols(get_manager(DB_PATH))
+
+
+def get_tendencias(run_key):
     try:
-        ensure_tables()
-        # Exemplo simples: moedas com score de sentimento > 0.5
-        conn = get_connection()
-        c = conn.cursor()
-        c.execute(
-            "SELECT symbol, AVG(score) as avg_score FROM sentimento WHERE date >= ? GROUP BY symbol ORDER BY avg_score DESC LIMIT 10",
-            ((datetime.now() - timedelta(days=1)).strftime('%Y-%m-%d'),))
-        data = c.fetchall()
-        conn.close()
-        return data
+        # Score médio das últimas 24h a partir dos agregados horários (custo fixo, independente do histórico)
+        return _ranking_sentimento(run_key)
     except Exception as e:
         st.error(f"Erro ao buscar tendências: {e}")
         return []
 
 
-st.set_page_config(page_title="Crypto Trend Crew Dashboard", layout="wide")
+def get_candles(symbol, period, run_key):
+    try:
+        return _candles(symbol, period, run_key)
+    except Exception as e:
+        st.error(f"Erro ao buscar preços agregados: {e}")
+        return []
+
+
+try:
+    run_key = latest_run_key()
+except Exception as e:
+    st.error(f"Erro ao acessar o banco de dados: {e}")
+    run_key = None
+
 st.title("📈 Crypto Trend Crew - Dashboard de Tendências")
 
 st.header("Top 50 Moedas em Evidência (últimas 24h)")
-moedas = get_moedas()
+moedas = get_moedas(run_key)
 if moedas:
     st.dataframe([
         {"Símbolo": m[0], "Nome": m[1], "Preço (USD)": m[2], "Data": m[3]} for m in moedas
@@ -107,7 +158,7 @@ else:
     st.info("Nenhuma moeda encontrada no banco de dados. Execute o pipeline primeiro!")
 
 st.header("Análise de Sentimento (últimas 24h)")
-sentimentos = get_sentimentos()
+sentimentos = get_sentimentos(run_key)
 if sentimentos:
     st.dataframe([
         {"Símbolo": s[0], "Sentimento": s[1], "Score": s[2], "Data": s[3]} for s in sentimentos
@@ -116,14 +167,56 @@ else:
     st.info("Nenhuma análise de sentimento encontrada. Execute o pipeline primeiro!")
 
 st.header("Tendências de Alta (baseado em sentimento)")
-tendencias = get_tendencias()
+tendencias = get_tendencias(run_key)
 if tendencias:
     st.dataframe([
-        {"Símbolo": t[0], "Score Médio": t[1]} for t in tendencias
+        {"Símbolo": t[0], "Score Médio": t[1], "Notícias": t[2]} for t in tendencias
     ])
 else:
     st.info("Nenhuma tendência detectada. Execute o pipeline primeiro!")
 
+st.header("Preço por Hora / Dia")
+try:
+    simbolos = _simbolos(run_key)
+except Exception as e:
+    st.error(f"Erro ao buscar símbolos: {e}")
+    simbolos = []
+if simbolos:
+    col_simbolo, col_periodo = st.columns(2)
+    simbolo = col_simbolo.selectbox("Moeda", simbolos)
+    periodo = col_periodo.radio("Período", ["1h", "1d"], horizontal=True,
+                                format_func=lambda p: "Horário" if p == "1h" else "Diário")
+    candles = get_candles(simbolo, periodo, run_key)
+    if candles:
+        linhas = [{"Período": datetime.fromtimestamp(c[0]), "Abertura": c[1], "Máxima": c[2], "Mínima": c[3],
+                   "Fechamento": c[4], "Volume Médio": c[5], "Amostras": c[6]} for c in candles]
+        st.line_chart(linhas, x="Período", y="Fechamento")
+        st.dataframe(linhas)
+else:
+    st.info("Nenhum preço agregado disponível. Execute o pipeline primeiro!")
+
+
+@st.fragment(run_every=LIVE_REFRESH)
+def painel_ao_vivo():
+    # Lê direto da memória do coletor; sem ele rodando sobre este banco, o painel só orienta
+    ultimos = fetch_latest(db_path=DB_PATH)
+    if not ultimos:
+        st.info("Coletor contínuo não está em execução. Inicie com `make collector`.")
+        return
+    simbolo = st.selectbox("Moeda", sorted(u['symbol'] for u in ultimos), key='simbolo_ao_vivo')
+    janela = fetch_window([simbolo], points=240, db_path=DB_PATH)
+    if janela is not None and len(janela['symbols']):
+        validos = janela['ts'][0] > 0
+        st.line_chart([{"Horário": datetime.fromtimestamp(int(ts)), "Preço (USD)": float(preco)}
+                       for ts, preco in zip(janela['ts'][0][validos], janela['price'][0][validos])],
+                      x="Horário", y="Preço (USD)")
+    atualizado = max(u['ts'] for u in ultimos)
+    st.caption(f"{len(ultimos)} moedas na janela; último snapshot às {datetime.fromtimestamp(atualizado):%H:%M:%S}.")
+
+
+st.header("Preço ao Vivo (coletor contínuo)")
+painel_ao_vivo()
+
 st.markdown("---")
 st.subheader("Recomendações e Conclusões")
 st.write("As recomendações e conclusões são geradas automaticamente pelo sistema multiagente com base nos dados mais recentes.")
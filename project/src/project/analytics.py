@@ -0,0 +1,180 @@
+import time
+import warnings
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from project.src.project import rollups
+
+# Limiares da classificação de tendência
+TREND_THRESHOLD = 0.01  # MA curta 1% acima/abaixo da MA longa
+CHANGE_24H_THRESHOLD = 3.0  # fallback com um único ponto: variação 24h em %
+VOLUME_SPIKE_RATIO = 2.0
+ZSCORE_ANOMALY = 2.0
+
+# Tamanho do balde (o dos agregados '1h'): médias e retornos são contados em horas
+BUCKET_SECONDS = rollups.PERIODS['1h']
+
+COLUMNS = ('symbol', 'points', 'price', 'return_pct', 'change_24h', 'ma_short', 'ma_long',
+           'zscore', 'volume_ratio', 'volume_spike', 'trend')
+
+
+def load_history(db, hours: float = 72, window: Optional[int] = None,
+                 symbols: Optional[List[str]] = None) -> Dict[str, np.ndarray]:
+    """
+    Carrega o histórico de moedas em matrizes (símbolo x hora).
+
+    Lê o fechamento e o volume médio de cada hora dos agregados `rollup_moedas`
+    (período '1h'), então as médias móveis e os retornos cobrem horas qualquer que
+    seja o intervalo da coleta, sem varrer os snapshots brutos. A variação 24h vem
+    do último snapshot do símbolo. Cada linha guarda as últimas `window` horas
+    (padrão: `hours`) alinhadas à direita, com a coluna -1 na hora do ponto mais
+    recente; horas sem dado ficam NaN.
+    """
+    window = window or max(2, int(np.ceil(hours)))
+    since = int(time.time() - hours * 3600)
+    sql = '''
+        SELECT symbol, bucket, close, CASE WHEN volume_n > 0 THEN volume_sum / volume_n END,
+               CASE WHEN bucket = (SELECT MAX(bucket) FROM rollup_moedas l
+                                   WHERE l.period = r.period AND l.symbol = r.symbol)
+                    THEN (SELECT change_24h FROM moedas m WHERE m.symbol = r.symbol AND m.ts = r.close_ts
+                          ORDER BY m.id DESC LIMIT 1) END
+        FROM rollup_moedas r WHERE period = '1h' AND bucket >= ?'''
+    params = [since - since % BUCKET_SECONDS]
+    if symbols:
+        sql += f" AND symbol IN ({','.join('?' * len(symbols))})"
+        params += [s.upper() for s in symbols]
+    rows = db.connection().execute(sql + ' ORDER BY symbol, bucket', params).fetchall()
+
+    names = np.array([r[0] for r in rows], dtype=str)
+    ts = np.array([r[1] for r in rows], dtype=np.int64)
+    values = np.array([r[2:] for r in rows], dtype=float).reshape(len(rows), 3)  # None vira NaN
+    symbols_u, inverse = np.unique(names, return_inverse=True)
+    # Agrupar por símbolo preservando a ordem temporal da consulta
+    order = np.argsort(inverse, kind='stable')
+    return _hourly_matrices(symbols_u, inverse[order], ts[order], values[order], window)
+
+
+def resample_hourly(history: Dict[str, np.ndarray], window: int = 72) -> Dict[str, np.ndarray]:
+    """Reamostra em baldes horários a janela bruta do coletor contínuo (matriz `ts` por ponto)."""
+    valid = history['ts'] > 0  # posições sem ponto têm ts 0
+    row_idx = np.nonzero(valid)[0]  # linha a linha, cada uma em ordem cronológica
+    values = np.stack([history[name][valid] for name in ('price', 'volume', 'change_24h')], axis=1)
+    return _hourly_matrices(history['symbols'], row_idx, history['ts'][valid], values, window)
+
+
+def _hourly_matrices(symbols: np.ndarray, row_idx: np.ndarray, ts: np.ndarray, values: np.ndarray,
+                     window: int) -> Dict[str, np.ndarray]:
+    """
+    Monta as matrizes horárias a partir de pontos agrupados por símbolo (`row_idx`)
+    e em ordem cronológica dentro de cada símbolo.
+    """
+    bucket = ts // BUCKET_SECONDS
+    # Último ponto de cada (símbolo, hora)
+    last = np.ones(len(bucket), dtype=bool)
+    last[:-1] = (row_idx[1:] != row_idx[:-1]) | (bucket[1:] != bucket[:-1])
+    row_idx, bucket, values = row_idx[last], bucket[last], values[last]
+
+    newest = np.full(len(symbols), np.iinfo(np.int64).min)
+    np.maximum.at(newest, row_idx, bucket)
+    col_idx = window - 1 - (newest[row_idx] - bucket)
+    keep = col_idx >= 0
+    row_idx, col_idx = row_idx[keep], col_idx[keep]
+
+    matrices = {}
+    for i, name in enumerate(('price', 'volume', 'change_24h')):
+        matrix = np.full((len(symbols), window), np.nan)
+        matrix[row_idx, col_idx] = values[keep, i]
+        matrices[name] = matrix
+    present = np.bincount(row_idx, minlength=len(symbols)) > 0
+    matrices = {name: matrix[present] for name, matrix in matrices.items()}
+    matrices['symbols'] = np.asarray(symbols, dtype=str)[present]
+    matrices['points'] = np.bincount(row_idx, minlength=len(symbols))[present]
+    return matrices
+
+
+def compute_trends(history: Dict[str, np.ndarray], short: int = 3, long: int = 12) -> Dict[str, np.ndarray]:
+    """Calcula retornos, médias móveis, z-score, picos de volume e a tendência de todas as moedas de uma vez."""
+    price, volume, change = history['price'], history['volume'], history['change_24h']
+    n = len(history['symbols'])
+    if n == 0:
+        return {column: np.array([]) for column in COLUMNS}
+
+    with warnings.catch_warnings(), np.errstate(divide='ignore', invalid='ignore'):
+        warnings.simplefilter('ignore', category=RuntimeWarning)
+        last = price[:, -1]
+        first = price[np.arange(n), np.argmax(~np.isnan(price), axis=1)]
+        return_pct = (last / first - 1.0) * 100.0
+
+        ma_short = np.nanmean(price[:, -short:], axis=1)
+        ma_long = np.nanmean(price[:, -long:], axis=1)
+
+        log_returns = np.diff(np.log(price), axis=1)
+        mean_r = np.nanmean(log_returns[:, :-1], axis=1)
+        std_r = np.nanstd(log_returns[:, :-1], axis=1)
+        zscore = np.where(std_r > 0, (log_returns[:, -1] - mean_r) / std_r, np.nan)
+
+        volume_ratio = volume[:, -1] / np.nanmean(volume[:, :-1], axis=1)
+        volume_spike = volume_ratio >= VOLUME_SPIKE_RATIO
+
+        change_24h = change[:, -1]
+        multi_point = history['points'] > 1
+        ma_gap = ma_short / ma_long - 1.0
+
+    trend = np.select(
+        [multi_point & (ma_gap > TREND_THRESHOLD),
+         multi_point & (ma_gap < -TREND_THRESHOLD),
+         ~multi_point & (change_24h > CHANGE_24H_THRESHOLD),
+         ~multi_point & (change_24h < -CHANGE_24H_THRESHOLD)],
+        ['alta', 'baixa', 'alta', 'baixa'],
+        default='consolidação')
+
+    return {
+        'symbol': history['symbols'],
+        'points': history['points'],
+        'price': last,
+        'return_pct': return_pct,
+        'change_24h': change_24h,
+        'ma_short': ma_short,
+        'ma_long': ma_long,
+        'zscore': zscore,
+        'volume_ratio': volume_ratio,
+        'volume_spike': volume_spike,
+        'trend': trend,
+    }
+
+
+def format_trend_table(report: Dict[str, np.ndarray], limit: int = 30, sort_by: str = 'return_pct') -> str:
+    """Tabela compacta (uma linha por moeda) para o LLM interpretar."""
+    n = len(report['symbol'])
+    if n == 0:
+        return "Nenhum dado de moedas no período. Execute a coleta primeiro."
+    key = np.nan_to_num(np.abs(report.get(sort_by, report['return_pct']).astype(float)), nan=-1.0)
+    order = np.argsort(-key, kind='stable')[:limit]
+
+    def fmt(value, pattern):
+        return '-' if value is None or (isinstance(value, float) and np.isnan(value)) else pattern.format(value)
+
+    counts = {t: int(np.sum(report['trend'] == t)) for t in ('alta', 'baixa', 'consolidação')}
+    lines = [f"Tendências ({n} moedas; alta={counts['alta']}, baixa={counts['baixa']}, "
+             f"consolidação={counts['consolidação']}). Mostrando {len(order)} por |{sort_by}|.",
+             "symbol|pts|price|ret%|chg24h%|ma_s/ma_l|z|vol_x|trend"]
+    for i in order:
+        ratio = report['ma_short'][i] / report['ma_long'][i] if report['ma_long'][i] else np.nan
+        flags = []
+        if report['volume_spike'][i]:
+            flags.append('pico_volume')
+        if abs(np.nan_to_num(report['zscore'][i])) >= ZSCORE_ANOMALY:
+            flags.append('anomalia')
+        lines.append('|'.join([
+            str(report['symbol'][i]),
+            str(int(report['points'][i])),
+            fmt(float(report['price'][i]), '{:.6g}'),
+            fmt(float(report['return_pct'][i]), '{:+.2f}'),
+            fmt(float(report['change_24h'][i]), '{:+.2f}'),
+            fmt(float(ratio), '{:.3f}'),
+            fmt(float(report['zscore'][i]), '{:+.1f}'),
+            fmt(float(report['volume_ratio'][i]), '{:.2f}'),
+            str(report['trend'][i]) + (f" ({','.join(flags)})" if flags else ''),
+        ]))
+    return "\n".join(lines)
@@ -0,0 +1,137 @@
+"""
+Armazém local de artefatos: resultados estruturados das ferramentas referenciados por handle.
+
+As ferramentas de coleta gravam o resultado completo aqui e devolvem ao LLM apenas uma
+prévia curta e o handle (ex.: `art:moedas:3f2a9c01bd`). As ações de persistência e análise
+recebem o handle e leem os dados estruturados, sem o LLM copiar o payload de volta como texto.
+
+Os handles são endereçados por conteúdo (o mesmo payload gera o mesmo handle) e ficam em
+memória (LRU) e na tabela `artifacts`, para valer entre threads e agentes de um mesmo run.
+"""
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+from project.src.project.schema import ensure_schema
+from project.src.project.telemetry import tracer
+
+# Artefatos mais antigos que isso são removidos do banco (uma vez por processo)
+ARTIFACT_TTL = float(os.getenv('ARTIFACT_TTL', 7 * 24 * 3600))
+
+# Handle em qualquer posição do texto: o LLM costuma citá-lo entre aspas, em JSON ou numa frase
+HANDLE_PATTERN = re.compile(r'art:[a-z_]+:[0-9a-f]{10}')
+
+
+def make_handle(kind: str, blob: str) -> str:
+    return f"art:{kind}:{hashlib.sha1(blob.encode('utf-8')).hexdigest()[:10]}"
+
+
+def find_handle(text) -> Optional[str]:
+    """Primeiro handle citado em `text`, ou None."""
+    if not isinstance(text, str):
+        return None
+    match = HANDLE_PATTERN.search(text)
+    return match.group(0) if match else None
+
+
+def artifact_symbols(payload) -> list:
+    """Símbolos de um artefato de moedas (lista de moedas) ou de notícias (resultados por símbolo)."""
+    if isinstance(payload, dict):
+        return [str(symbol).upper() for symbol in payload]
+    if isinstance(payload, list):
+        return [str(row['symbol']).upper() for row in payload if isinstance(row, dict) and row.get('symbol')]
+    return []
+
+
+class ArtifactStore:
+    """Artefatos em memória (LRU) e, com `db`, na tabela `artifacts`."""
+
+    def __init__(self, db=None, memory_entries: int = 256):
+        self._db = db
+        self.memory_entries = memory_entries
+        self._memory: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self._purged = False
+
+    def put(self, kind: str, payload: Any, run_id: Optional[int] = None, task: Optional[str] = None) -> str:
+        """Grava `payload` (serializável em JSON) e retorna o handle. Sem `task`, usa a tarefa corrente da thread."""
+        task = task or tracer.context()[1]
+        blob = json.dumps(payload, ensure_ascii=False, sort_keys=True, default=str)
+        handle = make_handle(kind, blob)
+        self._remember(handle, payload)
+        if self._db is not None:
+            # Migração só no primeiro uso: ferramentas que nunca gravam artefatos não criam o banco
+            ensure_schema(self._db)
+            items = len(payload) if isinstance(payload, (list, dict)) else 1
+            with self._db.transaction() as conn:
+                conn.execute('''
+                    INSERT INTO artifacts (handle, kind, run_id, task, created_at, items, bytes, payload)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT (handle) DO UPDATE SET created_at = excluded.created_at,
+                        run_id = COALESCE(excluded.run_id, artifacts.run_id),
+                        task = COALESCE(excluded.task, artifacts.task)''',
+                             (handle, kind, run_id, task, int(time.time()), items, len(blob), blob))
+            self._purge()
+        return handle
+
+    def get(self, handle: str) -> Any:
+        """Payload do handle; LookupError se não existir (ou já tiver expirado)."""
+        with self._lock:
+            if handle in self._memory:
+                self._memory.move_to_end(handle)
+                return self._memory[handle]
+        row = None
+        if self._db is not None:
+            ensure_schema(self._db)
+            row = self._db.connection().execute('SELECT payload FROM artifacts WHERE handle = ?', (handle,)).fetchone()
+        if row is None:
+            raise LookupError(f"Artefato não encontrado: {handle}")
+        payload = json.loads(row[0])
+        self._remember(handle, payload)
+        return payload
+
+    def resolve(self, text) -> Optional[Any]:
+        """Payload do handle citado em `text`; None se não houver handle."""
+        handle = find_handle(text)
+        return self.get(handle) if handle else None
+
+    def resolve_symbols(self, value) -> Optional[list]:
+        """Lista de símbolos: a própria lista, os símbolos do artefato citado ou texto separado por vírgulas."""
+        if isinstance(value, list):
+            return value or None
+        if find_handle(value):
+            return artifact_symbols(self.resolve(value)) or None
+        if isinstance(value, str):
+            return [part.strip() for part in value.split(',') if part.strip()] or None
+        return None
+
+    def _remember(self, handle: str, payload: Any):
+        with self._lock:
+            self._memory[handle] = payload
+            self._memory.move_to_end(handle)
+            while len(self._memory) > self.memory_entries:
+                self._memory.popitem(last=False)
+
+    def _purge(self):
+        if self._purged:
+            return
+        self._purged = True
+        with self._db.transaction() as conn:
+            conn.execute('DELETE FROM artifacts WHERE created_at < ?', (int(time.time() - ARTIFACT_TTL),))
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def shared_store(db) -> ArtifactStore:
+    """Armazém do processo para o banco (o mesmo para todas as ferramentas)."""
+    with _stores_lock:
+        if db.db_path not in _stores:
+            _stores[db.db_path] = ArtifactStore(db)
+        return _stores[db.db_path]
@@ -0,0 +1,237 @@
+"""
+Backfill histórico de preço e volume a partir da CoinGecko (market_chart/range).
+
+Divide o período em blocos de até `CHUNK_DAYS` dias (faixa em que a API
+devolve pontos horários), baixa os blocos de todas as moedas em paralelo sob
+o rate limiter compartilhado da CoinGecko e grava cada bloco numa única
+transação, junto com o checkpoint em `backfill_chunks`. Uma execução
+interrompida retoma pulando os blocos já concluídos:
+
+    python3 -m project.src.project.backfill --days 180 --top 250
+    python3 -m project.src.project.backfill --status
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from project.src.project import rollups
+from project.src.project.db import get_manager
+from project.src.project.http_client import HttpClient
+from project.src.project.runs import finish_run, start_run
+from project.src.project.schema import ensure_schema
+from project.src.project.telemetry import tracer
+from project.src.project.tools.coingecko_tool import CoinGeckoTool
+
+# Até 90 dias por requisição a CoinGecko devolve pontos horários; acima disso, diários
+CHUNK_DAYS = 90
+DAY = 86400
+
+# Política de novas tentativas do cliente HTTP do backfill (mais paciente que a das ferramentas)
+MAX_RETRIES = int(os.getenv('BACKFILL_MAX_RETRIES', 3))
+RETRY_BASE_SECONDS = float(os.getenv('BACKFILL_RETRY_BASE_SECONDS', 15))
+
+# Tolerância para achar o preço de 24h antes (pontos horários não caem na hora exata)
+CHANGE_TOLERANCE = 2 * 3600
+
+
+def plan_chunks(days: float, now: int = None) -> List[Tuple[int, int]]:
+    """
+    Blocos (início, fim) cobrindo os últimos `days` dias.
+
+    Os limites internos seguem uma grade fixa de `CHUNK_DAYS` dias a partir do epoch,
+    então execuções em dias diferentes geram os mesmos blocos (e checkpoints); só o
+    primeiro e o último, recortados pelo período pedido, variam.
+    """
+    now = int(time.time()) if now is None else int(now)
+    end = now - now % 3600
+    start = end - int(days * DAY)
+    start -= start % DAY
+    size = CHUNK_DAYS * DAY
+    chunks, boundary = [], start - start % size
+    while boundary < end:
+        chunks.append((max(boundary, start), min(boundary + size, end)))
+        boundary += size
+    return chunks
+
+
+def chart_rows(chart: dict, symbol: str, name: str) -> List[tuple]:
+    """Converte a resposta do market_chart em tuplas (symbol, name, price, volume, change_24h, ts)."""
+    prices = np.array(chart.get('prices') or [], dtype=float).reshape(-1, 2)
+    prices = prices[~np.isnan(prices[:, 1])]
+    if not len(prices):
+        return []
+    volumes = {int(ms): volume for ms, volume in chart.get('total_volumes') or [] if volume is not None}
+    ts = (prices[:, 0] // 1000).astype(np.int64)
+    price = prices[:, 1]
+
+    # Variação 24h a partir da própria série: ponto mais recente até 24h antes de cada ponto
+    before = np.searchsorted(ts, ts - DAY, side='right') - 1
+    found = (before >= 0) & (ts - ts[np.maximum(before, 0)] <= DAY + CHANGE_TOLERANCE)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        change = np.where(found, (price / price[np.maximum(before, 0)] - 1.0) * 100.0, np.nan)
+
+    return [(symbol, name, float(p), volumes.get(int(ms)), None if np.isnan(c) else float(c), int(t))
+            for ms, p, c, t in zip(prices[:, 0], price, change, ts)]
+
+
+def _checkpoint(conn, coin: dict, chunk: Tuple[int, int], status: str, rows: int = 0, error: str = None):
+    conn.execute('''
+        INSERT INTO backfill_chunks (coin_id, range_start, range_end, symbol, status, rows, error, updated_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT (coin_id, range_start, range_end) DO UPDATE SET
+            status = excluded.status, rows = excluded.rows, error = excluded.error, updated_at = excluded.updated_at''',
+                 (coin['id'], chunk[0], chunk[1], coin['symbol'], status, rows, error, int(time.time())))
+
+
+def load_chunk(db, run_id: int, coin: dict, chunk: Tuple[int, int], rows: List[tuple]) -> int:
+    """
+    Grava um bloco em `moedas` e nos agregados numa transação, com o checkpoint.
+
+    Os pontos passam por uma tabela temporária; os que já existem para o símbolo
+    (blocos sobrepostos, coletas normais) são descartados antes de inserir.
+    """
+    db.connection().execute('''CREATE TEMP TABLE IF NOT EXISTS backfill_stage (
+        symbol TEXT, name TEXT, price REAL, volume REAL, change_24h REAL, ts INTEGER)''')
+    with db.transaction() as conn:
+        # Lock de escrita desde o início: uma transação que lê antes de escrever falha com
+        # "database is locked" (sem esperar) se outro escritor gravar no meio
+        conn.execute('BEGIN IMMEDIATE')
+        conn.execute('DELETE FROM backfill_stage')
+        conn.executemany('INSERT INTO backfill_stage VALUES (?, ?, ?, ?, ?, ?)', rows)
+        conn.execute('''DELETE FROM backfill_stage WHERE EXISTS (
+            SELECT 1 FROM moedas m WHERE m.symbol = backfill_stage.symbol AND m.ts = backfill_stage.ts)''')
+        inserted = conn.execute('''
+            INSERT INTO moedas (symbol, name, price, volume, change_24h, ts, date, run_id)
+            SELECT symbol, name, price, volume, change_24h, ts, datetime(ts, 'unixepoch', 'localtime'), ?
+            FROM backfill_stage ORDER BY ts''', (run_id,)).rowcount
+        rollups.rollup_moedas_table(conn, 'backfill_stage')
+        _checkpoint(conn, coin, chunk, 'done', inserted)
+    return inserted
+
+
+def _select_coins(tool: CoinGeckoTool, top_n: int, symbols: Optional[List[str]]) -> List[dict]:
+    markets = tool.fetch_markets(max(top_n, 250) if symbols else top_n)
+    wanted = {s.upper() for s in symbols} if symbols else None
+    coins, seen = [], set()
+    for coin in markets:
+        symbol = coin['symbol'].upper()
+        # Moedas diferentes com o mesmo ticker: fica a de maior volume (as linhas são por símbolo)
+        if symbol in seen or (wanted and symbol not in wanted):
+            continue
+        seen.add(symbol)
+        coins.append({'id': coin['id'], 'symbol': symbol, 'name': coin['name']})
+    return coins
+
+
+def run_backfill(days: float = 90, top_n: int = 100, symbols: Optional[List[str]] = None, db_path: str = None,
+                 max_workers: int = None, tool: CoinGeckoTool = None, now: int = None) -> dict:
+    """Baixa e grava o histórico das moedas, pulando os blocos já concluídos em execuções anteriores."""
+    started = time.perf_counter()
+    db = get_manager(db_path)
+    ensure_schema(db)
+    tracer.bind(db.db_path)
+    tool = tool or CoinGeckoTool(client=HttpClient(max_retries=MAX_RETRIES, backoff_base=RETRY_BASE_SECONDS,
+                                                   backoff_max=RETRY_BASE_SECONDS * 2 ** MAX_RETRIES,
+                                                   pool_maxsize=max_workers),
+                                 db_path=db.db_path)
+    coins = _select_coins(tool, top_n, symbols)
+    chunks = plan_chunks(days, now)
+    done = set(db.connection().execute(
+        "SELECT coin_id, range_start, range_end FROM backfill_chunks WHERE status = 'done'").fetchall())
+    todo = [(coin, chunk) for coin in coins for chunk in chunks if (coin['id'],) + chunk not in done]
+
+    summary = {'moedas': len(coins), 'blocos': len(coins) * len(chunks), 'pulados': len(coins) * len(chunks) - len(todo),
+               'concluidos': 0, 'erros': 0, 'linhas': 0}
+    if not todo:
+        summary['duracao_s'] = round(time.perf_counter() - started, 3)
+        return summary
+
+    run_id = start_run(db, 'backfill')
+    tracer.run_id = run_id
+    workers = max_workers or int(os.getenv('COINGECKO_MAX_WORKERS', 5))
+    executor = ThreadPoolExecutor(max_workers=workers)
+    try:
+        futures = {executor.submit(tool.fetch_market_chart_range, coin['id'], *chunk): (coin, chunk) for coin, chunk in todo}
+        # Downloads em paralelo; gravação só nesta thread (um único escritor no SQLite)
+        for future in as_completed(futures):
+            coin, chunk = futures[future]
+            try:
+                summary['linhas'] += load_chunk(db, run_id, coin, chunk,
+                                                chart_rows(future.result(), coin['symbol'], coin['name']))
+                summary['concluidos'] += 1
+            except Exception as e:
+                summary['erros'] += 1
+                with db.transaction() as conn:
+                    _checkpoint(conn, coin, chunk, 'error', error=str(e)[:500])
+            processed = summary['concluidos'] + summary['erros']
+            if processed % 25 == 0 or processed == len(todo):
+                print(f"Backfill: {processed}/{len(todo)} blocos, {summary['linhas']} linhas", file=sys.stderr)
+    except BaseException:
+        executor.shutdown(wait=False, cancel_futures=True)
+        finish_run(db, run_id, 'error')
+        tracer.flush(db.db_path)
+        raise
+    executor.shutdown()
+    finish_run(db, run_id, 'ok' if not summary['erros'] else 'error')
+    tracer.flush(db.db_path)
+    summary['run_id'] = run_id
+    summary['duracao_s'] = round(time.perf_counter() - started, 3)
+    return summary
+
+
+def backfill_status(db) -> str:
+    """Resumo dos checkpoints: blocos por status, linhas gravadas e últimos erros."""
+    conn = db.connection()
+    counts = conn.execute('''SELECT status, COUNT(*), COUNT(DISTINCT coin_id), SUM(rows), MIN(range_start), MAX(range_end)
+                             FROM backfill_chunks GROUP BY status ORDER BY status''').fetchall()
+    if not counts:
+        return "Nenhum backfill registrado."
+    lines = ["status|blocos|moedas|linhas|de|até"]
+    lines += [f"{status}|{chunks}|{coins}|{rows}|{time.strftime('%Y-%m-%d', time.gmtime(start))}|"
+              f"{time.strftime('%Y-%m-%d', time.gmtime(end))}" for status, chunks, coins, rows, start, end in counts]
+    errors = conn.execute('''SELECT symbol, range_start, error FROM backfill_chunks WHERE status = 'error'
+                             ORDER BY updated_at DESC LIMIT 5''').fetchall()
+    if errors:
+        lines += ["", "Últimos erros:"]
+        lines += [f"{symbol} {time.strftime('%Y-%m-%d', time.gmtime(start))}: {error}" for symbol, start, error in errors]
+    return "\n".join(lines)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Backfill histórico de preço e volume da CoinGecko (retomável).")
+    parser.add_argument('--days', type=float, default=float(os.getenv('BACKFILL_DAYS', 90)),
+                        help="Dias de histórico (padrão: 90).")
+    parser.add_argument('--top', type=int, default=int(os.getenv('BACKFILL_TOP_N', 100)),
+                        help="Quantidade de moedas do topo por volume (padrão: 100).")
+    parser.add_argument('--symbols', default=None, help="Restringir a símbolos, separados por vírgula (ex.: BTC,ETH).")
+    parser.add_argument('--workers', type=int, default=None, help="Downloads em paralelo (padrão: COINGECKO_MAX_WORKERS).")
+    parser.add_argument('--status', action='store_true', help="Mostrar o progresso registrado e sair.")
+    parser.add_argument('--db', default=None, help="Caminho do banco SQLite.")
+    args = parser.parse_args(argv)
+
+    if args.status:
+        db = get_manager(args.db)
+        ensure_schema(db)
+        print(backfill_status(db))
+        return 0
+    symbols = [s.strip() for s in args.symbols.split(',') if s.strip()] if args.symbols else None
+    try:
+        summary = run_backfill(args.days, args.top, symbols, args.db, args.workers)
+    except KeyboardInterrupt:
+        print("Backfill interrompido; execute de novo para retomar.", file=sys.stderr)
+        return 130
+    except Exception as e:
+        print(f"Erro no backfill: {e}", file=sys.stderr)
+        return 1
+    print(json.dumps(summary, ensure_ascii=False))
+    return 0 if not summary['erros'] else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,165 @@
+"""
+Execução em lote: a mesma análise do crew para várias carteiras/listas de observação.
+
+Cada conjunto de inputs vira um crew com ferramentas próprias (run, conexões e estado
+separados), e até `--parallel` crews rodam ao mesmo tempo, gravando cada um no seu run.
+As coletas são compartilhadas por um único FetchMemo: antes dos crews o lote busca de
+uma vez o mercado e as notícias da união das listas, e qualquer busca repetida pelos
+crews (simultânea ou não) reaproveita o resultado em vez de ir de novo à rede.
+
+Arquivo de entrada (JSON): lista de listas de símbolos ou de objetos com `watchlist`
+(lista ou texto separado por vírgulas), `name` opcional e demais inputs das tarefas:
+
+    [{"name": "blue-chips", "watchlist": ["BTC", "ETH"]}, ["SOL", "AVAX", "DOT"]]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+
+from project.src.project import crew as crew_module
+from project.src.project.cache import FetchMemo
+from project.src.project.telemetry import tracer
+
+BATCH_MAX_PARALLEL = int(os.getenv('BATCH_MAX_PARALLEL', 3))
+
+
+def normalize_inputs(input_sets: list) -> List[dict]:
+    """Inputs de cada crew, com `name` único e `watchlist` em texto (símbolos em maiúsculas, sem repetição)."""
+    normalized, names = [], set()
+    for index, item in enumerate(input_sets, 1):
+        item = dict(item) if isinstance(item, dict) else {'watchlist': item}
+        watchlist = item.pop('watchlist', None) or []
+        if isinstance(watchlist, str):
+            watchlist = watchlist.split(',')
+        symbols = list(dict.fromkeys(str(s).strip().upper() for s in watchlist if str(s).strip()))
+        name = str(item.get('name') or f"lista-{index}")
+        if name in names:
+            name = f"{name}-{index}"
+        names.add(name)
+        # Sem lista, a tarefa recebe o texto padrão de {watchlist}
+        inputs = {**crew_module.DEFAULT_INPUTS, **item, 'name': name, 'symbols': symbols}
+        if symbols:
+            inputs['watchlist'] = ', '.join(symbols)
+        normalized.append(inputs)
+    return normalized
+
+
+def prefetch(tools: dict, symbols: List[str], top_n: int = 50) -> dict:
+    """Coleta única do lote (mercado e notícias da união das listas), que fica no FetchMemo das ferramentas."""
+    summary = {'moedas': 0, 'noticias_novas': 0}
+    with tracer.span('stage', 'fetch_markets') as span:
+        try:
+            markets = tools['coingecko'].fetch_markets(top_n)
+            summary['moedas'] = span['items'] = len(markets)
+        except Exception as e:
+            # Sem o mercado pré-carregado cada crew tenta buscá-lo (ainda assim uma única vez, pelo memo).
+            # O erro vai para o resumo: `moedas: 0` sozinho não distingue falha de mercado vazio.
+            summary['erro'] = f"Erro ao pré-carregar o mercado: {e}"
+            print(summary['erro'])
+    if symbols:
+        with tracer.span('stage', 'collect_news') as span:
+            news = tools['news'].collect_batch(symbols)
+            span['items'] = len(news)
+        summary['noticias_novas'] = sum(len(result['items']) for result in news.values())
+    return summary
+
+
+def _run_crew(inputs: dict, memo: FetchMemo, db_path: str = None, verbose: bool = False) -> dict:
+    crew_instance = crew_module.CryptoTrendCrew(tools=crew_module.build_tools(db_path, memo))
+    crew = crew_instance.crew()
+    if not verbose:
+        # Com vários crews em paralelo a saída detalhada de cada um se mistura
+        crew.verbose = False
+        for agent in crew.agents:
+            agent.verbose = False
+    started = time.perf_counter()
+    task_inputs = {key: value for key, value in inputs.items() if key not in ('name', 'symbols')}
+    summary = {'name': inputs['name'], 'watchlist': inputs['symbols']}
+    try:
+        result = crew.kickoff(inputs=task_inputs)
+        summary.update(status='ok', report=result.raw)
+    except Exception as e:
+        # O run fica em aberto: `make resume RUN=<run_id>` retoma só as tarefas pendentes
+        summary.update(status='error', error=str(e))
+    summary['run_id'] = crew_instance.run_id
+    summary['duracao_s'] = round(time.perf_counter() - started, 3)
+    return summary
+
+
+def run_batch(input_sets: list, max_parallel: int = None, db_path: str = None, top_n: int = 50,
+              verbose: bool = False) -> dict:
+    """
+    Executa o crew para cada conjunto de inputs, com até `max_parallel` crews simultâneos e
+    coletas compartilhadas. Retorna o resumo do lote e de cada crew (status, run, relatório).
+    """
+    started = time.perf_counter()
+    inputs = normalize_inputs(input_sets)
+    memo = FetchMemo()
+    tools = crew_module.build_tools(db_path, memo)
+    run_id = tools['sqlite'].start_run('batch')
+    try:
+        union = list(dict.fromkeys(symbol for item in inputs for symbol in item['symbols']))
+        fetched = prefetch(tools, union, top_n)
+        max_parallel = max(1, min(max_parallel or BATCH_MAX_PARALLEL, len(inputs) or 1))
+        with ThreadPoolExecutor(max_workers=max_parallel, thread_name_prefix='crew') as executor:
+            crews = list(executor.map(lambda item: _run_crew(item, memo, db_path, verbose), inputs))
+        tools['sqlite'].finish_run('ok' if all(c['status'] == 'ok' for c in crews) else 'error')
+    except Exception:
+        tools['sqlite'].finish_run('error')
+        raise
+    return {
+        'run_id': run_id,
+        'crews': crews,
+        'pre_carga': fetched,
+        'coletas': memo.stats(),
+        'paralelismo': max_parallel,
+        'duracao_s': round(time.perf_counter() - started, 3),
+    }
+
+
+def write_reports(summary: dict, out_dir: str):
+    """Grava o relatório de cada crew concluído em `<out_dir>/<name>.md`."""
+    os.makedirs(out_dir, exist_ok=True)
+    for result in summary['crews']:
+        if result.get('report'):
+            with open(os.path.join(out_dir, f"{result['name']}.md"), 'w', encoding='utf-8') as handle:
+                handle.write(result['report'])
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Executa o crew para várias listas de observação com coletas compartilhadas.")
+    parser.add_argument('inputs', help="Arquivo JSON com a lista de conjuntos de inputs (ou '-' para ler da entrada padrão).")
+    parser.add_argument('--parallel', type=int, default=BATCH_MAX_PARALLEL,
+                        help=f"Crews simultâneos (padrão: {BATCH_MAX_PARALLEL}).")
+    parser.add_argument('--top', type=int, default=50, help="Moedas do mercado pré-carregadas (padrão: 50).")
+    parser.add_argument('--db', default=None, help="Caminho do banco SQLite.")
+    parser.add_argument('--out', default=None, help="Diretório onde gravar o relatório de cada lista (<name>.md).")
+    parser.add_argument('--verbose', action='store_true', help="Saída detalhada dos agentes (misturada entre crews).")
+    args = parser.parse_args(argv)
+
+    try:
+        if args.inputs == '-':
+            input_sets = json.load(sys.stdin)
+        else:
+            with open(args.inputs, encoding='utf-8') as handle:
+                input_sets = json.load(handle)
+        if not isinstance(input_sets, list) or not input_sets:
+            raise ValueError("o arquivo deve conter uma lista não vazia de conjuntos de inputs")
+        summary = run_batch(input_sets, args.parallel, args.db, args.top, args.verbose)
+    except Exception as e:
+        print(f"Erro na execução em lote: {e}", file=sys.stderr)
+        return 1
+    if args.out:
+        write_reports(summary, args.out)
+    for result in summary['crews']:
+        result.pop('report', None)
+    print(json.dumps(summary, ensure_ascii=False))
+    return 0 if all(result['status'] == 'ok' for result in summary['crews']) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,233 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Optional
+from project.src.project.db import DATA_DIR
+
+DEFAULT_CACHE_PATH = os.path.join(DATA_DIR, 'cache.db')
+
+
+def make_key(endpoint: str, params: Optional[Dict[str, Any]] = None) -> str:
+    """Gera a chave do cache a partir do endpoint e dos parâmetros (ordem irrelevante)."""
+    payload = json.dumps({'endpoint': endpoint, 'params': params or {}}, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class ResponseCache:
+    """
+    Cache persistente de respostas com TTL, despejo por tamanho e stale-while-revalidate.
+
+    As entradas ficam em um arquivo SQLite (compartilhado entre execuções) e em uma
+    camada em memória (compartilhada entre agentes do mesmo processo).
+    """
+
+    def __init__(self, namespace: str, path: str = None, ttl: float = 300, stale_ttl: float = 1800,
+                 max_entries: int = 512, max_bytes: int = 50 * 1024 * 1024, memory_entries: int = 128):
+        self.namespace = namespace
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.memory_entries = memory_entries
+        self._path = path or DEFAULT_CACHE_PATH
+        os.makedirs(os.path.dirname(self._path), exist_ok=True)
+        self._lock = threading.RLock()
+        self._memory = OrderedDict()
+        self._refreshing = set()
+        self._stats = {'hits': 0, 'stale_hits': 0, 'misses': 0, 'evictions': 0, 'refresh_errors': 0}
+        self._conn = sqlite3.connect(self._path, timeout=30, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('''CREATE TABLE IF NOT EXISTS cache (
+            namespace TEXT,
+            key TEXT,
+            value TEXT,
+            size INTEGER,
+            created_at REAL,
+            accessed_at REAL,
+            PRIMARY KEY (namespace, key)
+        )''')
+        self._conn.execute('CREATE INDEX IF NOT EXISTS idx_cache_accessed ON cache (namespace, accessed_at)')
+        self._conn.commit()
+
+    def get_or_fetch(self, endpoint: str, params: Optional[Dict[str, Any]], fetch: Callable[[], Any]) -> Any:
+        """
+        Retorna a resposta em cache para (endpoint, params) ou executa `fetch`.
+
+        Entradas vencidas há menos de `stale_ttl` segundos são devolvidas imediatamente
+        e revalidadas em segundo plano.
+        """
+        key = make_key(endpoint, params)
+        entry = self._lookup(key)
+        if entry is not None:
+            created_at, value = entry
+            age = time.time() - created_at
+            if age <= self.ttl:
+                self._count('hits')
+                return value
+            if age <= self.ttl + self.stale_ttl:
+                self._count('stale_hits')
+                self._revalidate(key, fetch)
+                return value
+
+        self._count('misses')
+        value = fetch()
+        self._store(key, value)
+        return value
+
+    def get(self, endpoint: str, params: Optional[Dict[str, Any]] = None) -> Any:
+        """Retorna o valor em cache dentro do TTL, ou None (contabilizando hit/miss)."""
+        entry = self._lookup(make_key(endpoint, params))
+        if entry is not None and time.time() - entry[0] <= self.ttl:
+            self._count('hits')
+            return entry[1]
+        self._count('misses')
+        return None
+
+    def put(self, endpoint: str, params: Optional[Dict[str, Any]], value: Any):
+        self._store(make_key(endpoint, params), value)
+
+    def invalidate(self, endpoint: str, params: Optional[Dict[str, Any]] = None):
+        key = make_key(endpoint, params)
+        with self._lock:
+            self._memory.pop(key, None)
+            self._conn.execute('DELETE FROM cache WHERE namespace = ? AND key = ?', (self.namespace, key))
+            self._conn.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+            entries, size = self._conn.execute(
+                'SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache WHERE namespace = ?',
+                (self.namespace,)).fetchone()
+        lookups = stats['hits'] + stats['stale_hits'] + stats['misses']
+        stats['hit_rate'] = (stats['hits'] + stats['stale_hits']) / lookups if lookups else 0.0
+        stats['entries'] = entries
+        stats['bytes'] = size
+        return stats
+
+    def _count(self, name: str):
+        with self._lock:
+            self._stats[name] += 1
+
+    def _lookup(self, key: str):
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+                return entry
+            row = self._conn.execute('SELECT created_at, value FROM cache WHERE namespace = ? AND key = ?',
+                                     (self.namespace, key)).fetchone()
+            if row is None:
+                return None
+            self._conn.execute('UPDATE cache SET accessed_at = ? WHERE namespace = ? AND key = ?',
+                               (time.time(), self.namespace, key))
+            self._conn.commit()
+            entry = (row[0], json.loads(row[1]))
+            self._remember(key, entry)
+            return entry
+
+    def _remember(self, key: str, entry):
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def _store(self, key: str, value: Any):
+        payload = json.dumps(value)
+        now = time.time()
+        with self._lock:
+            self._remember(key, (now, value))
+            self._conn.execute('INSERT OR REPLACE INTO cache (namespace, key, value, size, created_at, accessed_at) '
+                               'VALUES (?, ?, ?, ?, ?, ?)',
+                               (self.namespace, key, payload, len(payload), now, now))
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        count, total = self._conn.execute('SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache WHERE namespace = ?',
+                                          (self.namespace,)).fetchone()
+        if count <= self.max_entries and total <= self.max_bytes:
+            return
+        dropped = []
+        for key, size in self._conn.execute('SELECT key, size FROM cache WHERE namespace = ? ORDER BY accessed_at',
+                                            (self.namespace,)).fetchall():
+            if count <= self.max_entries and total <= self.max_bytes:
+                break
+            dropped.append((self.namespace, key))
+            self._memory.pop(key, None)
+            count -= 1
+            total -= size
+        self._conn.executemany('DELETE FROM cache WHERE namespace = ? AND key = ?', dropped)
+        self._stats['evictions'] += len(dropped)
+
+    def _revalidate(self, key: str, fetch: Callable[[], Any]):
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def refresh():
+            try:
+                self._store(key, fetch())
+            except Exception:
+                self._count('refresh_errors')
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        threading.Thread(target=refresh, daemon=True).start()
+
+
+class FetchMemo:
+    """
+    Resultados de coletas compartilhados por um grupo de crews (ex.: uma execução em lote).
+
+    Cada chave é buscada uma única vez: chamadas simultâneas com a mesma chave esperam a
+    primeira e recebem o mesmo resultado. Erros não ficam memorizados; a próxima chamada
+    tenta de novo.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._futures: Dict[str, Future] = {}
+        self._stats = {'fetches': 0, 'shared': 0}
+
+    def get_or_fetch(self, endpoint: str, params: Optional[Dict[str, Any]], fetch: Callable[[], Any]) -> Any:
+        key = make_key(endpoint, params)
+        with self._lock:
+            future = self._futures.get(key)
+            owner = future is None
+            if owner:
+                future = self._futures[key] = Future()
+                self._stats['fetches'] += 1
+            else:
+                self._stats['shared'] += 1
+        if owner:
+            try:
+                future.set_result(fetch())
+            except Exception as e:
+                with self._lock:
+                    self._futures.pop(key, None)
+                future.set_exception(e)
+        return future.result()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._stats)
+
+
+_shared_caches = {}
+_shared_lock = threading.Lock()
+
+
+def shared_cache(namespace: str, **kwargs) -> ResponseCache:
+    """Retorna a instância de cache do processo para o namespace, criando-a na primeira chamada."""
+    with _shared_lock:
+        if namespace not in _shared_caches:
+            _shared_caches[namespace] = ResponseCache(namespace, **kwargs)
+        return _shared_caches[namespace]
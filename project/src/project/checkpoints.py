@@ -0,0 +1,62 @@
+"""
+Checkpoints por tarefa do crew, para retomar um run que falhou sem refazer as coletas.
+
+Ao concluir, cada tarefa grava em `task_checkpoints` (chave run + tarefa) o seu
+TaskOutput e os handles dos artefatos que as ferramentas gravaram durante ela.
+`resume` reabre o run, restaura as saídas das tarefas concluídas (que seguem
+servindo de contexto às seguintes) e executa só as pendentes. Uma tarefa cujo
+artefato já expirou é refeita. A tarefa de cada artefato vem do contexto da
+telemetria; com TELEMETRY=0 só a saída da tarefa é guardada.
+"""
+import json
+import time
+from typing import Dict, List, Optional
+
+from project.src.project.artifacts import shared_store
+
+
+def save_task(db, run_id: int, output) -> List[str]:
+    """Grava o checkpoint da tarefa concluída (TaskOutput) e retorna os handles de artefatos associados."""
+    conn = db.connection()
+    handles = [row[0] for row in conn.execute(
+        'SELECT handle FROM artifacts WHERE run_id = ? AND task = ? ORDER BY created_at', (run_id, output.name))]
+    with db.transaction() as conn:
+        conn.execute('''
+            INSERT INTO task_checkpoints (run_id, task, agent, status, output, artifacts, finished_at)
+            VALUES (?, ?, ?, 'done', ?, ?, ?)
+            ON CONFLICT (run_id, task) DO UPDATE SET
+                agent = excluded.agent, status = excluded.status, output = excluded.output,
+                artifacts = excluded.artifacts, finished_at = excluded.finished_at''',
+                     (run_id, output.name, (output.agent or '').strip(), output.model_dump_json(exclude={'pydantic'}),
+                      json.dumps(handles), int(time.time())))
+    return handles
+
+
+def load_tasks(db, run_id: int) -> Dict[str, dict]:
+    """
+    Saídas (dicionários do TaskOutput) das tarefas concluídas do run, por nome da tarefa.
+
+    Os artefatos de cada uma voltam ao cache em memória; se algum não existe mais, a
+    tarefa fica de fora e será executada de novo.
+    """
+    store = shared_store(db)
+    done = {}
+    for task, output, artifacts in db.connection().execute(
+            "SELECT task, output, artifacts FROM task_checkpoints WHERE run_id = ? AND status = 'done'", (run_id,)):
+        try:
+            for handle in json.loads(artifacts or '[]'):
+                store.get(handle)
+        except LookupError:
+            continue
+        done[task] = json.loads(output)
+    return done
+
+
+def resumable_run(db, run_id: int = None) -> Optional[int]:
+    """Run do crew a retomar: o informado, ou o mais recente que não terminou com sucesso."""
+    if run_id is not None:
+        row = db.connection().execute("SELECT id FROM runs WHERE id = ? AND kind = 'crew'", (run_id,)).fetchone()
+    else:
+        row = db.connection().execute(
+            "SELECT id FROM runs WHERE kind = 'crew' AND status != 'ok' ORDER BY id DESC LIMIT 1").fetchone()
+    return row[0] if row else None
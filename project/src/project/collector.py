@@ -0,0 +1,418 @@
+"""
+Coletor contínuo de preços da CoinGecko.
+
+Faz polling do endpoint de mercados em intervalo fixo e mantém, em memória,
+os últimos pontos de cada símbolo num buffer circular apoiado em arrays
+numpy (`PriceWindow`). Os snapshots são gravados no SQLite em lotes, numa
+única transação por flush, e a janela em memória fica disponível em
+localhost para o dashboard e para a Trend Tool:
+
+    python3 -m project.src.project.collector --interval 60 --top 250
+    curl 'http://127.0.0.1:8765/window?symbols=BTC,ETH&points=48'
+"""
+import argparse
+import io
+import json
+import os
+import sys
+import threading
+import time
+import urllib.parse
+import urllib.request
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from project.src.project.cache import shared_cache
+from project.src.project.db import get_manager
+from project.src.project.ingest import bulk_insert_snapshots, normalize_moedas, snapshot_time
+from project.src.project.schema import ensure_schema
+from project.src.project.telemetry import tracer
+from project.src.project.tools.coingecko_tool import CoinGeckoTool
+
+DEFAULT_PORT = int(os.getenv('COLLECTOR_PORT', 8765))
+COLLECTOR_URL = os.getenv('COLLECTOR_URL', f"http://127.0.0.1:{DEFAULT_PORT}")
+
+FIELDS = ('price', 'volume', 'change_24h')
+
+
+class PriceWindow:
+    """
+    Últimos `capacity` pontos por símbolo em arrays pré-alocados (símbolo x posição).
+
+    Cada símbolo ocupa uma linha; `_written[linha]` conta os pontos já gravados e a
+    posição do próximo é `_written % capacity`. Escritas e leituras são vetorizadas
+    e protegidas por um lock; leituras devolvem cópias.
+    """
+
+    def __init__(self, capacity: int = 720, initial_symbols: int = 256):
+        if capacity < 2:
+            raise ValueError("capacity deve ser >= 2")
+        self.capacity = capacity
+        self.updated_at: Optional[int] = None
+        self._lock = threading.Lock()
+        self._index: Dict[str, int] = {}
+        self._symbols: List[str] = []
+        self._ts = np.zeros((initial_symbols, capacity), dtype=np.int64)
+        self._values = np.full((len(FIELDS), initial_symbols, capacity), np.nan)
+        self._written = np.zeros(initial_symbols, dtype=np.int64)
+
+    def _rows(self, symbols: Iterable[str]) -> np.ndarray:
+        """Linhas dos símbolos, criando as que faltam (dobra os arrays quando lotados)."""
+        rows = []
+        for symbol in symbols:
+            row = self._index.get(symbol)
+            if row is None:
+                row = len(self._symbols)
+                if row == len(self._written):
+                    grow = len(self._written)
+                    self._ts = np.concatenate([self._ts, np.zeros((grow, self.capacity), dtype=np.int64)])
+                    self._values = np.concatenate(
+                        [self._values, np.full((len(FIELDS), grow, self.capacity), np.nan)], axis=1)
+                    self._written = np.concatenate([self._written, np.zeros(grow, dtype=np.int64)])
+                self._index[symbol] = row
+                self._symbols.append(symbol)
+            rows.append(row)
+        return np.array(rows, dtype=np.int64)
+
+    def append(self, ts: int, rows: List[tuple]) -> int:
+        """
+        Acrescenta um snapshot de tuplas normalizadas (symbol, name, price, volume, change_24h).
+
+        Símbolos repetidos no snapshot (moedas diferentes com o mesmo ticker) mantêm
+        só a primeira ocorrência, a de maior volume na ordem da CoinGecko.
+        """
+        seen, unique = set(), []
+        for row in rows:
+            if row[0] not in seen:
+                seen.add(row[0])
+                unique.append(row)
+        if not unique:
+            return 0
+        values = np.array([row[2:5] for row in unique], dtype=float).T  # None vira NaN
+        with self._lock:
+            idx = self._rows(row[0] for row in unique)
+            pos = self._written[idx] % self.capacity
+            self._ts[idx, pos] = ts
+            self._values[:, idx, pos] = values
+            self._written[idx] += 1
+            self.updated_at = max(self.updated_at or 0, int(ts))
+        return len(unique)
+
+    def history(self, symbols: Optional[List[str]] = None, points: Optional[int] = 48,
+                since: Optional[int] = None) -> Dict[str, np.ndarray]:
+        """
+        Matrizes (símbolo x `points`, ou a janela inteira com `points=None`) alinhadas
+        à direita, NaN onde não há ponto, símbolos em ordem alfabética, mais a matriz `ts`.
+        """
+        points = self.capacity if points is None else max(1, min(int(points), self.capacity))
+        with self._lock:
+            if symbols:
+                names = sorted({s.upper() for s in symbols} & self._index.keys())
+            else:
+                names = sorted(self._symbols)
+            rows = np.array([self._index[name] for name in names], dtype=np.int64)
+            written = self._written[rows]
+            offsets = np.arange(points, 0, -1)  # points..1; 1 = ponto mais recente
+            pos = (written[:, None] - offsets[None, :]) % self.capacity
+            ts = self._ts[rows[:, None], pos]
+            values = self._values[:, rows[:, None], pos]
+
+        valid = offsets[None, :] <= np.minimum(written, self.capacity)[:, None]
+        if since is not None:
+            valid &= ts >= since
+        values[:, ~valid] = np.nan
+        ts = np.where(valid, ts, 0)
+        counts = valid.sum(axis=1)
+        keep = counts > 0
+        history = {name: values[i][keep] for i, name in enumerate(FIELDS)}
+        history['ts'] = ts[keep]
+        history['symbols'] = np.array(names, dtype=str)[keep]
+        history['points'] = counts[keep]
+        return history
+
+    def latest(self, symbols: Optional[List[str]] = None) -> List[dict]:
+        """Último ponto de cada símbolo."""
+        history = self.history(symbols, points=1)
+        return [{'symbol': str(symbol), 'ts': int(history['ts'][i, -1]),
+                 **{name: _json_number(history[name][i, -1]) for name in FIELDS}}
+                for i, symbol in enumerate(history['symbols'])]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {'symbols': len(self._symbols), 'capacity': self.capacity,
+                    'points': int(np.minimum(self._written, self.capacity).sum()),
+                    'updated_at': self.updated_at,
+                    'bytes': int(self._ts.nbytes + self._values.nbytes + self._written.nbytes)}
+
+
+def _json_number(value):
+    return None if value is None or np.isnan(value) else float(value)
+
+
+class PriceCollector:
+    """
+    Polling da CoinGecko em intervalo fixo, com janela em memória e gravação em lote.
+
+    Cada poll vira um snapshot com timestamp próprio; a cada `flush_snapshots`
+    snapshots (ou `flush_seconds` segundos) os pendentes são gravados numa única
+    transação, como um run do tipo 'stream'.
+    """
+
+    def __init__(self, db_path: str = None, top_n: int = 250, interval: float = 60.0, capacity: int = 720,
+                 flush_snapshots: int = 10, flush_seconds: float = 300.0, tool: CoinGeckoTool = None,
+                 window: PriceWindow = None):
+        self.top_n = top_n
+        self.interval = interval
+        self.flush_snapshots = max(1, flush_snapshots)
+        self.flush_seconds = flush_seconds
+        self.window = window or PriceWindow(capacity)
+        self._db = get_manager(db_path)
+        self.db_path = self._db.db_path
+        ensure_schema(self._db)
+        tracer.bind(self._db.db_path)
+        # Cache próprio com validade menor que o intervalo: o da CoinGecko Tool (5 min) repetiria o mesmo snapshot
+        self._tool = tool or CoinGeckoTool(cache=shared_cache(
+            'coingecko_stream', ttl=max(1.0, interval / 2), stale_ttl=0, max_entries=16), db_path=self.db_path)
+        self._pending: List[Tuple[int, List[tuple]]] = []
+        self._pending_lock = threading.Lock()
+        self._last_flush = time.monotonic()
+        self._stop = threading.Event()
+        self._stats = {'polls': 0, 'errors': 0, 'rejected': 0, 'flushes': 0, 'flushed_rows': 0, 'last_error': None}
+
+    def prime(self, hours: float = 72) -> int:
+        """Preenche a janela com o histórico recente do SQLite (leituras úteis desde o primeiro instante)."""
+        since = int(time.time() - hours * 3600)
+        cursor = self._db.connection().execute(
+            'SELECT ts, symbol, name, price, volume, change_24h FROM moedas '
+            'WHERE ts >= ? AND price IS NOT NULL ORDER BY ts, id', (since,))
+        loaded, snapshot, current = 0, [], None
+        for ts, *row in cursor:
+            if ts != current and snapshot:
+                loaded += self.window.append(current, snapshot)
+                snapshot = []
+            current = ts
+            snapshot.append(tuple(row))
+        if snapshot:
+            loaded += self.window.append(current, snapshot)
+        return loaded
+
+    def poll_once(self) -> int:
+        """Busca um snapshot, atualiza a janela e o enfileira para gravação."""
+        markets = self._tool.fetch_markets(self.top_n)
+        valid, errors = normalize_moedas(markets)
+        ts, _ = snapshot_time()
+        self.window.append(ts, valid)
+        with self._pending_lock:
+            self._pending.append((ts, valid))
+        self._stats['polls'] += 1
+        self._stats['rejected'] += len(errors)
+        return len(valid)
+
+    def flush(self) -> int:
+        """Grava os snapshots pendentes numa única transação."""
+        with self._pending_lock:
+            pending, self._pending = self._pending, []
+        self._last_flush = time.monotonic()
+        if not pending:
+            return 0
+        try:
+            with tracer.span('stage', 'stream_flush') as span:
+                saved = bulk_insert_snapshots(self._db, pending, kind='stream')
+                span['items'] = saved
+        except Exception:
+            # Devolve o lote à fila para a próxima tentativa
+            with self._pending_lock:
+                self._pending = pending + self._pending
+            raise
+        self._stats['flushes'] += 1
+        self._stats['flushed_rows'] += saved
+        tracer.flush(self._db.db_path)
+        return saved
+
+    def _flush_due(self) -> bool:
+        with self._pending_lock:
+            pending = len(self._pending)
+        return pending >= self.flush_snapshots or (
+            pending > 0 and time.monotonic() - self._last_flush >= self.flush_seconds)
+
+    def run(self, iterations: int = None):
+        """Loop de coleta até `stop()` (ou `iterations` polls); grava os pendentes ao sair."""
+        done = 0
+        try:
+            while not self._stop.is_set() and (iterations is None or done < iterations):
+                started = time.monotonic()
+                try:
+                    self.poll_once()
+                except Exception as e:
+                    self._stats['errors'] += 1
+                    self._stats['last_error'] = str(e)
+                    print(f"Erro no poll da CoinGecko: {e}", file=sys.stderr)
+                try:
+                    if self._flush_due():
+                        self.flush()
+                except Exception as e:
+                    self._stats['errors'] += 1
+                    self._stats['last_error'] = str(e)
+                    print(f"Erro ao gravar snapshots: {e}", file=sys.stderr)
+                done += 1
+                if iterations is None or done < iterations:
+                    self._stop.wait(max(0.0, self.interval - (time.monotonic() - started)))
+        finally:
+            # Sem propagar: um erro aqui esconderia a exceção que interrompeu o loop
+            try:
+                self.flush()
+            except Exception as e:
+                self._stats['errors'] += 1
+                self._stats['last_error'] = str(e)
+                print(f"Erro ao gravar snapshots pendentes: {e}", file=sys.stderr)
+
+    def stop(self):
+        self._stop.set()
+
+    def stats(self) -> dict:
+        with self._pending_lock:
+            pending = len(self._pending)
+        return {**self._stats, 'db': self.db_path, 'pending_snapshots': pending, 'interval': self.interval,
+                'top_n': self.top_n, 'window': self.window.stats()}
+
+
+def _window_payload(history: Dict[str, np.ndarray]) -> dict:
+    payload = {'symbols': history['symbols'].tolist(), 'points': history['points'].tolist(),
+               'ts': history['ts'].tolist()}
+    for name in FIELDS:
+        matrix = history[name].astype(object)
+        matrix[np.isnan(history[name])] = None
+        payload[name] = matrix.tolist()
+    return payload
+
+
+def serve(collector: PriceCollector, port: int = DEFAULT_PORT, host: str = '127.0.0.1'):
+    """
+    Servidor HTTP (localhost) da janela em memória, numa thread daemon.
+
+    GET /window?symbols=BTC,ETH&points=48&hours=24[&format=npz]
+    GET /latest?symbols=BTC,ETH
+    GET /health
+    """
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            url = urllib.parse.urlsplit(self.path)
+            query = urllib.parse.parse_qs(url.query)
+            symbols = [s for s in query.get('symbols', [''])[0].split(',') if s] or None
+            try:
+                if url.path == '/window':
+                    hours = query.get('hours', [None])[0]
+                    points = query.get('points', ['48'])[0]
+                    history = collector.window.history(
+                        symbols, points=int(points) if points else None,
+                        since=int(time.time() - float(hours) * 3600) if hours else None)
+                    if query.get('format', ['json'])[0] == 'npz':
+                        buffer = io.BytesIO()
+                        np.savez(buffer, **history)
+                        self._send(buffer.getvalue(), 'application/octet-stream')
+                        return
+                    body = _window_payload(history)
+                elif url.path == '/latest':
+                    body = collector.window.latest(symbols)
+                elif url.path == '/health':
+                    body = collector.stats()
+                else:
+                    self.send_error(404)
+                    return
+            except ValueError as e:
+                self.send_error(400, str(e))
+                return
+            self._send(json.dumps(body, ensure_ascii=False).encode('utf-8'), 'application/json')
+
+        def _send(self, body: bytes, content_type: str):
+            self.send_response(200)
+            self.send_header('Content-Type', content_type)
+            self.send_header('X-Collector-Db', collector.db_path)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, name='collector-http', daemon=True).start()
+    return server
+
+
+def _same_db(response, db_path: Optional[str]) -> bool:
+    return db_path is None or response.headers.get('X-Collector-Db') == os.path.abspath(db_path)
+
+
+def fetch_window(symbols: Optional[List[str]] = None, points: Optional[int] = 48, hours: float = None,
+                 db_path: str = None, url: str = None, timeout: float = 0.5) -> Optional[Dict[str, np.ndarray]]:
+    """
+    Lê a janela bruta do coletor em execução (`points=None` para a janela inteira).
+
+    Retorna None se o coletor não estiver acessível ou gravar em outro banco que
+    não `db_path`, para o chamador cair no SQLite.
+    """
+    params = {'points': points or '', 'format': 'npz'}
+    if symbols:
+        params['symbols'] = ','.join(s.upper() for s in symbols)
+    if hours:
+        params['hours'] = hours
+    try:
+        with urllib.request.urlopen(f"{url or COLLECTOR_URL}/window?{urllib.parse.urlencode(params)}",
+                                    timeout=timeout) as response:
+            if not _same_db(response, db_path):
+                return None
+            data = np.load(io.BytesIO(response.read()))
+            return {name: data[name] for name in data.files}
+    except (OSError, ValueError):
+        return None
+
+
+def fetch_latest(symbols: Optional[List[str]] = None, db_path: str = None, url: str = None,
+                 timeout: float = 0.5) -> Optional[List[dict]]:
+    """Último ponto por símbolo do coletor em execução, ou None se inacessível."""
+    query = f"?symbols={','.join(s.upper() for s in symbols)}" if symbols else ''
+    try:
+        with urllib.request.urlopen(f"{url or COLLECTOR_URL}/latest{query}", timeout=timeout) as response:
+            if not _same_db(response, db_path):
+                return None
+            return json.loads(response.read())
+    except (OSError, ValueError):
+        return None
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Coletor contínuo de preços da CoinGecko com janela em memória.")
+    parser.add_argument('--top', type=int, default=int(os.getenv('COLLECTOR_TOP_N', 250)),
+                        help="Quantidade de moedas por poll (padrão: 250).")
+    parser.add_argument('--interval', type=float, default=float(os.getenv('COLLECTOR_INTERVAL', 60)),
+                        help="Intervalo entre polls em segundos (padrão: 60).")
+    parser.add_argument('--window', type=int, default=int(os.getenv('COLLECTOR_WINDOW', 720)),
+                        help="Pontos mantidos em memória por símbolo (padrão: 720).")
+    parser.add_argument('--flush-snapshots', type=int, default=int(os.getenv('COLLECTOR_FLUSH_SNAPSHOTS', 10)),
+                        help="Snapshots acumulados antes de gravar no SQLite (padrão: 10).")
+    parser.add_argument('--flush-seconds', type=float, default=float(os.getenv('COLLECTOR_FLUSH_SECONDS', 300)),
+                        help="Tempo máximo entre gravações em segundos (padrão: 300).")
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help="Porta do endpoint em 127.0.0.1 (0 desativa).")
+    parser.add_argument('--db', default=None, help="Caminho do banco SQLite.")
+    args = parser.parse_args(argv)
+
+    collector = PriceCollector(args.db, top_n=args.top, interval=args.interval, capacity=args.window,
+                               flush_snapshots=args.flush_snapshots, flush_seconds=args.flush_seconds)
+    print(f"Janela carregada do SQLite: {collector.prime()} pontos")
+    if args.port:
+        serve(collector, args.port)
+        print(f"Janela em http://127.0.0.1:{args.port}/window")
+    try:
+        collector.run()
+    except KeyboardInterrupt:
+        collector.stop()
+    print(json.dumps(collector.stats(), ensure_ascii=False))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
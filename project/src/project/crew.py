@@ -1,20 +1,66 @@
+import os
+from datetime import datetime
 from dotenv import load_dotenv
 
 _ = load_dotenv()
 
 from crewai import Agent, Crew, Process, Task
-from crewai.project import CrewBase, agent, crew, task
+from crewai.project import CrewBase, after_kickoff, agent, before_kickoff, crew, task
+from crewai.tasks.task_output import TaskOutput
+from project.src.project.llm_cache import build_llm
+from project.src.project.telemetry import install_crew_listener, tracer
 from project.src.project.tools.coingecko_tool import CoinGeckoTool
 from project.src.project.tools.news_tool import NewsTool
 from project.src.project.tools.sqlite_tool import SQLiteTool
+from project.src.project.tools.trend_tool import TrendTool
 
 # import agentops
 # agentops.init()
 
-# Instanciar as tools
+# Spans de tarefas, ferramentas e chamadas ao LLM (desative com TELEMETRY=0)
+install_crew_listener()
+
+# Instanciar as tools (usadas por padrão; a execução em lote cria um conjunto por crew com `build_tools`)
 coingecko_tool = CoinGeckoTool()
 news_tool = NewsTool()
 sqlite_tool = SQLiteTool()
+trend_tool = TrendTool()
+
+
+def build_tools(db_path: str = None, memo=None) -> dict:
+    """Ferramentas próprias de um crew; crews de um mesmo lote compartilham as coletas pelo `memo` (FetchMemo)."""
+    return {
+        'coingecko': CoinGeckoTool(db_path=db_path, memo=memo),
+        'news': NewsTool(db_path=db_path, memo=memo),
+        'sqlite': SQLiteTool(db_path),
+        'trend': TrendTool(db_path),
+    }
+
+# LLM compartilhado pelos agentes (com cache local se LLM_CACHE=1; None usa o padrão do crewai)
+agent_llm = build_llm()
+
+# Inputs padrão das tarefas (ex.: {watchlist} no tasks.yaml). Sem inputs o crewai não interpola e o
+# LLM receberia o marcador literal; toda execução (CLI, dashboard, benchmark, lote) parte destes valores.
+DEFAULT_INPUTS = {
+    'watchlist': 'todas as moedas em evidência',
+    'current_year': str(datetime.now().year),
+}
+
+# Modo de execução: 'dag' roda em paralelo as tarefas independentes; 'sequential' executa uma a uma
+EXECUTION_MODE = os.getenv('CREW_EXECUTION_MODE', 'dag')
+
+# Tarefas assíncronas no modo DAG. O crewai inicia uma tarefa assíncrona imediatamente e só
+# sincroniza na próxima tarefa síncrona, que aguarda todas as assíncronas pendentes.
+PARALLEL_TASKS = {
+    'identificar_moedas_em_evidencia',
+    'analisar_sentimento_de_mercado',
+    'armazenar_dados_em_sqlite',
+    'comparar_dados_temporais',
+}
+
+
+def _paralela(task_name: str) -> bool:
+    return EXECUTION_MODE == 'dag' and task_name in PARALLEL_TASKS
 
 
 @CrewBase
@@ -23,11 +69,40 @@ class CryptoTrendCrew():
     agents_config = "config/agents.yaml"
     tasks_config = "config/tasks.yaml"
 
+    # Definido por `resume`: o run já foi reaberto e não deve ser criado outro
+    _retomando = False
+    # Run desta instância, definido no início do kickoff (segue disponível depois de fechado)
+    run_id = None
+
+    def __init__(self, tools: dict = None):
+        # Ferramentas deste crew (ver `build_tools`); sem `tools`, as do módulo, lidas na criação do crew
+        self._tools = tools or {'coingecko': coingecko_tool, 'news': news_tool, 'sqlite': sqlite_tool,
+                                'trend': trend_tool}
+
+    @before_kickoff
+    def abrir_run(self, inputs):
+        # Todas as gravações desta execução ficam marcadas com o mesmo run
+        if not self._retomando:
+            self._tools['sqlite'].start_run('crew')
+        self.run_id = self._tools['sqlite'].run_id
+        # Spans e artefatos das tarefas deste crew vão para o seu run, mesmo com outros crews no processo
+        tracer.bind_run(self.run_id, self.tasks)
+        return inputs
+
+    @after_kickoff
+    def fechar_run(self, result):
+        self._tools['sqlite'].finish_run('ok')
+        tracer.bind_run(None)
+        if agent_llm is not None and hasattr(agent_llm, 'cache_stats'):
+            print(f"Cache de LLM: {agent_llm.cache_stats()}")
+        return result
+
     @agent
     def agente_coingecko(self) -> Agent:
         return Agent(
             config=self.agents_config['agente_coingecko'],
-            tools=[coingecko_tool, sqlite_tool],
+            tools=[self._tools['coingecko'], self._tools['sqlite']],
+            llm=agent_llm,
             verbose=True
         )
 
@@ -35,7 +110,8 @@ class CryptoTrendCrew():
     def agente_sentimento(self) -> Agent:
         return Agent(
             config=self.agents_config['agente_sentimento'],
-            tools=[news_tool, sqlite_tool],
+            tools=[self._tools['news'], self._tools['sqlite']],
+            llm=agent_llm,
             verbose=True
         )
 
@@ -43,7 +119,8 @@ class CryptoTrendCrew():
     def agente_persistencia(self) -> Agent:
         return Agent(
             config=self.agents_config['agente_persistencia'],
-            tools=[sqlite_tool],
+            tools=[self._tools['sqlite']],
+            llm=agent_llm,
             verbose=True
         )
 
@@ -51,7 +128,8 @@ class CryptoTrendCrew():
     def agente_tendencias(self) -> Agent:
         return Agent(
             config=self.agents_config['agente_tendencias'],
-            tools=[sqlite_tool],
+            tools=[self._tools['trend'], self._tools['sqlite']],
+            llm=agent_llm,
             verbose=True
         )
 
@@ -59,7 +137,8 @@ class CryptoTrendCrew():
     def agente_comparador(self) -> Agent:
         return Agent(
             config=self.agents_config['agente_comparador'],
-            tools=[sqlite_tool],
+            tools=[self._tools['trend'], self._tools['sqlite']],
+            llm=agent_llm,
             verbose=True
         )
 
@@ -67,14 +146,20 @@ class CryptoTrendCrew():
     def agente_relatorios(self) -> Agent:
         return Agent(
             config=self.agents_config['agente_relatorios'],
-            tools=[sqlite_tool],
+            tools=[self._tools['sqlite']],
+            llm=agent_llm,
             verbose=True
         )
 
+    # Ordem de execução. No modo DAG as dependências declaradas em `context` no tasks.yaml
+    # definem o que pode rodar em paralelo: coleta de moedas || notícias, depois
+    # tendências, depois validação do armazenamento || comparação temporal, e por fim o relatório.
     @task
     def identificar_moedas_em_evidencia(self) -> Task:
         return Task(
             config=self.tasks_config['identificar_moedas_em_evidencia'],
+            async_execution=_paralela('identificar_moedas_em_evidencia'),
+            callback=self._checkpoint,
             verbose=True
         )
 
@@ -82,20 +167,26 @@ class CryptoTrendCrew():
     def analisar_sentimento_de_mercado(self) -> Task:
         return Task(
             config=self.tasks_config['analisar_sentimento_de_mercado'],
+            async_execution=_paralela('analisar_sentimento_de_mercado'),
+            callback=self._checkpoint,
             verbose=True
         )
 
     @task
-    def armazenar_dados_em_sqlite(self) -> Task:
+    def detectar_tendencias_em_dados(self) -> Task:
         return Task(
-            config=self.tasks_config['armazenar_dados_em_sqlite'],
+            config=self.tasks_config['detectar_tendencias_em_dados'],
+            async_execution=_paralela('detectar_tendencias_em_dados'),
+            callback=self._checkpoint,
             verbose=True
         )
 
     @task
-    def detectar_tendencias_em_dados(self) -> Task:
+    def armazenar_dados_em_sqlite(self) -> Task:
         return Task(
-            config=self.tasks_config['detectar_tendencias_em_dados'],
+            config=self.tasks_config['armazenar_dados_em_sqlite'],
+            async_execution=_paralela('armazenar_dados_em_sqlite'),
+            callback=self._checkpoint,
             verbose=True
         )
 
@@ -103,6 +194,8 @@ class CryptoTrendCrew():
     def comparar_dados_temporais(self) -> Task:
         return Task(
             config=self.tasks_config['comparar_dados_temporais'],
+            async_execution=_paralela('comparar_dados_temporais'),
+            callback=self._checkpoint,
             verbose=True
         )
 
@@ -110,9 +203,46 @@ class CryptoTrendCrew():
     def gerar_relatorio_geral(self) -> Task:
         return Task(
             config=self.tasks_config['gerar_relatorio_geral'],
+            async_execution=_paralela('gerar_relatorio_geral'),
+            callback=self._checkpoint,
             verbose=True
         )
 
+    def _checkpoint(self, output: TaskOutput):
+        # Saída da tarefa concluída gravada no run deste crew, para `resume` pular a tarefa se o run falhar depois
+        try:
+            self._tools['sqlite'].checkpoint_task(output)
+        except Exception as e:
+            print(f"Erro ao gravar checkpoint da tarefa {output.name}: {e}")
+
+    def resume(self, inputs: dict = None, run_id: int = None):
+        """
+        Retoma um run que falhou (padrão: o último não concluído), executando só as tarefas
+        sem checkpoint. As saídas restauradas seguem como contexto das tarefas seguintes.
+        Retorna o resultado do crew, ou None se não houver run a retomar.
+        """
+        run_id, done = self._tools['sqlite'].resume_run(run_id)
+        if run_id is None:
+            print("Nenhum run do crew a retomar.")
+            return None
+        crew = self.crew()
+        pending = []
+        for crew_task in crew.tasks:
+            if crew_task.name in done:
+                crew_task.output = TaskOutput(**done[crew_task.name])
+            else:
+                pending.append(crew_task)
+        print(f"Retomando run {run_id}: {len(crew.tasks) - len(pending)} tarefas restauradas, "
+              f"{len(pending)} pendentes.")
+        if not pending:
+            self._tools['sqlite'].finish_run('ok')
+            return crew.tasks[-1].output
+        # A última tarefa executada precisa ser síncrona para o crew aguardar as assíncronas
+        pending[-1].async_execution = False
+        crew.tasks = pending
+        self._retomando = True
+        return crew.kickoff(inputs=inputs)
+
     @crew
     def crew(self) -> Crew:
         """Creates the CreateBlogpostWTools crew"""
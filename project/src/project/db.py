@@ -0,0 +1,86 @@
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+from project.src.project.telemetry import TracedConnection, tracer
+
+DATA_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../../data'))
+DEFAULT_DB_PATH = os.path.join(DATA_DIR, 'crypto_trend.db')
+
+
+class ConnectionManager:
+    """
+    Mantém uma conexão SQLite persistente por thread para um arquivo de banco.
+
+    As conexões usam WAL (leitores não bloqueiam o escritor e vice-versa),
+    `synchronous=NORMAL`, I/O via mmap e cache de statements preparados, que só
+    é efetivo porque a conexão sobrevive entre chamadas.
+    """
+
+    def __init__(self, db_path: str, busy_timeout: float = 30.0, mmap_size: int = 256 * 1024 * 1024,
+                 cache_size_kb: int = 16 * 1024, cached_statements: int = 256):
+        self.db_path = db_path
+        self.busy_timeout = busy_timeout
+        self.mmap_size = mmap_size
+        self.cache_size_kb = cache_size_kb
+        self.cached_statements = cached_statements
+        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        self._local = threading.local()
+        self._connections = []
+        self._lock = threading.Lock()
+
+    def connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._connect()
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    @contextmanager
+    def transaction(self):
+        """Executa o bloco numa transação: commit ao final ou rollback em caso de erro."""
+        conn = self.connection()
+        try:
+            yield conn
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+    def close_all(self):
+        with self._lock:
+            for conn in self._connections:
+                try:
+                    conn.close()
+                except sqlite3.Error:
+                    pass
+            self._connections.clear()
+        self._local = threading.local()
+
+    def _connect(self) -> sqlite3.Connection:
+        # Com telemetria ativa, cada statement vira um span 'sql'
+        conn = sqlite3.connect(self.db_path, timeout=self.busy_timeout, cached_statements=self.cached_statements,
+                               check_same_thread=False, factory=TracedConnection if tracer.enabled else sqlite3.Connection)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute(f'PRAGMA mmap_size={int(self.mmap_size)}')
+        conn.execute(f'PRAGMA cache_size=-{int(self.cache_size_kb)}')
+        conn.execute('PRAGMA temp_store=MEMORY')
+        conn.execute(f'PRAGMA busy_timeout={int(self.busy_timeout * 1000)}')
+        return conn
+
+
+_managers = {}
+_managers_lock = threading.Lock()
+
+
+def get_manager(db_path: str = None) -> ConnectionManager:
+    """Retorna o gerenciador compartilhado do processo para o arquivo de banco."""
+    db_path = os.path.abspath(db_path or DEFAULT_DB_PATH)
+    with _managers_lock:
+        if db_path not in _managers:
+            _managers[db_path] = ConnectionManager(db_path)
+        return _managers[db_path]
@@ -0,0 +1,104 @@
+import argparse
+import fcntl
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager
+
+from project.src.project.db import DEFAULT_DB_PATH
+from project.src.project.telemetry import tracer
+from project.src.project.tools.coingecko_tool import CoinGeckoTool
+from project.src.project.tools.news_tool import NewsTool
+from project.src.project.tools.sqlite_tool import SQLiteTool
+
+
+class IngestAlreadyRunning(RuntimeError):
+    pass
+
+
+@contextmanager
+def _exclusive_lock(path: str):
+    """Impede execuções sobrepostas no mesmo banco (ex.: cron disparando antes da anterior terminar)."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as handle:
+        try:
+            fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            raise IngestAlreadyRunning(f"Outra ingestão está em andamento ({path})")
+        try:
+            yield
+        finally:
+            fcntl.flock(handle, fcntl.LOCK_UN)
+
+
+def run_ingest(top_n: int = 50, news_symbols: int = 10, db_path: str = None) -> dict:
+    """
+    Coleta mercado e notícias e persiste tudo sem passar por nenhum LLM.
+
+    Chama a CoinGecko Tool, a News Tool e a SQLiteTool diretamente com dados
+    estruturados, num único run do tipo 'headless'.
+    """
+    started = time.perf_counter()
+    # Um lock por banco, ao lado do arquivo: ingestões em bancos diferentes não se bloqueiam
+    with _exclusive_lock(os.path.abspath(db_path or DEFAULT_DB_PATH) + '.lock'):
+        sqlite_tool = SQLiteTool(db_path)
+        run_id = sqlite_tool.start_run('headless')
+        try:
+            with tracer.span('stage', 'fetch_markets') as span:
+                markets = CoinGeckoTool(db_path=db_path).fetch_markets(top_n)
+                span['items'] = len(markets)
+            with tracer.span('stage', 'save_moedas') as span:
+                moedas = sqlite_tool.ingest_moedas(markets)
+                span['items'] = moedas.saved
+
+            news = {}
+            sentimentos = None
+            if news_symbols > 0:
+                symbols = [coin['symbol'].upper() for coin in markets[:news_symbols]]
+                with tracer.span('stage', 'collect_news') as span:
+                    news = NewsTool(db_path=db_path).collect_batch(symbols)
+                    span['items'] = len(news)
+                with tracer.span('stage', 'save_sentimentos'):
+                    # Sentimento léxico das manchetes, já pontuado em lote pela News Tool
+                    sentimentos = sqlite_tool.ingest_sentimentos(
+                        [result['sentiment'] for result in news.values() if not result.get('error')])
+            sqlite_tool.finish_run('ok')
+        except Exception:
+            sqlite_tool.finish_run('error')
+            raise
+
+    return {
+        'run_id': run_id,
+        'moedas': moedas.saved,
+        'moedas_rejeitadas': len(moedas.errors),
+        'sentimentos': sentimentos.saved if sentimentos else 0,
+        'noticias_novas': sum(len(result['items']) for result in news.values()),
+        'erros_noticias': {symbol: result['error'] for symbol, result in news.items() if result.get('error')},
+        'duracao_s': round(time.perf_counter() - started, 3),
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Ingestão headless (sem LLM) de mercado e notícias, para uso em cron.")
+    parser.add_argument('--top', type=int, default=int(os.getenv('INGEST_TOP_N', 50)),
+                        help="Quantidade de moedas a coletar (padrão: 50).")
+    parser.add_argument('--news', type=int, default=int(os.getenv('INGEST_NEWS_SYMBOLS', 10)),
+                        help="Quantidade de moedas do topo com coleta de notícias (0 desativa).")
+    parser.add_argument('--db', default=None, help="Caminho do banco SQLite.")
+    args = parser.parse_args(argv)
+
+    try:
+        summary = run_ingest(args.top, args.news, args.db)
+    except IngestAlreadyRunning as e:
+        print(str(e), file=sys.stderr)
+        return 0
+    except Exception as e:
+        print(f"Erro na ingestão headless: {e}", file=sys.stderr)
+        return 1
+    print(json.dumps(summary, ensure_ascii=False))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
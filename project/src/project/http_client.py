@@ -0,0 +1,203 @@
+"""
+Cliente HTTP compartilhado pelas ferramentas: sessões keep-alive com pool, timeouts de
+conexão e leitura, novas tentativas com backoff exponencial e jitter (respeitando
+`Retry-After`) e circuit breaker por host.
+
+Cada tentativa vira um span 'http' (tempo esperando o upstream, status = código HTTP),
+cada pausa entre tentativas um span 'http_retry' e cada espera no rate limit um span
+'http_wait', para a telemetria separar tempo de upstream, de retry e de fila.
+"""
+import os
+import random
+import threading
+import time
+import urllib.parse
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from project.src.project.telemetry import tracer
+
+HTTP_CONNECT_TIMEOUT = float(os.getenv('HTTP_CONNECT_TIMEOUT', 5))
+HTTP_READ_TIMEOUT = float(os.getenv('HTTP_READ_TIMEOUT', 30))
+HTTP_MAX_RETRIES = int(os.getenv('HTTP_MAX_RETRIES', 3))
+HTTP_BACKOFF_BASE = float(os.getenv('HTTP_BACKOFF_BASE', 1.0))
+HTTP_BACKOFF_MAX = float(os.getenv('HTTP_BACKOFF_MAX', 30.0))
+# Retry-After acima disso não é esperado: a chamada falha e o chamador decide (ex.: usar cache vencido)
+HTTP_RETRY_AFTER_MAX = float(os.getenv('HTTP_RETRY_AFTER_MAX', 120.0))
+HTTP_BREAKER_FAILURES = int(os.getenv('HTTP_BREAKER_FAILURES', 5))
+HTTP_BREAKER_RESET = float(os.getenv('HTTP_BREAKER_RESET', 60.0))
+
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+
+class CircuitOpen(requests.RequestException):
+    """O host acumulou falhas seguidas e está em pausa até o fim do `reset_timeout`."""
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker de um host, seguro entre threads.
+
+    Fechado: tudo passa. Após `failures` falhas seguidas abre e recusa chamadas por
+    `reset_timeout` segundos; depois deixa passar uma chamada de teste (meio aberto),
+    que fecha o circuito se der certo ou o reabre se falhar.
+    """
+
+    def __init__(self, failures: int = None, reset_timeout: float = None):
+        self.failures = failures or HTTP_BREAKER_FAILURES
+        self.reset_timeout = reset_timeout or HTTP_BREAKER_RESET
+        self._count = 0
+        self._opened_at: Optional[float] = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._opened_at is None:
+                return 'closed'
+            return 'half_open' if time.monotonic() - self._opened_at >= self.reset_timeout else 'open'
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if time.monotonic() - self._opened_at < self.reset_timeout or self._probing:
+                return False
+            self._probing = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self._count = 0
+            self._opened_at = None
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self._count += 1
+            if self._probing or self._count >= self.failures:
+                self._opened_at = time.monotonic()
+            self._probing = False
+
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+def host_breaker(host: str) -> CircuitBreaker:
+    """Breaker do processo para o host (compartilhado por todos os clientes)."""
+    with _breakers_lock:
+        if host not in _breakers:
+            _breakers[host] = CircuitBreaker()
+        return _breakers[host]
+
+
+def retry_after_seconds(response) -> Optional[float]:
+    """Valor de `Retry-After` em segundos (aceita segundos ou data HTTP); None se ausente ou inválido."""
+    value = response.headers.get('Retry-After') if response is not None else None
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        return max(0.0, (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+
+class HttpClient:
+    """
+    Sessão keep-alive com política de timeouts e novas tentativas.
+
+    `get` devolve a resposta final (inclusive de erro, para o chamador decidir com
+    `raise_for_status`) ou levanta a última exceção de rede; com o circuito do host
+    aberto levanta CircuitOpen sem tocar a rede.
+    """
+
+    def __init__(self, timeout: Tuple[float, float] = None, max_retries: int = None, backoff_base: float = None,
+                 backoff_max: float = None, pool_maxsize: int = 10, headers: dict = None):
+        self.timeout = timeout or (HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT)
+        self.max_retries = HTTP_MAX_RETRIES if max_retries is None else max_retries
+        self.backoff_base = HTTP_BACKOFF_BASE if backoff_base is None else backoff_base
+        self.backoff_max = backoff_max or HTTP_BACKOFF_MAX
+        self.session = requests.Session()
+        if headers:
+            self.session.headers.update(headers)
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_maxsize)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    def get(self, url: str, params: dict = None, name: str = None, bucket=None, stream: bool = False,
+            timeout: Tuple[float, float] = None) -> requests.Response:
+        host = urllib.parse.urlsplit(url).netloc
+        name = name or host + urllib.parse.urlsplit(url).path
+        breaker = host_breaker(host)
+        for attempt in range(self.max_retries + 1):
+            if not breaker.allow():
+                tracer.record('http', name, 0.0, status='circuit_open')
+                raise CircuitOpen(f"circuito aberto para {host} após falhas seguidas; tente mais tarde")
+            if bucket is not None:
+                waited = bucket.acquire()
+                if waited:
+                    tracer.record('http_wait', host, waited * 1000.0)
+
+            response, error, size = None, None, None
+            started_at, started = time.time(), time.perf_counter()
+            try:
+                response = self.session.get(url, params=params, stream=stream, timeout=timeout or self.timeout)
+                # Em streaming o corpo ainda não foi lido: o span mede até os cabeçalhos
+                size = None if stream else len(response.content)
+            except (requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError) as e:
+                response, error = None, e
+            status = str(response.status_code) if response is not None else type(error).__name__
+            tracer.record('http', name, (time.perf_counter() - started) * 1000.0, started_at=started_at,
+                          bytes=size, status=status)
+
+            # 429 é o upstream saudável pedindo calma (Retry-After): não conta para o breaker
+            if error is not None or response.status_code >= 500:
+                breaker.record_failure()
+            else:
+                breaker.record_success()
+            if error is None and response.status_code not in RETRY_STATUS:
+                return response
+
+            delay = self._delay(attempt, response)
+            if attempt == self.max_retries or delay is None:
+                if error is not None:
+                    raise error
+                return response
+            if response is not None:
+                response.close()
+            tracer.record('http_retry', host, delay * 1000.0, status=status)
+            time.sleep(delay)
+
+    def _delay(self, attempt: int, response) -> Optional[float]:
+        """Pausa antes da próxima tentativa: Retry-After (com jitter pequeno) ou backoff exponencial com jitter."""
+        retry_after = retry_after_seconds(response)
+        if retry_after is not None:
+            if retry_after > HTTP_RETRY_AFTER_MAX:
+                return None
+            return retry_after + random.uniform(0, min(1.0, self.backoff_base))
+        # "Full jitter": espalha as tentativas das threads que falharam juntas
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    def close(self):
+        self.session.close()
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def shared_client(name: str, **kwargs) -> HttpClient:
+    """Cliente do processo para `name` (ex.: host da API), criado na primeira chamada com `kwargs`."""
+    with _clients_lock:
+        if name not in _clients:
+            _clients[name] = HttpClient(**kwargs)
+        return _clients[name]
@@ -0,0 +1,220 @@
+import re
+import time
+from datetime import datetime
+from typing import Callable, Iterable, List, Optional, Tuple
+from pydantic import BaseModel, Field
+from project.src.project.rollups import rollup_moedas, rollup_sentimentos
+from project.src.project.runs import finish_run, start_run
+
+DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+# Aliases aceitos para cada coluna (dados da CoinGecko ou gerados pelos agentes)
+SYMBOL_KEYS = ('symbol', 'simbolo')
+NAME_KEYS = ('name', 'nome')
+PRICE_KEYS = ('current_price', 'price', 'preco', 'preco_atual')
+VOLUME_KEYS = ('total_volume', 'volume', 'volume_negociacao')
+CHANGE_KEYS = ('price_change_percentage_24h', 'change_24h', 'variacao_percentual_24h')
+
+_NUMBER_JUNK = re.compile(r'[\s$%,]')
+# Linha de texto da CoinGecko Tool: "BTC - Bitcoin ($45000)"
+_TEXT_LINE = re.compile(r'^\s*(?P<symbol>[^\s-][^-]*?)\s+-\s+(?P<name>.+?)\s*\(\s*\$?(?P<price>[^)]+)\)\s*$')
+
+
+class IngestResult(BaseModel):
+    """Resultado de uma ingestão em lote."""
+    saved: int = 0
+    ts: int
+    run_id: int
+    errors: List[str] = Field(default_factory=list)
+
+    def summary(self, entity: str) -> str:
+        text = f"Salvas {self.saved} {entity} no banco de dados."
+        if self.errors:
+            text += f" {len(self.errors)} registros rejeitados: " + "; ".join(self.errors[:5])
+            if len(self.errors) > 5:
+                text += "; ..."
+        return text
+
+
+def to_float(value) -> Optional[float]:
+    """Converte números ou strings como '$1,234.5' e '-3.2%' em float. Ausente/'N/A' vira None."""
+    if value is None or isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    text = _NUMBER_JUNK.sub('', str(value))
+    if not text or text.upper() == 'N/A':
+        return None
+    return float(text)
+
+
+def _first(row: dict, keys: Tuple[str, ...]):
+    for key in keys:
+        if row.get(key) not in (None, ''):
+            return row[key]
+    return None
+
+
+def normalize_moedas(rows: Iterable[dict]) -> Tuple[List[tuple], List[str]]:
+    """
+    Normaliza um lote de moedas em uma única passada.
+
+    Retorna as tuplas (symbol, name, price, volume, change_24h) válidas e a lista
+    de erros das linhas rejeitadas.
+    """
+    valid, errors = [], []
+    for i, row in enumerate(rows):
+        if not isinstance(row, dict):
+            errors.append(f"linha {i}: formato inválido")
+            continue
+        symbol = str(_first(row, SYMBOL_KEYS) or '').strip().upper()
+        name = str(_first(row, NAME_KEYS) or '').strip()
+        if not symbol or not name:
+            errors.append(f"linha {i}: símbolo ou nome ausente")
+            continue
+        try:
+            price = to_float(_first(row, PRICE_KEYS))
+            volume = to_float(_first(row, VOLUME_KEYS))
+            change_24h = to_float(_first(row, CHANGE_KEYS))
+        except ValueError as e:
+            errors.append(f"linha {i} ({symbol}): valor numérico inválido ({e})")
+            continue
+        if price is None:
+            errors.append(f"linha {i} ({symbol}): preço ausente")
+            continue
+        valid.append((symbol, name, price, volume, change_24h))
+    return valid, errors
+
+
+def parse_moedas_text(text: str) -> List[dict]:
+    """Converte a saída textual da CoinGecko Tool em registros de moedas."""
+    rows = []
+    for line in text.strip().split('\n'):
+        match = _TEXT_LINE.match(line)
+        if match:
+            rows.append({'symbol': match.group('symbol'), 'name': match.group('name'),
+                         'price': match.group('price')})
+    return rows
+
+
+def sentimento_por_contagem(symbol: str, news_count: int) -> dict:
+    """Sentimento heurístico a partir da quantidade de notícias (score de 0 a 1)."""
+    score = min(news_count * 0.1, 1.0)
+    sentiment = "positivo" if score > 0.5 else "neutro" if score > 0.2 else "negativo"
+    return {'symbol': symbol, 'sentiment': sentiment, 'score': score, 'news_count': news_count}
+
+
+def normalize_sentimentos(rows: Iterable[dict]) -> Tuple[List[tuple], List[str]]:
+    """Normaliza um lote de sentimentos em tuplas (symbol, sentiment, score, news_count)."""
+    valid, errors = [], []
+    for i, row in enumerate(rows):
+        if not isinstance(row, dict):
+            errors.append(f"linha {i}: formato inválido")
+            continue
+        symbol = str(row.get('symbol') or '').strip().upper()
+        if not symbol:
+            errors.append(f"linha {i}: símbolo ausente")
+            continue
+        try:
+            score = to_float(row.get('score'))
+            news_count = int(row.get('news_count') or 0)
+        except (TypeError, ValueError) as e:
+            errors.append(f"linha {i} ({symbol}): valor numérico inválido ({e})")
+            continue
+        if score is None:
+            errors.append(f"linha {i} ({symbol}): score ausente")
+            continue
+        valid.append((symbol, row.get('sentiment'), score, news_count))
+    return valid, errors
+
+
+def snapshot_time(ts: int = None) -> Tuple[int, str]:
+    """Retorna o par (epoch, data local formatada) usado por todas as linhas de um snapshot."""
+    ts = int(time.time()) if ts is None else int(ts)
+    return ts, datetime.fromtimestamp(ts).strftime(DATE_FORMAT)
+
+
+def bulk_insert_moedas(db, rows: Iterable[dict], ts: int = None, run_id: int = None) -> IngestResult:
+    """
+    Grava um snapshot de moedas com um único timestamp e uma única transação.
+
+    Sem `run_id`, o snapshot vira um run próprio do tipo 'ingest'.
+    """
+    return _bulk_insert(db, 'INSERT INTO moedas (symbol, name, price, volume, change_24h, ts, date, run_id) '
+                            'VALUES (?, ?, ?, ?, ?, ?, ?, ?)', normalize_moedas(rows), ts, run_id, rollup_moedas)
+
+
+def bulk_insert_sentimentos(db, rows: Iterable[dict], ts: int = None, run_id: int = None) -> IngestResult:
+    """
+    Grava um snapshot de sentimentos com um único timestamp e uma única transação.
+
+    Linhas com `headlines` (hashes das manchetes pontuadas) são ligadas a elas em
+    `sentimento_manchetes` na mesma transação.
+    """
+    rows = list(rows)
+    valid, errors = normalize_sentimentos(rows)
+    headlines = {}
+    for row in rows:
+        if isinstance(row, dict) and row.get('headlines'):
+            headlines[str(row.get('symbol') or '').strip().upper()] = row['headlines']
+
+    def rollup(conn, valid, ts):
+        rollup_sentimentos(conn, valid, ts)
+        conn.executemany('INSERT OR IGNORE INTO sentimento_manchetes (symbol, ts, title_hash) VALUES (?, ?, ?)',
+                         [(symbol, ts, h) for symbol, *_ in valid for h in headlines.get(symbol, ())])
+
+    return _bulk_insert(db, 'INSERT INTO sentimento (symbol, sentiment, score, news_count, ts, date, run_id) '
+                            'VALUES (?, ?, ?, ?, ?, ?, ?)', (valid, errors), ts, run_id, rollup)
+
+
+def bulk_insert_snapshots(db, snapshots: List[Tuple[int, List[tuple]]], run_id: int = None,
+                          kind: str = 'stream') -> int:
+    """
+    Grava vários snapshots de moedas já normalizados, cada um com o seu timestamp,
+    numa única transação (com os agregados hora/dia). Retorna o total de linhas.
+
+    Sem `run_id`, o lote vira um run próprio do tipo `kind`.
+    """
+    if not snapshots:
+        return 0
+    own_run = run_id is None
+    if own_run:
+        run_id = start_run(db, kind)
+    total = 0
+    try:
+        with db.transaction() as conn:
+            for ts, valid in snapshots:
+                ts, date = snapshot_time(ts)
+                conn.executemany('INSERT INTO moedas (symbol, name, price, volume, change_24h, ts, date, run_id) '
+                                 'VALUES (?, ?, ?, ?, ?, ?, ?, ?)', [values + (ts, date, run_id) for values in valid])
+                rollup_moedas(conn, valid, ts)
+                total += len(valid)
+    except Exception:
+        if own_run:
+            finish_run(db, run_id, 'error')
+        raise
+    if own_run:
+        finish_run(db, run_id)
+    return total
+
+
+def _bulk_insert(db, sql: str, normalized: Tuple[List[tuple], List[str]], ts: int, run_id: int,
+                 rollup: Callable = None) -> IngestResult:
+    valid, errors = normalized
+    ts, date = snapshot_time(ts)
+    own_run = run_id is None
+    if own_run:
+        run_id = start_run(db, 'ingest')
+    try:
+        with db.transaction() as conn:
+            conn.executemany(sql, [values + (ts, date, run_id) for values in valid])
+            # Agregados hora/dia atualizados na mesma transação que as linhas brutas
+            if rollup is not None:
+                rollup(conn, valid, ts)
+    except Exception:
+        if own_run:
+            finish_run(db, run_id, 'error')
+        raise
+    if own_run:
+        finish_run(db, run_id)
+    return IngestResult(saved=len(valid), ts=ts, run_id=run_id, errors=errors)
@@ -0,0 +1,79 @@
+import threading
+import time
+import traceback
+from typing import Callable, Optional
+
+PENDING = 'pendente'
+DONE = 'concluída'
+
+
+class CrewJob:
+    """
+    Executa o crew em uma thread de fundo e acompanha o progresso por tarefa.
+
+    O progresso vem dos callbacks do próprio crewai (`task_callback` ao fim de
+    cada tarefa e `step_callback` a cada passo dos agentes), então quem inicia
+    o job (ex.: o dashboard) continua livre e só lê `snapshot()`.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._state = self._initial_state('idle')
+
+    @staticmethod
+    def _initial_state(status: str) -> dict:
+        return {'status': status, 'tasks': {}, 'steps': 0,
+                'started_at': None, 'finished_at': None, 'error': None, 'result': None}
+
+    def running(self) -> bool:
+        with self._lock:
+            return self._state['status'] == 'running'
+
+    def start(self, crew_factory: Callable, inputs: Optional[dict] = None) -> bool:
+        """Inicia o job; retorna False se já houver uma execução em andamento."""
+        with self._lock:
+            if self._state['status'] == 'running':
+                return False
+            self._state = self._initial_state('running')
+            self._state['started_at'] = time.time()
+        self._thread = threading.Thread(target=self._execute, args=(crew_factory, inputs),
+                                        name='crew-job', daemon=True)
+        self._thread.start()
+        return True
+
+    def _execute(self, crew_factory: Callable, inputs: Optional[dict]):
+        try:
+            crew = crew_factory()
+            with self._lock:
+                self._state['tasks'] = {task.name: PENDING for task in crew.tasks}
+            crew.task_callback = self._on_task
+            crew.step_callback = self._on_step
+            result = crew.kickoff(inputs=inputs)
+            self._finish('ok', result=str(getattr(result, 'raw', result)))
+        except Exception as e:
+            traceback.print_exc()
+            self._finish('error', error=str(e))
+
+    def _on_task(self, output):
+        with self._lock:
+            self._state['tasks'][output.name] = DONE
+
+    def _on_step(self, step):
+        with self._lock:
+            self._state['steps'] += 1
+
+    def _finish(self, status: str, result: str = None, error: str = None):
+        with self._lock:
+            self._state.update(status=status, result=result, error=error, finished_at=time.time())
+
+    def snapshot(self) -> dict:
+        """Cópia do estado atual, segura para ler de outra thread."""
+        with self._lock:
+            state = dict(self._state)
+            state['tasks'] = dict(self._state['tasks'])
+        end = state['finished_at'] or time.time()
+        state['elapsed'] = end - state['started_at'] if state['started_at'] else 0.0
+        total = len(state['tasks'])
+        state['progress'] = sum(1 for s in state['tasks'].values() if s == DONE) / total if total else 0.0
+        return state
@@ -0,0 +1,64 @@
+import os
+import time
+from typing import Any, Dict, List, Optional, Union
+
+from crewai import LLM
+from project.src.project.cache import shared_cache
+from project.src.project.telemetry import tracer
+
+
+def llm_cache_enabled() -> bool:
+    return os.getenv('LLM_CACHE', '').lower() in ('1', 'true', 'yes', 'on')
+
+
+class CachedLLM(LLM):
+    """
+    LLM com cache local endereçado por conteúdo.
+
+    A chave é o hash do modelo, dos parâmetros de geração e das mensagens
+    completas, que já incluem as saídas das ferramentas (observações) da
+    iteração. Reexecuções com as mesmas entradas (test, replay, runs
+    repetidos) são respondidas do disco sem chamar o provedor.
+    """
+
+    def __init__(self, model: str, cache=None, **kwargs):
+        super().__init__(model=model, **kwargs)
+        self._cache = cache or shared_cache(
+            'llm',
+            ttl=float(os.getenv('LLM_CACHE_TTL', 7 * 24 * 3600)),
+            stale_ttl=0,
+            max_entries=int(os.getenv('LLM_CACHE_MAX_ENTRIES', 5000)),
+            max_bytes=int(os.getenv('LLM_CACHE_MAX_MB', 200)) * 1024 * 1024,
+        )
+
+    def call(self, messages: Union[str, List[Dict[str, str]]], tools: Optional[List[dict]] = None,
+             callbacks: Optional[List[Any]] = None, available_functions: Optional[Dict[str, Any]] = None) -> Union[str, Any]:
+        key = {
+            'messages': messages,
+            'tools': tools,
+            'temperature': self.temperature,
+            'stop': self.stop,
+            'response_format': str(self.response_format) if self.response_format else None,
+        }
+        started = time.perf_counter()
+        cached = self._cache.get(self.model, key)
+        if cached is not None:
+            # Acerto no cache não gasta tokens; o span registra só a chamada evitada
+            tracer.record('llm', self.model, (time.perf_counter() - started) * 1000.0, status='cache',
+                          prompt_tokens=0, completion_tokens=0)
+            return cached
+        result = super().call(messages, tools=tools, callbacks=callbacks, available_functions=available_functions)
+        # Só respostas textuais são determinísticas o bastante para reaproveitar
+        if isinstance(result, str):
+            self._cache.put(self.model, key, result)
+        return result
+
+    def cache_stats(self) -> dict:
+        return self._cache.stats()
+
+
+def build_llm() -> Optional[LLM]:
+    """LLM dos agentes: com cache se LLM_CACHE estiver ativo; None mantém o padrão do crewai."""
+    if not llm_cache_enabled():
+        return None
+    return CachedLLM(model=os.getenv('MODEL', 'gpt-4o-mini'))
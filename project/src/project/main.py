@@ -2,9 +2,9 @@
 import sys
 import warnings
 
-from datetime import datetime
 
-from crew import CryptoTrendCrew
+from crew import DEFAULT_INPUTS, CryptoTrendCrew
+from headless import main as headless_main
 
 warnings.filterwarnings("ignore", category=SyntaxWarning, module="pysbd")
 
@@ -18,10 +18,7 @@ def run():
     """
     Run the crew.
     """
-    inputs = {
-        'topic': 'AI LLMs',
-        'current_year': str(datetime.now().year)
-    }
+    inputs = dict(DEFAULT_INPUTS)
 
     try:
         CryptoTrendCrew().crew().kickoff(inputs=inputs)
@@ -29,14 +26,23 @@ def run():
         raise Exception(f"An error occurred while running the crew: {e}")
 
 
+def resume():
+    """
+    Resume the last unfinished crew run (or the run id given), skipping tasks already checkpointed.
+    """
+    inputs = dict(DEFAULT_INPUTS)
+
+    try:
+        CryptoTrendCrew().resume(inputs=inputs, run_id=int(sys.argv[1]) if len(sys.argv) > 1 else None)
+    except Exception as e:
+        raise Exception(f"An error occurred while resuming the crew: {e}")
+
+
 def train():
     """
     Train the crew for a given number of iterations.
     """
-    inputs = {
-        "topic": "AI LLMs",
-        'current_year': str(datetime.now().year)
-    }
+    inputs = dict(DEFAULT_INPUTS)
     try:
         CryptoTrendCrew().crew().train(n_iterations=int(sys.argv[1]), filename=sys.argv[2], inputs=inputs)
 
@@ -59,10 +65,7 @@ def test():
     """
     Test the crew execution and returns the results.
     """
-    inputs = {
-        "topic": "AI LLMs",
-        "current_year": str(datetime.now().year)
-    }
+    inputs = dict(DEFAULT_INPUTS)
 
     try:
         CryptoTrendCrew().crew().test(n_iterations=int(sys.argv[1]), eval_llm=sys.argv[2], inputs=inputs)
@@ -71,5 +74,28 @@ def test():
         raise Exception(f"An error occurred while testing the crew: {e}")
 
 
+def ingest():
+    """
+    Headless ingest (no LLM): fetch market data and news and persist them. Safe to run from cron.
+    """
+    sys.exit(headless_main(sys.argv[1:]))
+
+
+def batch():
+    """
+    Run the crew for several watchlists concurrently, sharing one market and news fetch.
+    """
+    # Imported here: the batch module loads its own crew module and tool instances
+    from batch import main as batch_main
+    sys.exit(batch_main(sys.argv[1:]))
+
+
 if __name__ == "__main__":
-    run()
+    if len(sys.argv) > 1 and sys.argv[1] == 'resume':
+        sys.argv.pop(1)
+        resume()
+    elif len(sys.argv) > 1 and sys.argv[1] == 'batch':
+        sys.argv.pop(1)
+        batch()
+    else:
+        run()
@@ -0,0 +1,180 @@
+"""
+Execução somente leitura e de custo limitado das consultas SQL escritas pelos agentes.
+
+- Conexão própria aberta em `mode=ro` e com authorizer: só SELECT/leitura passa;
+  escrita, DDL, PRAGMA e ATTACH são negados pelo próprio SQLite.
+- `EXPLAIN QUERY PLAN` antes de executar: varredura completa de tabela grande que
+  precisa ler tudo antes da primeira linha (agregação, DISTINCT, ordenação em
+  árvore temporária) é rejeitada com a sugestão de filtrar por coluna indexada.
+  Se a consulta já filtra por `ts` e o planejador escolheu outro índice (comum
+  sem ANALYZE), ela é reescrita com `INDEXED BY idx_<tabela>_ts` e reavaliada.
+  Consultas sem LIMIT são reescritas com LIMIT para o SQLite parar cedo.
+- Linhas lidas em lotes (`fetchmany`) até o limite de linhas ou de bytes, nunca
+  `fetchall`; o restante fica sinalizado.
+- Prazo por statement via progress handler: a consulta é interrompida ao estourar.
+"""
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import List, Optional, Tuple
+
+from project.src.project.telemetry import TracedConnection, tracer
+
+QUERY_MAX_ROWS = int(os.getenv('QUERY_MAX_ROWS', 200))
+QUERY_MAX_BYTES = int(os.getenv('QUERY_MAX_BYTES', 64 * 1024))
+QUERY_TIMEOUT = float(os.getenv('QUERY_TIMEOUT', 2.0))
+# Tabelas acima disso não podem ser varridas por inteiro antes da primeira linha
+QUERY_SCAN_ROWS = int(os.getenv('QUERY_SCAN_ROWS', 100000))
+FETCH_CHUNK = 64
+# Instruções da VM entre verificações do prazo
+PROGRESS_STEPS = 10000
+
+_ALLOWED_ACTIONS = {sqlite3.SQLITE_SELECT, sqlite3.SQLITE_READ, sqlite3.SQLITE_FUNCTION, sqlite3.SQLITE_RECURSIVE}
+_READ_ONLY_START = re.compile(r'^\s*(select|with|values)\b', re.IGNORECASE)
+_SCAN = re.compile(r'^SCAN (\w+)')
+_AGGREGATE = re.compile(r'\b(group\s+by|distinct|count|sum|avg|min|max|total|group_concat)\b', re.IGNORECASE)
+# "FROM moedas m" / "JOIN sentimento AS s": o plano cita o alias, não a tabela
+_ALIAS = re.compile(r'(?:\bfrom|\bjoin|,)\s*"?(\w+)"?\s+(?:as\s+)?(\w+)', re.IGNORECASE)
+# Filtro por faixa de tempo: permite forçar o índice de ts quando o planejador escolhe outro
+_TS_FILTER = re.compile(r'\bts\s*(>=|>|<=|<|=|between)', re.IGNORECASE)
+_NOT_ALIAS = {'where', 'group', 'order', 'limit', 'join', 'inner', 'left', 'cross', 'natural', 'on', 'using',
+              'indexed', 'union', 'having', 'window'}
+_HAS_LIMIT = re.compile(r'\blimit\s+\d+\s*(offset\s+\d+\s*)?;?\s*$', re.IGNORECASE)
+
+
+class QueryRejected(Exception):
+    """Consulta recusada antes de executar (escrita ou custo sem limite)."""
+
+
+def _authorizer(action, arg1, arg2, db_name, trigger):
+    return sqlite3.SQLITE_OK if action in _ALLOWED_ACTIONS else sqlite3.SQLITE_DENY
+
+
+class ReadOnlyQueryEngine:
+    """Executor de consultas dos agentes sobre um arquivo de banco (uma conexão somente leitura por thread)."""
+
+    def __init__(self, db_path: str, max_rows: int = None, max_bytes: int = None, timeout: float = None,
+                 scan_rows: int = None):
+        self.db_path = os.path.abspath(db_path)
+        self.max_rows = max_rows or QUERY_MAX_ROWS
+        self.max_bytes = max_bytes or QUERY_MAX_BYTES
+        self.timeout = timeout or QUERY_TIMEOUT
+        self.scan_rows = QUERY_SCAN_ROWS if scan_rows is None else scan_rows
+        self._local = threading.local()
+
+    def connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            uri = f"file:{self.db_path}?mode=ro"
+            conn = sqlite3.connect(uri, uri=True, check_same_thread=False,
+                                   factory=TracedConnection if tracer.enabled else sqlite3.Connection)
+            conn.execute('PRAGMA busy_timeout=5000')
+            conn.set_authorizer(_authorizer)
+            self._local.conn = conn
+        return conn
+
+    def execute(self, sql: str) -> Tuple[List[str], List[tuple], Optional[str]]:
+        """
+        Executa `sql` e retorna (colunas, linhas, motivo do corte). O motivo é None se o
+        resultado veio inteiro. Levanta QueryRejected se a consulta for recusada.
+        """
+        sql = (sql or '').strip()
+        if not _READ_ONLY_START.match(sql):
+            raise QueryRejected("apenas consultas de leitura (SELECT/WITH) são permitidas; "
+                                "use as ações save_* para gravar")
+        conn = self.connection()
+        deadline = time.monotonic() + self.timeout
+        conn.set_progress_handler(lambda: time.monotonic() > deadline, PROGRESS_STEPS)
+        try:
+            sql = self._check_plan(conn, sql)
+            if not _HAS_LIMIT.search(sql):
+                sql = f"SELECT * FROM ({sql.rstrip(';')}) LIMIT {self.max_rows + 1}"
+            cursor = conn.execute(sql)
+            columns = [d[0] for d in cursor.description]
+            rows, size, reason = [], 0, None
+            while reason is None:
+                chunk = cursor.fetchmany(FETCH_CHUNK)
+                if not chunk:
+                    break
+                for row in chunk:
+                    if len(rows) >= self.max_rows:
+                        reason = f"limite de {self.max_rows} linhas"
+                        break
+                    size += sum(len(str(value)) for value in row)
+                    if size > self.max_bytes:
+                        reason = f"limite de {self.max_bytes // 1024} KB"
+                        break
+                    rows.append(row)
+            cursor.close()
+            return columns, rows, reason
+        except sqlite3.OperationalError as e:
+            if 'interrupted' in str(e):
+                raise QueryRejected(f"tempo limite de {self.timeout:g}s excedido; filtre por ts ou symbol "
+                                    f"(colunas indexadas) ou use as ações compactas") from e
+            raise
+        except sqlite3.DatabaseError as e:
+            if 'not authorized' in str(e):
+                raise QueryRejected("apenas leitura é permitida nesta ação") from e
+            raise
+        finally:
+            conn.set_progress_handler(None, 0)
+
+    def _check_plan(self, conn, sql: str, rewritten: bool = False) -> str:
+        """Retorna a consulta a executar (a original ou a reescrita com o índice de ts)."""
+        plan = [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}").fetchall()]
+        # Sem agregação nem ordenação temporária, a varredura é lida sob demanda e o limite de linhas a encerra
+        blocking = any('TEMP B-TREE' in detail for detail in plan) or bool(_AGGREGATE.search(sql))
+        if not blocking:
+            return sql
+        aliases = {alias.lower(): table for table, alias in _ALIAS.findall(sql)}
+        for detail in plan:
+            match = _SCAN.match(detail)
+            if not match:
+                continue
+            table = aliases.get(match.group(1).lower(), match.group(1))
+            rows = self._estimate_rows(conn, table)
+            if rows <= self.scan_rows:
+                continue
+            index = f"idx_{table.lower()}_ts"
+            if not rewritten and _TS_FILTER.search(sql) and self._has_index(conn, index):
+                return self._check_plan(conn, self._force_index(sql, table, index), rewritten=True)
+            raise QueryRejected(
+                f"varredura completa de '{table}' (~{rows} linhas) antes da primeira linha do resultado. "
+                f"Filtre por ts ou symbol (colunas indexadas) ou use as ações aggregates, top_movers ou deltas")
+        return sql
+
+    @staticmethod
+    def _force_index(sql: str, table: str, index: str) -> str:
+        pattern = re.compile(rf'(\b(?:from|join)\s+"?{re.escape(table)}"?)(\s+(?:as\s+)?(\w+))?', re.IGNORECASE)
+
+        def add_index(match):
+            alias = match.group(2) if match.group(3) and match.group(3).lower() not in _NOT_ALIAS else ''
+            rest = match.group(0)[len(match.group(1)) + len(alias):]
+            return f"{match.group(1)}{alias} INDEXED BY {index}{rest}"
+
+        return pattern.sub(add_index, sql)
+
+    @staticmethod
+    def _has_index(conn, name: str) -> bool:
+        return conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = ?", (name,)).fetchone() is not None
+
+    @staticmethod
+    def _estimate_rows(conn, table: str) -> int:
+        # MAX(rowid) é uma busca no fim da árvore; tabelas WITHOUT ROWID usam as estatísticas do ANALYZE
+        try:
+            return int(conn.execute(f'SELECT MAX(rowid) FROM "{table}"').fetchone()[0] or 0)
+        except sqlite3.Error:
+            pass
+        try:
+            row = conn.execute('SELECT stat FROM sqlite_stat1 WHERE tbl = ? LIMIT 1', (table,)).fetchone()
+            return int(row[0].split()[0]) if row else 0
+        except sqlite3.Error:
+            return 0
+
+    def close(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
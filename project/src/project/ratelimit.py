@@ -0,0 +1,46 @@
+import threading
+import time
+
+
+class TokenBucket:
+    """
+    Rate limiter client-side (token bucket) seguro para uso entre threads.
+
+    `rate` é a reposição em tokens por segundo e `capacity` o tamanho máximo da rajada.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        if rate <= 0 or capacity < 1:
+            raise ValueError("rate deve ser positivo e capacity >= 1")
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: float = 1) -> float:
+        """Bloqueia até haver `tokens` disponíveis. Retorna o tempo de espera em segundos."""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return waited
+                delay = (tokens - self._tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+
+_buckets = {}
+_buckets_lock = threading.Lock()
+
+
+def shared_bucket(name: str, rate: float, capacity: float) -> TokenBucket:
+    """Retorna o bucket do processo para `name` (ex.: host da API), criando-o na primeira chamada."""
+    with _buckets_lock:
+        if name not in _buckets:
+            _buckets[name] = TokenBucket(rate, capacity)
+        return _buckets[name]
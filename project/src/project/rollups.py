@@ -0,0 +1,138 @@
+"""
+Agregados por símbolo e período (hora/dia) mantidos de forma incremental.
+
+Cada snapshot gravado em `moedas`/`sentimento` faz um upsert nos baldes da
+hora e do dia correspondentes, na mesma transação da ingestão. Os painéis
+leem apenas esses baldes, então o custo de leitura não cresce com o
+histórico bruto.
+"""
+import time
+from typing import List
+
+# Período -> tamanho do balde em segundos (baldes alinhados em UTC)
+PERIODS = {'1h': 3600, '1d': 86400}
+
+# Mesclagem de um novo ponto (ou de um balde parcial) no balde existente. As expressões
+# do SET leem os valores anteriores da linha, então a ordem das atribuições não importa.
+_MOEDAS_MERGE = '''
+    ON CONFLICT (period, bucket, symbol) DO UPDATE SET
+        open = CASE WHEN excluded.open_ts < open_ts THEN excluded.open ELSE open END,
+        open_ts = MIN(open_ts, excluded.open_ts),
+        close = CASE WHEN excluded.close_ts >= close_ts THEN excluded.close ELSE close END,
+        close_ts = MAX(close_ts, excluded.close_ts),
+        high = MAX(high, excluded.high),
+        low = MIN(low, excluded.low),
+        volume_sum = volume_sum + excluded.volume_sum,
+        volume_n = volume_n + excluded.volume_n,
+        samples = samples + excluded.samples'''
+
+_SENTIMENTO_MERGE = '''
+    ON CONFLICT (period, bucket, symbol) DO UPDATE SET
+        score_sum = score_sum + excluded.score_sum,
+        score_n = score_n + excluded.score_n,
+        news_sum = news_sum + excluded.news_sum'''
+
+_MOEDAS_COLUMNS = ('(period, symbol, bucket, open, high, low, close, open_ts, close_ts, '
+                   'volume_sum, volume_n, samples)')
+_SENTIMENTO_COLUMNS = '(period, symbol, bucket, score_sum, score_n, news_sum)'
+
+
+def create_tables(conn):
+    conn.execute('''CREATE TABLE IF NOT EXISTS rollup_moedas (
+        period TEXT NOT NULL,
+        symbol TEXT NOT NULL,
+        bucket INTEGER NOT NULL,
+        open REAL,
+        high REAL,
+        low REAL,
+        close REAL,
+        open_ts INTEGER,
+        close_ts INTEGER,
+        volume_sum REAL NOT NULL DEFAULT 0,
+        volume_n INTEGER NOT NULL DEFAULT 0,
+        samples INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (period, bucket, symbol)
+    ) WITHOUT ROWID''')
+    conn.execute('''CREATE TABLE IF NOT EXISTS rollup_sentimento (
+        period TEXT NOT NULL,
+        symbol TEXT NOT NULL,
+        bucket INTEGER NOT NULL,
+        score_sum REAL NOT NULL DEFAULT 0,
+        score_n INTEGER NOT NULL DEFAULT 0,
+        news_sum INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (period, bucket, symbol)
+    ) WITHOUT ROWID''')
+    # A chave primária atende "todas as moedas nas últimas N horas"; o índice atende a série de um símbolo
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_rollup_moedas_symbol ON rollup_moedas (period, symbol, bucket)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_rollup_sentimento_symbol ON rollup_sentimento (period, symbol, bucket)')
+
+
+def backfill(conn):
+    """Popula os agregados a partir do histórico bruto já existente (usado pela migração)."""
+    rollup_moedas_table(conn, 'moedas')
+    for period, size in PERIODS.items():
+        # `WHERE` é obrigatório no INSERT ... SELECT com upsert (ambiguidade do parser do SQLite)
+        conn.execute(f'''
+            INSERT INTO rollup_sentimento {_SENTIMENTO_COLUMNS}
+            SELECT ?, symbol, ts - ts % {size}, COALESCE(score, 0), score IS NOT NULL, COALESCE(news_count, 0)
+            FROM sentimento WHERE ts IS NOT NULL AND symbol IS NOT NULL
+            {_SENTIMENTO_MERGE}''', (period,))
+
+
+def rollup_moedas_table(conn, table: str):
+    """Incorpora aos agregados todas as linhas de `table` (colunas de `moedas`, com `ts` por linha)."""
+    for period, size in PERIODS.items():
+        conn.execute(f'''
+            INSERT INTO rollup_moedas {_MOEDAS_COLUMNS}
+            SELECT ?, symbol, ts - ts % {size}, price, price, price, price, ts, ts,
+                   COALESCE(volume, 0), volume IS NOT NULL, 1
+            FROM {table} WHERE ts IS NOT NULL AND price IS NOT NULL AND symbol IS NOT NULL
+            {_MOEDAS_MERGE}''', (period,))
+
+
+def rollup_moedas(conn, rows: List[tuple], ts: int):
+    """Incorpora um snapshot normalizado (symbol, name, price, volume, change_24h) aos agregados."""
+    values = [(period, symbol, ts - ts % size, price, price, price, price, ts, ts,
+               volume or 0.0, int(volume is not None), 1)
+              for period, size in PERIODS.items()
+              for symbol, _name, price, volume, _change in rows]
+    conn.executemany(f'INSERT INTO rollup_moedas {_MOEDAS_COLUMNS} '
+                     f'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?) {_MOEDAS_MERGE}', values)
+
+
+def rollup_sentimentos(conn, rows: List[tuple], ts: int):
+    """Incorpora um snapshot normalizado (symbol, sentiment, score, news_count) aos agregados."""
+    values = [(period, symbol, ts - ts % size, score or 0.0, int(score is not None), news_count or 0)
+              for period, size in PERIODS.items()
+              for symbol, _sentiment, score, news_count in rows]
+    conn.executemany(f'INSERT INTO rollup_sentimento {_SENTIMENTO_COLUMNS} '
+                     f'VALUES (?, ?, ?, ?, ?, ?) {_SENTIMENTO_MERGE}', values)
+
+
+def price_candles(db, symbol: str, period: str = '1h', limit: int = 48) -> List[tuple]:
+    """Últimos `limit` baldes (bucket, open, high, low, close, volume médio, amostras) de um símbolo, em ordem cronológica."""
+    rows = db.connection().execute('''
+        SELECT bucket, open, high, low, close,
+               CASE WHEN volume_n > 0 THEN volume_sum / volume_n END, samples
+        FROM rollup_moedas INDEXED BY idx_rollup_moedas_symbol
+        WHERE period = ? AND symbol = ?
+        ORDER BY bucket DESC LIMIT ?''', (period, symbol.upper(), limit)).fetchall()
+    return rows[::-1]
+
+
+def sentiment_ranking(db, hours: float = 24, limit: int = 10) -> List[tuple]:
+    """Score médio e total de notícias por símbolo nas últimas `hours` horas (baldes horários)."""
+    since = int(time.time() - hours * 3600)
+    return db.connection().execute('''
+        SELECT symbol, SUM(score_sum) / SUM(score_n) AS avg_score, SUM(news_sum)
+        FROM rollup_sentimento
+        WHERE period = '1h' AND bucket >= ? AND score_n > 0
+        GROUP BY symbol ORDER BY avg_score DESC LIMIT ?''', (since - since % PERIODS['1h'], limit)).fetchall()
+
+
+def rollup_symbols(db, period: str = '1d', limit: int = 250) -> List[str]:
+    """Símbolos com agregados no balde mais recente do período."""
+    return [row[0] for row in db.connection().execute('''
+        SELECT symbol FROM rollup_moedas
+        WHERE period = ? AND bucket = (SELECT MAX(bucket) FROM rollup_moedas WHERE period = ?)
+        ORDER BY volume_sum / MAX(volume_n, 1) DESC LIMIT ?''', (period, period, limit))]
@@ -0,0 +1,87 @@
+import time
+from typing import List, Optional, Tuple
+
+# Diferença mínima entre runs para a comparação "dia anterior" (tolerância de agendamento)
+PREVIOUS_DAY_SECONDS = 20 * 3600
+
+# Runs de histórico (pontos antigos, um ts por moeda): nunca são o snapshot "atual" nem o "anterior" padrão
+HISTORY_KINDS = "'backfill'"
+# Linhas de `moedas` que não vêm de um run de histórico (linhas sem run contam como snapshot)
+NOT_HISTORY = f"NOT EXISTS (SELECT 1 FROM runs r WHERE r.id = moedas.run_id AND r.kind IN ({HISTORY_KINDS}))"
+
+
+def start_run(db, kind: str) -> int:
+    """Registra o início de um run de coleta e retorna o seu id."""
+    with db.transaction() as conn:
+        cursor = conn.execute('INSERT INTO runs (kind, status, started_at) VALUES (?, ?, ?)',
+                              (kind, 'running', int(time.time())))
+        return cursor.lastrowid
+
+
+def finish_run(db, run_id: int, status: str = 'ok'):
+    with db.transaction() as conn:
+        conn.execute('UPDATE runs SET status = ?, finished_at = ? WHERE id = ?',
+                     (status, int(time.time()), run_id))
+
+
+def list_runs(db, limit: int = 10) -> List[tuple]:
+    """Últimos runs com a quantidade de moedas e sentimentos gravados em cada um."""
+    return db.connection().execute('''
+        SELECT r.id, r.kind, r.status, r.started_at,
+               (SELECT COUNT(*) FROM moedas m WHERE m.run_id = r.id),
+               (SELECT COUNT(*) FROM sentimento s WHERE s.run_id = r.id)
+        FROM runs r ORDER BY r.id DESC LIMIT ?''', (limit,)).fetchall()
+
+
+def resolve_diff_runs(db, run_a: Optional[int] = None, run_b: Optional[int] = None,
+                      min_gap: int = PREVIOUS_DAY_SECONDS) -> Tuple[Optional[int], Optional[int]]:
+    """
+    Completa o par de runs a comparar.
+
+    Sem `run_b`, usa o run mais recente com moedas; sem `run_a`, o mais recente
+    iniciado pelo menos `min_gap` segundos antes de `run_b` (ou o imediatamente
+    anterior, se não houver). Runs de backfill só entram se informados.
+    """
+    conn = db.connection()
+    with_moedas = f'kind NOT IN ({HISTORY_KINDS}) AND EXISTS (SELECT 1 FROM moedas m WHERE m.run_id = runs.id)'
+    if run_b is None:
+        row = conn.execute(f'SELECT id FROM runs WHERE {with_moedas} ORDER BY id DESC LIMIT 1').fetchone()
+        if row is None:
+            return None, None
+        run_b = row[0]
+    if run_a is None:
+        started = conn.execute('SELECT started_at FROM runs WHERE id = ?', (run_b,)).fetchone()
+        if started is None:
+            return None, run_b
+        row = conn.execute(f'SELECT id FROM runs WHERE {with_moedas} AND id < ? AND started_at <= ? '
+                           f'ORDER BY id DESC LIMIT 1', (run_b, started[0] - min_gap)).fetchone()
+        if row is None:
+            row = conn.execute(f'SELECT id FROM runs WHERE {with_moedas} AND id < ? ORDER BY id DESC LIMIT 1',
+                               (run_b,)).fetchone()
+        run_a = row[0] if row else None
+    return run_a, run_b
+
+
+def diff_runs(db, run_a: int, run_b: int) -> List[tuple]:
+    """
+    Diferença por símbolo entre dois snapshots (join indexado por run_id, symbol).
+    Com mais de um ponto do símbolo no run (ex.: backfill), vale o de `ts` mais recente.
+
+    Retorna (symbol, price_a, price_b, price_change_pct, volume_a, volume_b,
+    volume_change_pct, score_a, score_b) para os símbolos presentes em `run_b`.
+    """
+    return db.connection().execute('''
+        WITH a AS (SELECT symbol, price, volume, MAX(ts) FROM moedas WHERE run_id = :a GROUP BY symbol),
+             b AS (SELECT symbol, price, volume, MAX(ts) FROM moedas WHERE run_id = :b GROUP BY symbol),
+             sa AS (SELECT symbol, AVG(score) AS score FROM sentimento WHERE run_id = :a GROUP BY symbol),
+             sb AS (SELECT symbol, AVG(score) AS score FROM sentimento WHERE run_id = :b GROUP BY symbol)
+        SELECT b.symbol, a.price, b.price,
+               CASE WHEN a.price > 0 THEN (b.price - a.price) * 100.0 / a.price END,
+               a.volume, b.volume,
+               CASE WHEN a.volume > 0 THEN (b.volume - a.volume) * 100.0 / a.volume END,
+               sa.score, sb.score
+        FROM b
+        LEFT JOIN a ON a.symbol = b.symbol
+        LEFT JOIN sa ON sa.symbol = b.symbol
+        LEFT JOIN sb ON sb.symbol = b.symbol
+        ORDER BY b.symbol''', {'a': run_a, 'b': run_b}).fetchall()
@@ -0,0 +1,248 @@
+"""
+Schema único do banco SQLite e runner de migrações.
+
+A versão aplicada fica em `PRAGMA user_version`. Cada migração roda uma única
+vez, numa transação `BEGIN IMMEDIATE`, de modo que o crew e o dashboard podem
+abrir o mesmo arquivo ao mesmo tempo sem aplicar a mesma migração duas vezes.
+"""
+import threading
+
+from project.src.project import rollups
+
+
+def _columns(conn, table: str) -> set:
+    return {row[1] for row in conn.execute(f'PRAGMA table_info({table})')}
+
+
+def _add_column(conn, table: str, column: str, declaration: str):
+    if column not in _columns(conn, table):
+        conn.execute(f'ALTER TABLE {table} ADD COLUMN {column} {declaration}')
+
+
+def _v1_base_tables(conn):
+    conn.execute('''CREATE TABLE IF NOT EXISTS moedas (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        symbol TEXT,
+        name TEXT,
+        price REAL,
+        volume REAL,
+        change_24h REAL,
+        date TEXT
+    )''')
+    conn.execute('''CREATE TABLE IF NOT EXISTS sentimento (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        symbol TEXT,
+        sentiment TEXT,
+        score REAL,
+        news_count INTEGER,
+        date TEXT
+    )''')
+    conn.execute('''CREATE TABLE IF NOT EXISTS noticias (
+        url_hash TEXT PRIMARY KEY,
+        title_hash TEXT,
+        symbol TEXT,
+        title TEXT,
+        url TEXT,
+        published TEXT,
+        date TEXT
+    )''')
+    # Bancos criados pela versão antiga do dashboard não têm estas colunas
+    _add_column(conn, 'moedas', 'volume', 'REAL')
+    _add_column(conn, 'moedas', 'change_24h', 'REAL')
+    _add_column(conn, 'sentimento', 'news_count', 'INTEGER')
+
+
+def _v2_epoch_timestamps(conn):
+    # `date` (texto, hora local) é mantido para leitura humana; `ts` (epoch UTC) é a coluna indexada
+    for table in ('moedas', 'sentimento', 'noticias'):
+        _add_column(conn, table, 'ts', 'INTEGER')
+        conn.execute(f"UPDATE {table} SET ts = CAST(strftime('%s', date, 'utc') AS INTEGER) "
+                     f"WHERE ts IS NULL AND date IS NOT NULL")
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_moedas_symbol_ts ON moedas (symbol, ts)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_moedas_ts ON moedas (ts)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_sentimento_symbol_ts ON sentimento (symbol, ts)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_sentimento_ts ON sentimento (ts)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_noticias_title_hash ON noticias (title_hash)')
+
+
+def _v3_runs(conn):
+    # Cada coleta (execução do crew, ingestão headless, ...) é um run; as linhas apontam para ele
+    conn.execute('''CREATE TABLE IF NOT EXISTS runs (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        kind TEXT,
+        status TEXT,
+        started_at INTEGER,
+        finished_at INTEGER
+    )''')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_runs_started_at ON runs (started_at)')
+    # Linhas anteriores a esta versão ficam com run_id NULL
+    for table in ('moedas', 'sentimento'):
+        _add_column(conn, table, 'run_id', 'INTEGER REFERENCES runs (id)')
+        conn.execute(f'CREATE INDEX IF NOT EXISTS idx_{table}_run_symbol ON {table} (run_id, symbol)')
+
+
+def _v4_rollups(conn):
+    # Agregados hora/dia mantidos pela ingestão; o histórico existente é consolidado uma vez aqui
+    rollups.create_tables(conn)
+    rollups.backfill(conn)
+
+
+def _v5_metrics(conn):
+    # Spans de telemetria (ferramentas, HTTP, SQL, tarefas, LLM) gravados em lote pelo tracer
+    conn.execute('''CREATE TABLE IF NOT EXISTS metrics (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        run_id INTEGER,
+        kind TEXT NOT NULL,
+        name TEXT,
+        agent TEXT,
+        task TEXT,
+        started_at REAL,
+        duration_ms REAL,
+        bytes INTEGER,
+        items INTEGER,
+        status TEXT,
+        prompt_tokens INTEGER,
+        completion_tokens INTEGER
+    )''')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_metrics_run_kind ON metrics (run_id, kind)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_metrics_started_at ON metrics (started_at)')
+
+
+def _v6_backfill_checkpoints(conn):
+    # Progresso do backfill histórico por moeda e intervalo; blocos 'done' são pulados ao retomar
+    conn.execute('''CREATE TABLE IF NOT EXISTS backfill_chunks (
+        coin_id TEXT NOT NULL,
+        range_start INTEGER NOT NULL,
+        range_end INTEGER NOT NULL,
+        symbol TEXT,
+        status TEXT NOT NULL,
+        rows INTEGER NOT NULL DEFAULT 0,
+        error TEXT,
+        updated_at INTEGER,
+        PRIMARY KEY (coin_id, range_start, range_end)
+    ) WITHOUT ROWID''')
+
+
+def _v7_headline_sentiment(conn):
+    # Score por manchete (cache do motor léxico, por hash do título e versão do léxico)
+    conn.execute('''CREATE TABLE IF NOT EXISTS manchetes (
+        title_hash TEXT PRIMARY KEY,
+        title TEXT,
+        score REAL NOT NULL,
+        hits INTEGER NOT NULL DEFAULT 0,
+        version TEXT NOT NULL,
+        scored_at INTEGER
+    ) WITHOUT ROWID''')
+    # Manchetes que compõem cada sentimento gravado (símbolo + ts identificam a linha de `sentimento`)
+    conn.execute('''CREATE TABLE IF NOT EXISTS sentimento_manchetes (
+        symbol TEXT NOT NULL,
+        ts INTEGER NOT NULL,
+        title_hash TEXT NOT NULL,
+        PRIMARY KEY (symbol, ts, title_hash)
+    ) WITHOUT ROWID''')
+
+
+def _v8_artifacts(conn):
+    # Resultados estruturados das ferramentas, referenciados por handle (ver artifacts.py)
+    conn.execute('''CREATE TABLE IF NOT EXISTS artifacts (
+        handle TEXT PRIMARY KEY,
+        kind TEXT NOT NULL,
+        run_id INTEGER,
+        created_at INTEGER NOT NULL,
+        items INTEGER,
+        bytes INTEGER,
+        payload TEXT NOT NULL
+    ) WITHOUT ROWID''')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_artifacts_created_at ON artifacts (created_at)')
+
+
+def _v9_task_checkpoints(conn):
+    # Saída de cada tarefa concluída do crew e artefatos gravados durante ela (ver checkpoints.py)
+    conn.execute('''CREATE TABLE IF NOT EXISTS task_checkpoints (
+        run_id INTEGER NOT NULL,
+        task TEXT NOT NULL,
+        agent TEXT,
+        status TEXT NOT NULL,
+        output TEXT,
+        artifacts TEXT,
+        finished_at INTEGER,
+        PRIMARY KEY (run_id, task)
+    ) WITHOUT ROWID''')
+    _add_column(conn, 'artifacts', 'task', 'TEXT')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_artifacts_run_task ON artifacts (run_id, task)')
+
+
+def _v10_noticias_por_simbolo(conn):
+    # A mesma notícia costuma sair para vários símbolos (ex.: BTC e ETH): a chave do índice de
+    # vistas passa a incluir o símbolo, senão só o primeiro símbolo do lote a via como nova
+    conn.execute('''CREATE TABLE noticias_v10 (
+        symbol TEXT NOT NULL,
+        url_hash TEXT NOT NULL,
+        title_hash TEXT,
+        title TEXT,
+        url TEXT,
+        published TEXT,
+        date TEXT,
+        ts INTEGER,
+        PRIMARY KEY (symbol, url_hash)
+    )''')
+    conn.execute('''INSERT OR IGNORE INTO noticias_v10 (symbol, url_hash, title_hash, title, url, published, date, ts)
+                    SELECT COALESCE(symbol, ''), url_hash, title_hash, title, url, published, date, ts FROM noticias''')
+    conn.execute('DROP TABLE noticias')
+    conn.execute('ALTER TABLE noticias_v10 RENAME TO noticias')
+    conn.execute('CREATE INDEX idx_noticias_symbol_title_hash ON noticias (symbol, title_hash)')
+
+
+# (versão, descrição, função) em ordem crescente; nunca altere uma migração já publicada
+MIGRATIONS = [
+    (1, 'tabelas base', _v1_base_tables),
+    (2, 'timestamps epoch e índices', _v2_epoch_timestamps),
+    (3, 'runs de coleta', _v3_runs),
+    (4, 'agregados por hora e dia', _v4_rollups),
+    (5, 'métricas de telemetria', _v5_metrics),
+    (6, 'checkpoints do backfill histórico', _v6_backfill_checkpoints),
+    (7, 'sentimento por manchete', _v7_headline_sentiment),
+    (8, 'armazém de artefatos', _v8_artifacts),
+    (9, 'checkpoints por tarefa do crew', _v9_task_checkpoints),
+    (10, 'notícias vistas por símbolo', _v10_noticias_por_simbolo),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+def current_version(conn) -> int:
+    return conn.execute('PRAGMA user_version').fetchone()[0]
+
+
+def migrate(conn) -> list:
+    """Aplica as migrações pendentes e retorna as versões aplicadas."""
+    applied = []
+    for version, description, apply in MIGRATIONS:
+        if current_version(conn) >= version:
+            continue
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            # Outro processo pode ter aplicado enquanto aguardávamos o lock
+            if current_version(conn) < version:
+                apply(conn)
+                conn.execute(f'PRAGMA user_version = {version}')
+                applied.append(version)
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+    return applied
+
+
+_migrated = set()
+_migrated_lock = threading.Lock()
+
+
+def ensure_schema(db) -> list:
+    """Migra o banco do gerenciador de conexões uma vez por processo."""
+    with _migrated_lock:
+        if db.db_path in _migrated:
+            return []
+        applied = migrate(db.connection())
+        _migrated.add(db.db_path)
+        return applied
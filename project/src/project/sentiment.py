@@ -0,0 +1,258 @@
+"""
+Sentimento de manchetes por léxico, sem LLM.
+
+Cada manchete recebe um score em [-1, 1] a partir de um léxico (português e
+inglês) com pesos para termos do mercado cripto, negação e intensificadores.
+O lote inteiro é pontuado de uma vez: os tokens de todas as manchetes viram
+arrays e as somas por manchete saem de um `np.bincount`. Os scores ficam em
+cache pelo hash da manchete (memória e tabela `manchetes`), então a mesma
+manchete nunca é pontuada duas vezes com a mesma versão do léxico.
+"""
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from project.src.project.tools.news_index import text_hash
+
+# Mude ao alterar o léxico ou a fórmula: scores em cache de outra versão são recalculados
+LEXICON_VERSION = '1'
+
+# Pesos de -3 (muito negativo) a +3 (muito positivo); chaves sem acento e em minúsculas
+LEXICON = {
+    # Movimento de preço
+    'sobe': 1.5, 'sobem': 1.5, 'subida': 1.5, 'alta': 1.2, 'altas': 1.2, 'avanca': 1.2, 'avancam': 1.2,
+    'dispara': 2.2, 'disparam': 2.2, 'salta': 1.8, 'saltam': 1.8, 'valoriza': 1.5, 'valorizacao': 1.5,
+    'recupera': 1.3, 'recuperacao': 1.3, 'ganho': 1.3, 'ganhos': 1.3, 'lidera': 0.8, 'recorde': 1.8,
+    'cai': -1.5, 'caem': -1.5, 'queda': -1.5, 'quedas': -1.5, 'recua': -1.2, 'recuam': -1.2, 'baixa': -1.2,
+    'despenca': -2.3, 'despencam': -2.3, 'desaba': -2.3, 'afunda': -2.0, 'desvaloriza': -1.5,
+    'perde': -1.2, 'perdas': -1.3, 'prejuizo': -1.8, 'pressao': -0.9, 'volatilidade': -0.4, 'consolida': 0.2,
+    'rise': 1.5, 'rises': 1.5, 'rising': 1.4, 'gain': 1.3, 'gains': 1.3, 'up': 0.6, 'jump': 1.8, 'jumps': 1.8,
+    'surge': 2.2, 'surges': 2.2, 'soar': 2.3, 'soars': 2.3, 'rally': 2.0, 'rallies': 2.0, 'climb': 1.3,
+    'climbs': 1.3, 'rebound': 1.4, 'rebounds': 1.4, 'recover': 1.3, 'recovers': 1.3, 'record': 1.5,
+    'breakout': 1.8, 'outperform': 1.5, 'outperforms': 1.5, 'moon': 2.0, 'pump': 1.0,
+    'fall': -1.5, 'falls': -1.5, 'drop': -1.5, 'drops': -1.5, 'down': -0.6, 'decline': -1.4, 'declines': -1.4,
+    'slump': -2.0, 'slumps': -2.0, 'plunge': -2.3, 'plunges': -2.3, 'crash': -2.6, 'crashes': -2.6,
+    'tumble': -2.0, 'tumbles': -2.0, 'sink': -1.6, 'sinks': -1.6, 'selloff': -2.0, 'dump': -1.5,
+    'loss': -1.3, 'losses': -1.3, 'bearish': -1.8, 'bullish': 1.8, 'bear': -1.2, 'bull': 1.2,
+    'otimismo': 1.6, 'otimista': 1.6, 'pessimismo': -1.6, 'pessimista': -1.6, 'euforia': 1.5, 'medo': -1.6,
+    'fear': -1.6, 'panic': -2.2, 'panico': -2.2, 'optimism': 1.6, 'greed': 0.6,
+    # Eventos do mercado cripto
+    'aprovacao': 1.6, 'aprova': 1.6, 'aprovado': 1.6, 'approval': 1.6, 'approves': 1.6, 'approved': 1.6,
+    'adocao': 1.5, 'adoption': 1.5, 'parceria': 1.3, 'partnership': 1.3, 'listagem': 1.0, 'listing': 1.0,
+    'lancamento': 0.8, 'launch': 0.8, 'launches': 0.8, 'upgrade': 1.0, 'acumulacao': 1.0, 'accumulation': 1.0,
+    'institucional': 0.6, 'institutional': 0.6, 'inflows': 1.4, 'entradas': 1.0, 'halving': 0.8,
+    'hack': -2.6, 'hacked': -2.6, 'hacker': -2.2, 'hackers': -2.2, 'exploit': -2.4, 'ataque': -2.0, 'attack': -2.0,
+    'roubo': -2.5, 'stolen': -2.5, 'golpe': -2.6, 'scam': -2.6, 'fraude': -2.7, 'fraud': -2.7, 'ponzi': -2.7,
+    'liquidacao': -1.6, 'liquidacoes': -1.6, 'liquidation': -1.6, 'liquidations': -1.6, 'falencia': -2.8,
+    'bankruptcy': -2.8, 'insolvencia': -2.6, 'insolvent': -2.6, 'processo': -1.2, 'processa': -1.4,
+    'lawsuit': -1.6, 'sues': -1.6, 'investigacao': -1.4, 'investigation': -1.4, 'proibe': -2.0, 'proibicao': -2.0,
+    'ban': -2.0, 'bans': -2.0, 'banned': -2.0, 'multa': -1.4, 'fine': -1.2, 'fined': -1.6, 'delisting': -2.0,
+    'outflows': -1.4, 'saidas': -1.0, 'rejeita': -1.6, 'rejects': -1.6, 'rejected': -1.6, 'atraso': -0.8,
+    'delay': -0.8, 'delays': -0.8, 'vulnerabilidade': -1.8, 'vulnerability': -1.8, 'congestionamento': -0.8,
+    'alerta': -0.8, 'warning': -0.8, 'warns': -0.9, 'risco': -0.8, 'risk': -0.8, 'crise': -2.0, 'crisis': -2.0,
+}
+
+# Expressões de duas palavras (têm prioridade sobre as palavras isoladas)
+BIGRAMS = {
+    'maxima historica': 2.4, 'all time': 2.4, 'atinge maxima': 2.0, 'nova maxima': 2.2, 'new high': 2.2,
+    'lidera ganhos': 1.8, 'enfrenta pressao': -1.5, 'rug pull': -2.8, 'mercado urso': -1.8, 'mercado touro': 1.8,
+    'bear market': -1.8, 'bull market': 1.8, 'short squeeze': 1.2, 'sell off': -2.0, 'all-time high': 2.4,
+    'minima anual': -1.8, 'fundo do': -0.5, 'take profit': -0.3, 'realizacao de': -0.6,
+}
+
+NEGATORS = {'nao', 'nem', 'sem', 'nunca', 'not', 'no', 'never', 'without', "isn't", 'fails', 'falha'}
+BOOSTERS = {'forte': 1.3, 'fortes': 1.3, 'muito': 1.3, 'massive': 1.4, 'huge': 1.4, 'big': 1.2, 'sharp': 1.3,
+            'sharply': 1.3, 'major': 1.2, 'maior': 1.2, 'brusca': 1.4, 'historica': 1.2, 'leve': 0.7, 'slight': 0.7,
+            'slightly': 0.7}
+
+# Peso aplicado a termos precedidos (até 2 tokens antes) por uma negação
+NEGATION_FACTOR = -0.74
+# Normalização da soma em [-1, 1]: soma / sqrt(soma² + ALPHA)
+ALPHA = 15.0
+# Média do lote acima/abaixo destes limites define o rótulo do símbolo
+POSITIVE_THRESHOLD = 0.05
+NEGATIVE_THRESHOLD = -0.05
+
+_TOKEN = re.compile(r"[a-z0-9][a-z0-9'\-]*")
+
+
+def normalize(text: str) -> str:
+    """Minúsculas e sem acentos, para casar com as chaves do léxico."""
+    decomposed = unicodedata.normalize('NFKD', (text or '').lower())
+    return ''.join(ch for ch in decomposed if not unicodedata.combining(ch))
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN.findall(normalize(text))
+
+
+def score_titles(titles: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Pontua um lote de manchetes de uma vez. Retorna (scores em [-1, 1], termos do léxico encontrados).
+
+    Uma única passada Python resolve tokens e bigramas em arrays (dono, peso, negação,
+    intensificador); negação, intensificadores e as somas por manchete são vetorizados.
+    """
+    n = len(titles)
+    owner, weight, negator, booster = [], [], [], []
+    for i, title in enumerate(titles):
+        tokens = tokenize(title)
+        skip = False
+        for j, token in enumerate(tokens):
+            if skip:
+                skip = False
+                value = 0.0
+            else:
+                bigram = BIGRAMS.get(f"{token} {tokens[j + 1]}") if j + 1 < len(tokens) else None
+                if bigram is not None:
+                    value, skip = bigram, True
+                else:
+                    value = LEXICON.get(token, 0.0)
+            owner.append(i)
+            weight.append(value)
+            negator.append(token in NEGATORS)
+            booster.append(BOOSTERS.get(token, 1.0))
+    if not owner:
+        return np.zeros(n), np.zeros(n, dtype=int)
+
+    owner = np.array(owner)
+    weight = np.array(weight)
+    negator = np.array(negator)
+    booster = np.array(booster)
+
+    def previous(values: np.ndarray, k: int, fill) -> np.ndarray:
+        # Valor do token k posições antes, apenas se for da mesma manchete
+        shifted = np.concatenate([np.full(k, fill, dtype=values.dtype), values[:-k]])[:len(values)]
+        same = np.concatenate([np.zeros(k, dtype=bool), owner[k:] == owner[:-k]])[:len(values)]
+        return np.where(same, shifted, fill)
+
+    negated = previous(negator, 1, False) | previous(negator, 2, False)
+    weight = weight * previous(booster, 1, 1.0) * np.where(negated, NEGATION_FACTOR, 1.0)
+
+    sums = np.bincount(owner, weights=weight, minlength=n)
+    hits = np.bincount(owner, weights=(weight != 0).astype(float), minlength=n).astype(int)
+    return sums / np.sqrt(sums * sums + ALPHA), hits
+
+
+def label(compound: float) -> str:
+    if compound >= POSITIVE_THRESHOLD:
+        return 'positivo'
+    if compound <= NEGATIVE_THRESHOLD:
+        return 'negativo'
+    return 'neutro'
+
+
+class SentimentEngine:
+    """
+    Pontuação de manchetes com cache por hash (memória e, com `db`, a tabela `manchetes`).
+
+    O score gravado em `sentimento` continua na escala 0–1 do restante do projeto:
+    (média dos scores das manchetes + 1) / 2, com 0.5 neutro.
+    """
+
+    def __init__(self, db=None, memory_entries: int = 10000):
+        self._db = db
+        self.memory_entries = memory_entries
+        self._memory: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0}
+
+    def score(self, titles: List[str]) -> List[float]:
+        """Scores em [-1, 1] das manchetes, na ordem recebida, pontuando só as que não estão em cache."""
+        hashes = [text_hash(title) for title in titles]
+        scores: Dict[str, float] = {}
+        with self._lock:
+            for h in hashes:
+                if h in self._memory:
+                    self._memory.move_to_end(h)
+                    scores[h] = self._memory[h]
+        missing = list(dict.fromkeys(h for h in hashes if h not in scores))
+        if missing and self._db is not None:
+            scores.update(self._load(missing))
+            missing = [h for h in missing if h not in scores]
+
+        if missing:
+            wanted = set(missing)
+            pending = {h: title for h, title in zip(hashes, titles) if h in wanted}
+            computed, hits = score_titles(list(pending.values()))
+            new = {h: (float(value), int(count), pending[h]) for h, value, count in zip(pending, computed, hits)}
+            scores.update({h: value for h, (value, _, _) in new.items()})
+            if self._db is not None:
+                self._store(new)
+
+        with self._lock:
+            self._stats['misses'] += len(missing)
+            self._stats['hits'] += len(hashes) - len(missing)
+            for h in hashes:
+                self._memory[h] = scores[h]
+                self._memory.move_to_end(h)
+            while len(self._memory) > self.memory_entries:
+                self._memory.popitem(last=False)
+        return [scores[h] for h in hashes]
+
+    def _load(self, hashes: List[str]) -> Dict[str, float]:
+        found = {}
+        conn = self._db.connection()
+        # Lotes abaixo do limite de parâmetros do SQLite
+        for start in range(0, len(hashes), 500):
+            chunk = hashes[start:start + 500]
+            found.update(conn.execute(
+                f"SELECT title_hash, score FROM manchetes WHERE version = ? "
+                f"AND title_hash IN ({','.join('?' * len(chunk))})", [LEXICON_VERSION] + chunk).fetchall())
+        return found
+
+    def _store(self, scored: Dict[str, tuple]):
+        now = int(time.time())
+        with self._db.transaction() as conn:
+            conn.executemany('''
+                INSERT INTO manchetes (title_hash, title, score, hits, version, scored_at) VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT (title_hash) DO UPDATE SET
+                    score = excluded.score, hits = excluded.hits, version = excluded.version,
+                    scored_at = excluded.scored_at''',
+                             [(h, title, value, hits, LEXICON_VERSION, now) for h, (value, hits, title) in scored.items()])
+
+    def aggregate(self, symbol: str, titles: Iterable[str]) -> dict:
+        """Linha de sentimento do símbolo (formato de `ingest.normalize_sentimentos`) e as manchetes usadas."""
+        titles = [title for title in titles if title and title.strip()]
+        scores = self.score(titles) if titles else []
+        compound = float(np.mean(scores)) if scores else 0.0
+        return {
+            'symbol': symbol,
+            'sentiment': label(compound),
+            'score': round((compound + 1.0) / 2.0, 4),
+            'news_count': len(titles),
+            'headlines': [text_hash(title) for title in titles],
+        }
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self._stats, memory=len(self._memory))
+
+
+def symbol_headlines(db, symbol: str, limit: int = 10, ts: Optional[int] = None) -> List[tuple]:
+    """Manchetes (título, score) do sentimento mais recente do símbolo (ou do snapshot `ts`)."""
+    conn = db.connection()
+    if ts is None:
+        row = conn.execute('SELECT MAX(ts) FROM sentimento_manchetes WHERE symbol = ?', (symbol.upper(),)).fetchone()
+        ts = row[0] if row else None
+    return conn.execute('''
+        SELECT m.title, m.score FROM sentimento_manchetes sm JOIN manchetes m ON m.title_hash = sm.title_hash
+        WHERE sm.symbol = ? AND sm.ts = ? ORDER BY ABS(m.score) DESC LIMIT ?''',
+                        (symbol.upper(), ts, limit)).fetchall()
+
+
+_engines = {}
+_engines_lock = threading.Lock()
+
+
+def shared_engine(db) -> SentimentEngine:
+    """Motor do processo para o banco (cache em memória compartilhado entre ferramentas)."""
+    with _engines_lock:
+        if db.db_path not in _engines:
+            _engines[db.db_path] = SentimentEngine(db)
+        return _engines[db.db_path]
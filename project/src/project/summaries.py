@@ -0,0 +1,127 @@
+import os
+import time
+from typing import List, Optional, Sequence, Tuple
+
+from project.src.project.runs import NOT_HISTORY, diff_runs
+
+# Orçamento padrão de tokens por resposta de leitura (estimativa de ~4 caracteres por token)
+DEFAULT_MAX_TOKENS = int(os.getenv('SQLITE_TOOL_MAX_TOKENS', 1500))
+CHARS_PER_TOKEN = 4
+DEFAULT_PAGE_SIZE = 25
+MAX_PAGE_SIZE = 200
+
+
+def estimate_tokens(text: str) -> int:
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def _cell(value) -> str:
+    if value is None:
+        return '-'
+    if isinstance(value, float):
+        return f"{value:.6g}"
+    return str(value).replace('|', '/').replace('\n', ' ')
+
+
+def format_compact(title: str, columns: Sequence[str], rows: Sequence[tuple], cursor: int = 0,
+                   has_more: bool = False, max_tokens: Optional[int] = None) -> str:
+    """
+    Formata linhas em tabela colunar (cabeçalho uma vez, valores separados por '|').
+
+    Para de acrescentar linhas ao atingir `max_tokens` e informa o `next_cursor`
+    para o agente pedir a página seguinte apenas se precisar.
+    """
+    budget = (max_tokens or DEFAULT_MAX_TOKENS) * CHARS_PER_TOKEN
+    lines = ['|'.join(columns)]
+    used = len(title) + len(lines[0]) + 64  # reserva para o rodapé de paginação
+    shown = 0
+    for row in rows:
+        line = '|'.join(_cell(value) for value in row)
+        if shown and used + len(line) + 1 > budget:
+            break
+        lines.append(line)
+        used += len(line) + 1
+        shown += 1
+
+    more = has_more or shown < len(rows)
+    footer = f"linhas {cursor + 1}-{cursor + shown}" if shown else "nenhuma linha"
+    if more:
+        footer += f"; next_cursor={cursor + shown}"
+    return f"{title} ({footer})\n" + "\n".join(lines)
+
+
+def _page(limit: Optional[int]) -> int:
+    return max(1, min(int(limit or DEFAULT_PAGE_SIZE), MAX_PAGE_SIZE))
+
+
+def _symbol_filter(symbols: Optional[List[str]], column: str = 'symbol') -> Tuple[str, list]:
+    if not symbols:
+        return '', []
+    return f" AND {column} IN ({','.join('?' * len(symbols))})", [s.upper() for s in symbols]
+
+
+def latest_snapshot_ts(db) -> Optional[int]:
+    # Pontos de backfill têm um ts por moeda e ficariam com um snapshot de uma moeda só
+    row = db.connection().execute(f'SELECT ts FROM moedas WHERE {NOT_HISTORY} ORDER BY ts DESC LIMIT 1').fetchone()
+    return row[0] if row else None
+
+
+def top_movers(db, limit: int = DEFAULT_PAGE_SIZE, cursor: int = 0, direction: str = 'abs',
+               symbols: Optional[List[str]] = None) -> Tuple[List[str], List[tuple], bool]:
+    """
+    Maiores variações de 24h do snapshot mais recente.
+
+    `direction`: 'up' (maiores altas), 'down' (maiores quedas) ou 'abs' (maior |variação|).
+    Retorna (colunas, linhas, has_more).
+    """
+    columns = ['symbol', 'price', 'chg24h%', 'volume']
+    ts = latest_snapshot_ts(db)
+    if ts is None:
+        return columns, [], False
+    order = {'up': 'change_24h DESC', 'down': 'change_24h ASC'}.get(direction, 'ABS(change_24h) DESC')
+    where, params = _symbol_filter(symbols)
+    limit = _page(limit)
+    rows = db.connection().execute(
+        f'SELECT symbol, price, change_24h, volume FROM moedas '
+        f'WHERE ts = ? AND change_24h IS NOT NULL{where} '
+        f'ORDER BY {order}, symbol LIMIT ? OFFSET ?',
+        [ts] + params + [limit + 1, max(0, int(cursor))]).fetchall()
+    return columns, rows[:limit], len(rows) > limit
+
+
+def symbol_aggregates(db, hours: float = 24, limit: int = DEFAULT_PAGE_SIZE, cursor: int = 0,
+                      symbols: Optional[List[str]] = None) -> Tuple[List[str], List[tuple], bool]:
+    """
+    Agregados por símbolo na janela: pontos, preço mín/máx/último, retorno no período,
+    volume médio e sentimento médio. Retorna (colunas, linhas, has_more).
+    """
+    columns = ['symbol', 'pts', 'min', 'max', 'last', 'ret%', 'avg_vol', 'sent']
+    since = int(time.time() - hours * 3600)
+    where, params = _symbol_filter(symbols)
+    limit = _page(limit)
+    rows = db.connection().execute(f'''
+        WITH w AS (
+            SELECT symbol, price, volume,
+                   FIRST_VALUE(price) OVER (PARTITION BY symbol ORDER BY ts, id) AS first_price,
+                   FIRST_VALUE(price) OVER (PARTITION BY symbol ORDER BY ts DESC, id DESC) AS last_price
+            FROM moedas WHERE ts >= ?{where}
+        ),
+        s AS (SELECT symbol, AVG(score) AS score FROM sentimento WHERE ts >= ? GROUP BY symbol)
+        SELECT w.symbol, COUNT(*), MIN(w.price), MAX(w.price), MAX(w.last_price),
+               CASE WHEN MAX(w.first_price) > 0
+                    THEN (MAX(w.last_price) - MAX(w.first_price)) * 100.0 / MAX(w.first_price) END,
+               AVG(w.volume), s.score
+        FROM w LEFT JOIN s ON s.symbol = w.symbol
+        GROUP BY w.symbol ORDER BY w.symbol LIMIT ? OFFSET ?''',
+        [since] + params + [since, limit + 1, max(0, int(cursor))]).fetchall()
+    return columns, rows[:limit], len(rows) > limit
+
+
+def run_deltas(db, run_a: int, run_b: int, limit: int = DEFAULT_PAGE_SIZE,
+               cursor: int = 0) -> Tuple[List[str], List[tuple], bool]:
+    """Variação por símbolo entre dois runs, ordenada pela maior |variação de preço|."""
+    columns = ['symbol', 'price', 'price%', 'vol%', 'sent_a', 'sent_b']
+    rows = sorted(diff_runs(db, run_a, run_b), key=lambda r: (-abs(r[3]) if r[3] is not None else 1, r[0]))
+    cursor, limit = max(0, int(cursor)), _page(limit)
+    page = [(r[0], r[2], r[3], r[6], r[7], r[8]) for r in rows[cursor:cursor + limit]]
+    return columns, page, len(rows) > cursor + limit
@@ -0,0 +1,419 @@
+"""
+Tracing e métricas locais: ferramentas, HTTP, SQL, tarefas e chamadas ao LLM.
+
+Cada operação vira um span (tipo, nome, duração, tamanho do payload, tokens),
+acumulado em memória e gravado em lote na tabela `metrics` do banco. As
+métricas podem ser lidas como texto no formato do Prometheus:
+
+    python3 -m project.src.project.telemetry                # onde foi o tempo do último run
+    python3 -m project.src.project.telemetry --prometheus
+    python3 -m project.src.project.telemetry --serve 9464   # endpoint /metrics em localhost
+
+Desative com TELEMETRY=0.
+"""
+import argparse
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+# Spans acumulados antes de uma gravação automática em lote
+FLUSH_EVERY = int(os.getenv('TELEMETRY_FLUSH_EVERY', 500))
+CHARS_PER_TOKEN = 4
+
+_SPACES = re.compile(r'\s+')
+
+# Colunas de um span, na ordem da tabela `metrics`
+SPAN_FIELDS = ('run_id', 'kind', 'name', 'agent', 'task', 'started_at', 'duration_ms', 'bytes', 'items',
+               'status', 'prompt_tokens', 'completion_tokens')
+
+
+def telemetry_enabled() -> bool:
+    return os.getenv('TELEMETRY', '1').lower() not in ('0', 'false', 'no', 'off')
+
+
+def sql_name(sql: str) -> str:
+    """Nome estável do span de SQL: espaços normalizados e texto truncado."""
+    return _SPACES.sub(' ', sql).strip()[:120]
+
+
+class Tracer:
+    """
+    Coletor de spans do processo.
+
+    O run atual é global ao processo (um run por execução do crew ou da ingestão);
+    o agente e a tarefa correntes são por thread, porque no modo DAG tarefas
+    diferentes rodam em threads diferentes. Com vários crews no mesmo processo
+    (execução em lote), `bind_run` associa as tarefas de cada crew ao seu run e a
+    thread que executa a tarefa usa esse run no lugar do global.
+    """
+
+    def __init__(self):
+        self.enabled = telemetry_enabled()
+        self._run_id: Optional[int] = None
+        self._db_path: Optional[str] = None
+        self._lock = threading.Lock()
+        self._buffer: List[tuple] = []
+        self._flushing = False
+        self._local = threading.local()
+        self._task_runs: Dict[int, int] = {}
+
+    @property
+    def run_id(self) -> Optional[int]:
+        run_id = getattr(self._local, 'run_id', None)
+        return run_id if run_id is not None else self._run_id
+
+    @run_id.setter
+    def run_id(self, value: Optional[int]):
+        self._run_id = value
+
+    def bind_run(self, run_id: Optional[int], tasks=()):
+        """Associa `run_id` à thread atual e às tarefas do crew (pela identidade do objeto Task)."""
+        with self._lock:
+            for task in tasks:
+                self._task_runs[id(task)] = run_id
+        self._local.run_id = run_id
+
+    def task_run(self, task) -> Optional[int]:
+        with self._lock:
+            return self._task_runs.get(id(task))
+
+    def bind(self, db_path: str):
+        """Define o banco onde os spans são gravados."""
+        self._db_path = os.path.abspath(db_path)
+
+    def set_context(self, agent: str = None, task: str = None, run_id: int = None):
+        # Os papéis do agents.yaml vêm com quebra de linha no fim
+        self._local.agent = agent.strip() if agent else agent
+        self._local.task = task
+        self._local.run_id = run_id
+
+    def context(self) -> tuple:
+        return getattr(self._local, 'agent', None), getattr(self._local, 'task', None)
+
+    def record(self, kind: str, name: str, duration_ms: float, started_at: float = None, bytes: int = None,
+               items: int = None, status: str = 'ok', prompt_tokens: int = None, completion_tokens: int = None,
+               agent: str = None, task: str = None):
+        if not self.enabled:
+            return
+        current_agent, current_task = self.context()
+        span = (self.run_id, kind, name, agent or current_agent, task or current_task,
+                started_at if started_at is not None else time.time() - duration_ms / 1000.0,
+                duration_ms, bytes, items, status, prompt_tokens, completion_tokens)
+        with self._lock:
+            self._buffer.append(span)
+            full = len(self._buffer) >= FLUSH_EVERY and not self._flushing
+            if full:
+                self._flushing = True
+        if full:
+            # Em outra thread: quem registra o span pode estar com uma transação de escrita aberta
+            # no mesmo banco, e um flush síncrono esperaria pelo próprio lock até o timeout
+            threading.Thread(target=self._background_flush, name='telemetry-flush', daemon=True).start()
+
+    def _background_flush(self):
+        try:
+            self.flush()
+        finally:
+            self._flushing = False
+
+    @contextmanager
+    def span(self, kind: str, name: str):
+        """
+        Mede o bloco como um span. O dicionário retornado aceita `bytes` e `items`;
+        exceções marcam o span com status 'error' e são propagadas.
+        """
+        if not self.enabled:
+            yield {}
+            return
+        info = {}
+        started_at, started = time.time(), time.perf_counter()
+        status = 'ok'
+        try:
+            yield info
+        except Exception:
+            status = 'error'
+            raise
+        finally:
+            self.record(kind, name, (time.perf_counter() - started) * 1000.0, started_at=started_at,
+                        bytes=info.get('bytes'), items=info.get('items'), status=status)
+
+    def flush(self, db_path: str = None) -> int:
+        """Grava os spans pendentes (conexão própria, sem tracing) e retorna quantos foram gravados."""
+        with self._lock:
+            spans, self._buffer = self._buffer, []
+        if not spans:
+            return 0
+        path = db_path or self._db_path
+        if path is None:
+            from project.src.project.db import DEFAULT_DB_PATH
+            path = DEFAULT_DB_PATH
+        try:
+            conn = sqlite3.connect(path, timeout=30)
+            try:
+                with conn:
+                    conn.executemany(f"INSERT INTO metrics ({', '.join(SPAN_FIELDS)}) "
+                                     f"VALUES ({', '.join('?' * len(SPAN_FIELDS))})", spans)
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            # Sem a tabela (banco ainda não migrado) os spans são descartados; telemetria nunca derruba o pipeline
+            print(f"Telemetria: falha ao gravar {len(spans)} spans: {e}")
+            return 0
+        return len(spans)
+
+
+tracer = Tracer()
+
+
+class TracedCursor(sqlite3.Cursor):
+    """Cursor que registra um span 'sql' por statement (duração e linhas afetadas)."""
+
+    def execute(self, sql, parameters=()):
+        if not tracer.enabled:
+            return super().execute(sql, parameters)
+        started = time.perf_counter()
+        status = 'ok'
+        try:
+            return super().execute(sql, parameters)
+        except sqlite3.Error:
+            status = 'error'
+            raise
+        finally:
+            tracer.record('sql', sql_name(sql), (time.perf_counter() - started) * 1000.0,
+                          items=self.rowcount if self.rowcount >= 0 else None, status=status)
+
+    def executemany(self, sql, seq_of_parameters):
+        if not tracer.enabled:
+            return super().executemany(sql, seq_of_parameters)
+        started = time.perf_counter()
+        status = 'ok'
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        except sqlite3.Error:
+            status = 'error'
+            raise
+        finally:
+            tracer.record('sql', sql_name(sql), (time.perf_counter() - started) * 1000.0,
+                          items=self.rowcount if self.rowcount >= 0 else None, status=status)
+
+
+class TracedConnection(sqlite3.Connection):
+    """Conexão cujos cursores (inclusive os atalhos `execute`/`executemany`) são rastreados."""
+
+    def cursor(self, factory=TracedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+
+class _CrewListener:
+    """Converte eventos do crewai (tarefas, ferramentas, chamadas ao LLM) em spans."""
+
+    def __init__(self):
+        from crewai.utilities.events import (LLMCallCompletedEvent, LLMCallFailedEvent, LLMCallStartedEvent,
+                                             TaskCompletedEvent, TaskFailedEvent, TaskStartedEvent,
+                                             ToolUsageErrorEvent, ToolUsageFinishedEvent, crewai_event_bus)
+        self._local = threading.local()
+        bus = crewai_event_bus
+        bus.on(TaskStartedEvent)(self._task_started)
+        bus.on(TaskCompletedEvent)(lambda source, event: self._task_finished(event, 'ok'))
+        bus.on(TaskFailedEvent)(lambda source, event: self._task_finished(event, 'error'))
+        bus.on(ToolUsageFinishedEvent)(lambda source, event: self._tool(event, 'ok'))
+        bus.on(ToolUsageErrorEvent)(lambda source, event: self._tool(event, 'error'))
+        bus.on(LLMCallStartedEvent)(self._llm_started)
+        bus.on(LLMCallCompletedEvent)(lambda source, event: self._llm_finished(source, event, 'ok'))
+        bus.on(LLMCallFailedEvent)(lambda source, event: self._llm_finished(source, event, 'error'))
+
+    @staticmethod
+    def _usage(agent) -> Dict[str, int]:
+        process = getattr(agent, '_token_process', None)
+        if process is None:
+            return {'prompt': 0, 'completion': 0}
+        summary = process.get_summary()
+        return {'prompt': summary.prompt_tokens, 'completion': summary.completion_tokens}
+
+    def _task_started(self, source, event):
+        task = event.task
+        agent = getattr(task, 'agent', None)
+        tracer.set_context(getattr(agent, 'role', None), getattr(task, 'name', None), tracer.task_run(task))
+        self._local.task_started = (time.time(), time.perf_counter(), self._usage(agent))
+        self._local.estimated = {'prompt': 0, 'completion': 0}
+
+    def _task_finished(self, event, status: str):
+        started = getattr(self._local, 'task_started', None)
+        if started is None:
+            return
+        started_at, started_perf, before = started
+        agent = getattr(event.task, 'agent', None)
+        after = self._usage(agent)
+        prompt, completion = after['prompt'] - before['prompt'], after['completion'] - before['completion']
+        # LLMs sem contagem do provedor (cache, LLMs customizados): usa a estimativa por caracteres
+        if not prompt and not completion:
+            prompt, completion = self._local.estimated['prompt'], self._local.estimated['completion']
+        tracer.record('task', getattr(event.task, 'name', None) or 'task',
+                      (time.perf_counter() - started_perf) * 1000.0, started_at=started_at,
+                      status=status, prompt_tokens=prompt, completion_tokens=completion)
+        tracer.set_context()
+        self._local.task_started = None
+
+    def _tool(self, event, status: str):
+        output = getattr(event, 'output', None)
+        started, finished = getattr(event, 'started_at', None), getattr(event, 'finished_at', None)
+        duration = (finished - started).total_seconds() * 1000.0 if started and finished else 0.0
+        tracer.record('tool', event.tool_name, duration, started_at=started.timestamp() if started else None,
+                      bytes=len(str(output).encode('utf-8')) if output is not None else None,
+                      status='cache' if getattr(event, 'from_cache', False) else status,
+                      agent=(event.agent_role or '').strip() or None)
+
+    def _llm_started(self, source, event):
+        messages = event.messages
+        chars = len(messages) if isinstance(messages, str) else sum(len(str(m.get('content') or '')) for m in messages)
+        self._local.llm_started = (time.time(), time.perf_counter(), chars)
+
+    def _llm_finished(self, source, event, status: str):
+        started = getattr(self._local, 'llm_started', None)
+        if started is None:
+            return
+        started_at, started_perf, chars = started
+        prompt = chars // CHARS_PER_TOKEN
+        completion = len(str(getattr(event, 'response', '') or '')) // CHARS_PER_TOKEN
+        estimated = getattr(self._local, 'estimated', None)
+        if estimated is not None:
+            estimated['prompt'] += prompt
+            estimated['completion'] += completion
+        tracer.record('llm', getattr(source, 'model', None) or 'llm', (time.perf_counter() - started_perf) * 1000.0,
+                      started_at=started_at, status=status, prompt_tokens=prompt, completion_tokens=completion)
+        self._local.llm_started = None
+
+
+_listener = None
+_listener_lock = threading.Lock()
+
+
+def install_crew_listener():
+    """Registra (uma vez por processo) o listener de eventos do crewai."""
+    global _listener
+    if not tracer.enabled:
+        return
+    with _listener_lock:
+        if _listener is None:
+            _listener = _CrewListener()
+
+
+def _label(value) -> str:
+    return str(value if value is not None else '').replace('\\', '\\\\').replace('"', '\\"').replace('\n', ' ')
+
+
+def prometheus_text(db, run_id: int = None) -> str:
+    """Métricas agregadas da tabela `metrics` no formato de exposição de texto do Prometheus."""
+    where, params = ('WHERE run_id = ?', (run_id,)) if run_id is not None else ('', ())
+    conn = db.connection()
+    spans = conn.execute(f'''
+        SELECT kind, name, status, COUNT(*), SUM(duration_ms) / 1000.0, SUM(COALESCE(bytes, 0))
+        FROM metrics {where} GROUP BY kind, name, status ORDER BY kind, name''', params).fetchall()
+    tokens = conn.execute(f'''
+        SELECT agent, name, SUM(COALESCE(prompt_tokens, 0)), SUM(COALESCE(completion_tokens, 0))
+        FROM metrics WHERE kind = 'task' {'AND run_id = ?' if run_id is not None else ''}
+        GROUP BY agent, name ORDER BY agent, name''', params).fetchall()
+
+    lines = ['# HELP crypto_trend_span_total Spans registrados por tipo, nome e status.',
+             '# TYPE crypto_trend_span_total counter']
+    lines += [f'crypto_trend_span_total{{kind="{_label(k)}",name="{_label(n)}",status="{_label(s)}"}} {c}'
+              for k, n, s, c, _, _ in spans]
+    lines += ['# HELP crypto_trend_span_seconds_total Tempo total dos spans em segundos.',
+              '# TYPE crypto_trend_span_seconds_total counter']
+    lines += [f'crypto_trend_span_seconds_total{{kind="{_label(k)}",name="{_label(n)}",status="{_label(s)}"}} {d:.6f}'
+              for k, n, s, _, d, _ in spans]
+    lines += ['# HELP crypto_trend_span_bytes_total Tamanho total dos payloads em bytes.',
+              '# TYPE crypto_trend_span_bytes_total counter']
+    lines += [f'crypto_trend_span_bytes_total{{kind="{_label(k)}",name="{_label(n)}",status="{_label(s)}"}} {b}'
+              for k, n, s, _, _, b in spans if b]
+    lines += ['# HELP crypto_trend_llm_tokens_total Tokens do LLM por agente e tarefa.',
+              '# TYPE crypto_trend_llm_tokens_total counter']
+    for agent, task, prompt, completion in tokens:
+        labels = f'agent="{_label(agent)}",task="{_label(task)}"'
+        lines.append(f'crypto_trend_llm_tokens_total{{{labels},type="prompt"}} {prompt}')
+        lines.append(f'crypto_trend_llm_tokens_total{{{labels},type="completion"}} {completion}')
+    return '\n'.join(lines) + '\n'
+
+
+def run_summary(db, run_id: int = None, limit: int = 15) -> str:
+    """Onde foi o tempo de um run (padrão: o último com métricas), por tipo e pelos spans mais caros."""
+    conn = db.connection()
+    if run_id is None:
+        row = conn.execute('SELECT MAX(run_id) FROM metrics').fetchone()
+        run_id = row[0] if row else None
+    if run_id is None:
+        return "Nenhuma métrica registrada."
+    kinds = conn.execute('''SELECT kind, COUNT(*), SUM(duration_ms), SUM(COALESCE(bytes, 0)),
+                                   SUM(COALESCE(prompt_tokens, 0)), SUM(COALESCE(completion_tokens, 0))
+                            FROM metrics WHERE run_id = ? GROUP BY kind ORDER BY 3 DESC''', (run_id,)).fetchall()
+    top = conn.execute('''SELECT kind, name, COUNT(*), SUM(duration_ms), MAX(duration_ms)
+                          FROM metrics WHERE run_id = ? GROUP BY kind, name ORDER BY 4 DESC LIMIT ?''',
+                       (run_id, limit)).fetchall()
+    lines = [f"Run {run_id}", "kind|spans|total_ms|bytes|prompt_tok|completion_tok"]
+    lines += [f"{k}|{c}|{d:.1f}|{b}|{p}|{o}" for k, c, d, b, p, o in kinds]
+    lines += ["", "kind|name|spans|total_ms|max_ms"]
+    lines += [f"{k}|{n}|{c}|{d:.1f}|{m:.1f}" for k, n, c, d, m in top]
+    return "\n".join(lines)
+
+
+def serve(db, port: int):
+    """Endpoint /metrics em localhost para o Prometheus."""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?')[0] != '/metrics':
+                self.send_error(404)
+                return
+            body = prometheus_text(db).encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', port), Handler)
+    print(f"Métricas em http://127.0.0.1:{port}/metrics")
+    server.serve_forever()
+
+
+def main(argv=None) -> int:
+    from project.src.project.db import get_manager
+    from project.src.project.schema import ensure_schema
+
+    parser = argparse.ArgumentParser(description="Métricas de tracing do Crypto Trend Crew.")
+    parser.add_argument('--db', default=None, help="Caminho do banco SQLite.")
+    parser.add_argument('--run', type=int, default=None, help="Restringir a um run.")
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument('--prometheus', action='store_true', help="Imprimir no formato de texto do Prometheus.")
+    group.add_argument('--serve', type=int, metavar='PORTA', help="Servir /metrics em 127.0.0.1:PORTA.")
+    args = parser.parse_args(argv)
+
+    # As consultas de leitura das métricas não devem gerar novas métricas
+    tracer.enabled = False
+    db = get_manager(args.db)
+    ensure_schema(db)
+    if args.serve:
+        serve(db, args.serve)
+    elif args.prometheus:
+        sys.stdout.write(prometheus_text(db, args.run))
+    else:
+        print(run_summary(db, args.run))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,7 +1,25 @@
-import requests
+import math
+import os
+from concurrent.futures import ThreadPoolExecutor
 from crewai.tools import BaseTool
-from typing import Type
+from typing import List, Type
 from pydantic import BaseModel, Field
+from project.src.project.artifacts import shared_store
+from project.src.project.cache import shared_cache
+from project.src.project.db import get_manager
+from project.src.project.http_client import shared_client
+from project.src.project.ratelimit import shared_bucket
+from project.src.project.telemetry import tracer
+
+COINGECKO_MARKETS_URL = "https://api.coingecko.com/api/v3/coins/markets"
+COINGECKO_RANGE_URL = "https://api.coingecko.com/api/v3/coins/{coin_id}/market_chart/range"
+MAX_PER_PAGE = 250
+
+# Campos de cada moeda guardados no artefato (o suficiente para save_moedas e análises)
+ARTIFACT_FIELDS = ('id', 'symbol', 'name', 'current_price', 'total_volume', 'price_change_percentage_24h',
+                   'market_cap', 'market_cap_rank')
+# Moedas listadas na resposta ao LLM; a lista completa fica no artefato
+PREVIEW_ROWS = int(os.getenv('COINGECKO_PREVIEW_ROWS', 10))
 
 
 class RetornaCoinGeckoToolInput(BaseModel):
@@ -9,26 +27,103 @@ class RetornaCoinGeckoToolInput(BaseModel):
     Argumentos de entrada para a ferramenta CoinGecko
     """
     coin: str = Field(description="Selecionar a coin na Coingecko")
+    top_n: int = Field(default=50, description="Quantidade de moedas do universo analisado (ex.: 50, 250, 1000).")
 
 
 class CoinGeckoTool(BaseTool):
     name: str = "CoinGecko Tool"
-    description: str = "Busca as 50 criptomoedas mais relevantes nas últimas 24h usando a API da CoinGecko."
+    description: str = "Busca as criptomoedas mais relevantes nas últimas 24h (padrão: top 50 por volume) usando a API da CoinGecko. Retorna uma prévia e um handle de artefato (art:moedas:...) com a lista completa, que deve ser passado como data para a SQLite Tool."
     args_schema: Type[BaseTool] = RetornaCoinGeckoToolInput
 
-    def _run(self, coin: str = None) -> str:
+    def __init__(self, cache=None, max_workers: int = None, db_path: str = None, client=None, memo=None):
+        super().__init__()
+        # Resultado completo vai para o armazém de artefatos; o LLM recebe só o handle
+        self._artifacts = shared_store(get_manager(db_path))
+        # Cache compartilhado entre agentes (memória) e entre execuções (disco)
+        self._cache = cache or shared_cache(
+            'coingecko',
+            ttl=float(os.getenv('COINGECKO_CACHE_TTL', 300)),
+            stale_ttl=float(os.getenv('COINGECKO_CACHE_STALE_TTL', 1800)),
+            max_entries=int(os.getenv('COINGECKO_CACHE_MAX_ENTRIES', 512)),
+        )
+        # Limite da API pública: ~30 chamadas/min, com pequena rajada para páginas em paralelo
+        self._bucket = shared_bucket(
+            'api.coingecko.com',
+            rate=float(os.getenv('COINGECKO_RATE_PER_MIN', 30)) / 60.0,
+            capacity=float(os.getenv('COINGECKO_RATE_BURST', 5)),
+        )
+        self._max_workers = max_workers or int(os.getenv('COINGECKO_MAX_WORKERS', 5))
+        # Sessão keep-alive, timeouts, novas tentativas (429/5xx) e circuit breaker do host
+        self._client = client or shared_client('api.coingecko.com', pool_maxsize=self._max_workers)
+        # FetchMemo de um lote de crews: a mesma página é buscada uma vez mesmo com pedidos simultâneos
+        self._memo = memo
+
+    def _run(self, coin: str = None, top_n: int = 50) -> str:
         try:
-            url = "https://api.coingecko.com/api/v3/coins/markets"
+            data = self.fetch_markets(top_n)
+            handle = self._artifacts.put('moedas', [{key: coin.get(key) for key in ARTIFACT_FIELDS} for coin in data],
+                                         run_id=tracer.run_id)
+            moedas = [f"{coin['symbol'].upper()} - {coin['name']} (${coin['current_price']})" for coin in data[:PREVIEW_ROWS]]
+            omitted = f"\n(+{len(data) - len(moedas)} moedas no artefato)" if len(data) > len(moedas) else ''
+            return (f"Top {len(data)} moedas nas últimas 24h:\n" + "\n".join(moedas) + omitted +
+                    f"\nArtefato: {handle} (passe este handle como data em save_moedas)")
+        except Exception as e:
+            return f"Erro ao consultar CoinGecko: {e}"
+
+    def fetch_markets(self, top_n: int = 50) -> List[dict]:
+        """Busca as `top_n` moedas por volume, baixando as páginas em paralelo e mesclando o resultado."""
+        top_n = max(1, int(top_n))
+        per_page = min(top_n, MAX_PER_PAGE)
+        pages = math.ceil(top_n / per_page)
+
+        def fetch_page(page: int) -> list:
             params = {
                 'vs_currency': 'usd',
                 'order': 'volume_desc',
-                'per_page': 50,
-                'page': 1,
+                'per_page': per_page,
+                'page': page,
                 'sparkline': 'false'
             }
-            response = requests.get(url, params=params)
-            data = response.json()
-            moedas = [f"{coin['symbol'].upper()} - {coin['name']} (${coin['current_price']})" for coin in data]
-            return "Top 50 moedas nas últimas 24h:\n" + "\n".join(moedas)
-        except Exception as e:
-            return f"Erro ao consultar CoinGecko: {e}"
+            return self._get(COINGECKO_MARKETS_URL, params)
+
+        if pages == 1:
+            results = [fetch_page(1)]
+        else:
+            with ThreadPoolExecutor(max_workers=min(pages, self._max_workers)) as executor:
+                results = list(executor.map(fetch_page, range(1, pages + 1)))
+
+        # Mesclar na ordem das páginas, removendo duplicatas entre páginas vizinhas
+        merged, seen = [], set()
+        for page in results:
+            for coin in page:
+                if coin['id'] not in seen:
+                    seen.add(coin['id'])
+                    merged.append(coin)
+        return merged[:top_n]
+
+    def _get(self, url: str, params: dict):
+        def fetch():
+            response = self._client.get(url, params, name='api.coingecko.com/coins/markets', bucket=self._bucket)
+            # Não cachear respostas de erro (ex.: 429 da CoinGecko após esgotar as tentativas)
+            response.raise_for_status()
+            return response.json()
+
+        if self._memo is not None:
+            return self._memo.get_or_fetch(url, params, lambda: self._cache.get_or_fetch(url, params, fetch))
+        return self._cache.get_or_fetch(url, params, fetch)
+
+    def fetch_market_chart_range(self, coin_id: str, start: int, end: int) -> dict:
+        """
+        Série histórica (prices, total_volumes em [ms, valor]) de uma moeda entre dois epochs.
+
+        Sem cache: intervalos históricos são grandes e consultados uma única vez pelo backfill.
+        """
+        response = self._client.get(COINGECKO_RANGE_URL.format(coin_id=coin_id),
+                                    {'vs_currency': 'usd', 'from': int(start), 'to': int(end)},
+                                    name='api.coingecko.com/coins/market_chart/range', bucket=self._bucket,
+                                    timeout=(self._client.timeout[0], max(self._client.timeout[1], 60)))
+        response.raise_for_status()
+        return response.json()
+
+    def cache_stats(self) -> dict:
+        return self._cache.stats()
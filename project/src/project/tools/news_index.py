@@ -0,0 +1,65 @@
+import hashlib
+import threading
+from typing import List
+from project.src.project.db import get_manager
+from project.src.project.ingest import snapshot_time
+from project.src.project.schema import ensure_schema
+
+
+def text_hash(value: str) -> str:
+    """Hash do texto normalizado (minúsculas, espaços colapsados); chave de URLs e manchetes."""
+    return hashlib.sha1(' '.join((value or '').lower().split()).encode('utf-8')).hexdigest()
+
+
+class SeenIndex:
+    """
+    Índice persistente (hash de URL e de título) das notícias já processadas.
+
+    Uma notícia é considerada vista para o símbolo se a URL ou o título normalizado
+    já foram registrados para ele, o que cobre a mesma manchete republicada com outro
+    link. A mesma notícia continua nova para os demais símbolos.
+    """
+
+    def __init__(self, db_path: str = None):
+        self._db = get_manager(db_path)
+        self._lock = threading.Lock()
+        ensure_schema(self._db)
+
+    def filter_new(self, symbol: str, items: List[dict]) -> List[dict]:
+        """Retorna apenas os itens ainda não vistos e os registra no índice."""
+        if not items:
+            return []
+        for item in items:
+            item['url_hash'] = text_hash(item.get('url') or item.get('title'))
+            item['title_hash'] = text_hash(item.get('title'))
+        url_hashes = [item['url_hash'] for item in items]
+        title_hashes = [item['title_hash'] for item in items]
+
+        with self._lock, self._db.transaction() as conn:
+            placeholders = ','.join('?' * len(items))
+            seen = set()
+            for url_hash, title_hash in conn.execute(
+                    # Uma busca por chave: (symbol, url_hash) e (symbol, title_hash) são indexados
+                    f'SELECT url_hash, title_hash FROM noticias WHERE symbol = ? AND url_hash IN ({placeholders}) '
+                    f'UNION ALL '
+                    f'SELECT url_hash, title_hash FROM noticias WHERE symbol = ? AND title_hash IN ({placeholders})',
+                    [symbol] + url_hashes + [symbol] + title_hashes):
+                seen.add(url_hash)
+                seen.add(title_hash)
+
+            new_items = []
+            for item in items:
+                if item['url_hash'] in seen or item['title_hash'] in seen:
+                    continue
+                # Evitar duplicatas dentro do próprio lote
+                seen.add(item['url_hash'])
+                seen.add(item['title_hash'])
+                new_items.append(item)
+
+            ts, date = snapshot_time()
+            conn.executemany(
+                'INSERT OR IGNORE INTO noticias (url_hash, title_hash, symbol, title, url, published, ts, date) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                [(i['url_hash'], i['title_hash'], symbol, i.get('title'), i.get('url'), i.get('published'), ts, date)
+                 for i in new_items])
+        return new_items
@@ -1,62 +1,243 @@
-import requests
+import copy
+import os
 import urllib.parse
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor
 from crewai.tools import BaseTool
 from bs4 import BeautifulSoup
-from typing import Type
+from typing import Dict, List, Optional, Type
 from pydantic import BaseModel, Field
+from project.src.project.artifacts import shared_store
+from project.src.project.db import get_manager
+from project.src.project.http_client import HttpClient
+from project.src.project.sentiment import shared_engine
+from project.src.project.telemetry import tracer
+from project.src.project.tools.news_index import SeenIndex
+
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+}
 
 
 class NewsToolInput(BaseModel):
     """
     Argumentos de entrada para a ferramenta CoinGecko
     """
-    query: str = Field(description="Query para buscar notícias sobre criptomoedas. Exemplo: 'Bitcoin', 'Ethereum', etc.")
+    query: Optional[str] = Field(default=None, description="Query para buscar notícias sobre criptomoedas. Exemplo: 'Bitcoin', 'Ethereum', etc.")
+    symbols: Optional[List[str]] = Field(default=None, description="Lista de símbolos para buscar notícias em lote numa única chamada. Exemplo: ['BTC', 'ETH', 'SOL'].")
+    only_new: bool = Field(default=True, description="Retornar apenas notícias ainda não vistas em execuções anteriores.")
+
+
+def _local_name(tag: str) -> str:
+    return tag.rsplit('}', 1)[-1]
+
+
+def _parse_entry(elem) -> dict:
+    """Extrai título, link e data de um <item> RSS ou <entry> Atom."""
+    entry = {}
+    for child in elem:
+        name = _local_name(child.tag)
+        if name == 'title':
+            entry['title'] = (child.text or '').strip()
+        elif name == 'link':
+            entry['url'] = (child.get('href') or child.text or '').strip()
+        elif name in ('pubDate', 'published', 'updated') and 'published' not in entry:
+            entry['published'] = (child.text or '').strip()
+    return entry
+
+
+def parse_feed(chunks, max_items: int) -> List[dict]:
+    """
+    Faz o parse incremental (streaming) de um feed RSS/Atom.
+
+    Cada item é liberado da árvore após lido e a leitura termina assim que
+    `max_items` itens foram obtidos, sem baixar o restante do feed.
+    """
+    parser = ET.XMLPullParser(events=('end',))
+    items = []
+    for chunk in chunks:
+        parser.feed(chunk)
+        for _, elem in parser.read_events():
+            if _local_name(elem.tag) in ('item', 'entry'):
+                entry = _parse_entry(elem)
+                elem.clear()
+                if entry.get('title'):
+                    items.append(entry)
+                if len(items) >= max_items:
+                    return items
+    return items
 
 
 class NewsTool(BaseTool):
     name: str = "News Tool"
-    description: str = "Busca notícias relevantes sobre criptomoedas usando Google News (gratuito, sem API token)."
+    description: str = "Busca notícias relevantes sobre criptomoedas usando Google News (gratuito, sem API token). Aceita uma query ou uma lista de símbolos (em lote). Retorna também um handle de artefato (art:noticias:...) para a SQLite Tool."
     args_schema: Type[BaseTool] = NewsToolInput
 
-    def _run(self, query: str) -> str:
-        try:
-            # Buscar notícias no Google News
-            search_query = f"{query} cryptocurrency news"
-            encoded_query = urllib.parse.quote(search_query)
-            url = f"https://news.google.com/search?q={encoded_query}&hl=pt-BR&gl=BR&ceid=BR:pt-419"
-
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-            }
-
-            response = requests.get(url, headers=headers)
-            soup = BeautifulSoup(response.content, 'html.parser')
-
-            # Extrair notícias (estrutura pode variar, então vamos ser genéricos)
-            articles = []
-            article_elements = soup.find_all('article')[:5]  # Limitar a 5 notícias
-
-            if not article_elements:
-                # Fallback: procurar por links de notícias
-                links = soup.find_all('a', href=True)
-                news_links = [link for link in links if 'news' in link.get('href', '')][:5]
-
-                for link in news_links:
-                    title = link.get_text(strip=True)
-                    if title and len(title) > 10:  # Filtrar títulos muito curtos
-                        articles.append(f"- {title}")
-            else:
-                for article in article_elements:
-                    title_elem = article.find('h3') or article.find('h2') or article.find('a')
-                    if title_elem:
-                        title = title_elem.get_text(strip=True)
-                        if title and len(title) > 10:
-                            articles.append(f"- {title}")
-
-            if articles:
-                return f"Notícias recentes sobre {query}:\n" + "\n".join(articles)
-            else:
-                return f"Nenhuma notícia encontrada para {query}. Tente buscar por termos mais específicos."
+    def __init__(self, max_workers: int = None, timeout: tuple = None, db_path: str = None, memo=None):
+        super().__init__()
+        self._source = os.getenv('NEWS_SOURCE', 'rss')
+        self._max_items = int(os.getenv('NEWS_MAX_ITEMS', 10))
+        self._seen = SeenIndex(db_path)
+        self._sentiment = shared_engine(get_manager(db_path))
+        self._artifacts = shared_store(get_manager(db_path))
+        self._max_workers = max_workers or int(os.getenv('NEWS_MAX_WORKERS', 8))
+        self._timeout = timeout or (float(os.getenv('NEWS_CONNECT_TIMEOUT', 5)), float(os.getenv('NEWS_READ_TIMEOUT', 15)))
+        # Sessão keep-alive com pool dimensionado para o paralelismo máximo, novas tentativas e circuit breaker
+        self._client = HttpClient(timeout=self._timeout, pool_maxsize=self._max_workers, headers=HEADERS)
+        # FetchMemo de um lote de crews: cada busca (já filtrada pelo índice de vistas) é feita uma vez
+        # e entregue a todos os crews, em vez de o primeiro marcar as notícias e os demais não verem nada
+        self._memo = memo
 
+    def _run(self, query: str = None, symbols: List[str] = None, only_new: bool = True) -> str:
+        if symbols:
+            return self._run_batch(symbols, only_new)
+        if not query:
+            return "Informe uma query ou uma lista de símbolos."
+        return self._run_single(query, only_new)
+
+    def _run_single(self, query: str, only_new: bool = True) -> str:
+        try:
+            results = {query: self.collect(query, only_new)}
+            self.score(results)
+            return self._format(query, results[query]) + self._handle(results)
         except Exception as e:
             return f"Erro ao buscar notícias: {e}"
+
+    def _run_batch(self, symbols: List[str], only_new: bool = True) -> str:
+        results = self.collect_batch(symbols, only_new)
+        return "\n\n".join(self._format(symbol, result) for symbol, result in results.items()) + self._handle(results)
+
+    def _handle(self, results: Dict[str, dict]) -> str:
+        """Grava os resultados (manchetes e sentimento por símbolo) como artefato e devolve a linha com o handle."""
+        try:
+            handle = self._artifacts.put('noticias', results, run_id=tracer.run_id)
+        except Exception as e:
+            print(f"Erro ao gravar artefato de notícias: {e}")
+            return ''
+        return f"\nArtefato: {handle} (passe este handle como data em save_sentimento)"
+
+    def collect(self, query: str, only_new: bool = True) -> dict:
+        """
+        Busca as notícias de `query`. Retorna {'items': [...], 'total': n, 'titles': [...]}, com apenas
+        as novas em `items` se `only_new`; `titles` tem todas as manchetes encontradas.
+        """
+        if self._memo is not None:
+            # Cópia: `score` anota os itens e cada crew pontua o seu resultado
+            return copy.deepcopy(self._memo.get_or_fetch('news', {'query': query.strip().lower(), 'only_new': only_new},
+                                                         lambda: self._collect(query, only_new)))
+        return self._collect(query, only_new)
+
+    def _collect(self, query: str, only_new: bool) -> dict:
+        if self._source == 'rss':
+            try:
+                items = self._fetch_feed(query)
+            except Exception as e:
+                print(f"Feed indisponível para {query}, usando HTML: {e}")
+                items = [{'title': title} for title in self._fetch_headlines(query)]
+        else:
+            items = [{'title': title} for title in self._fetch_headlines(query)]
+
+        titles = [item['title'] for item in items]
+        if only_new:
+            items = self._seen.filter_new(query, items)
+        return {'items': items, 'total': len(titles), 'titles': titles}
+
+    def collect_batch(self, symbols: List[str], only_new: bool = True) -> Dict[str, dict]:
+        """Busca as notícias de vários símbolos em paralelo; falhas ficam em 'error' no resultado do símbolo."""
+        # Remover duplicatas mantendo a ordem informada
+        symbols = list(dict.fromkeys(s.strip() for s in symbols if s and s.strip()))
+
+        def collect_one(symbol: str) -> dict:
+            try:
+                return self.collect(symbol, only_new)
+            except Exception as e:
+                return {'items': [], 'total': 0, 'error': str(e)}
+
+        with ThreadPoolExecutor(max_workers=min(len(symbols), self._max_workers) or 1) as executor:
+            results = dict(zip(symbols, executor.map(collect_one, symbols)))
+        self.score(results)
+        return results
+
+    def score(self, results: Dict[str, dict]):
+        """
+        Pontua as manchetes de todos os símbolos numa única passada do motor léxico:
+        cada item recebe `score` e cada resultado o `sentiment` agregado do símbolo.
+        """
+        titles = [title for result in results.values() for title in result.get('titles', ())]
+        scores = dict(zip(titles, self._sentiment.score(titles))) if titles else {}
+        for symbol, result in results.items():
+            if result.get('error'):
+                continue
+            for item in result['items']:
+                item['score'] = scores.get(item['title'])
+            result['sentiment'] = self._sentiment.aggregate(symbol, result['titles'])
+
+    def _format(self, query: str, result: dict) -> str:
+        items, total = result['items'], result['total']
+        if result.get('error'):
+            return f"Erro ao buscar notícias sobre {query}: {result['error']}"
+        sentiment = result.get('sentiment')
+        footer = f"\nSentimento léxico: {sentiment['sentiment']} (score {sentiment['score']:.2f})" if sentiment else ''
+        if items:
+            header = f"Notícias recentes sobre {query}:"
+            if total > len(items):
+                header += f"\n({total - len(items)} já vistas omitidas)"
+            return header + "\n" + "\n".join(
+                f"- {item['title']}" + (f" [{item['score']:+.2f}]" if item.get('score') is not None else '')
+                for item in items) + footer
+        elif total:
+            return f"Nenhuma notícia nova sobre {query} ({total} já vistas)." + footer
+        else:
+            return f"Nenhuma notícia encontrada para {query}. Tente buscar por termos mais específicos."
+
+    def _fetch_feed(self, query: str) -> List[dict]:
+        # Feed RSS do Google News: bem menor que a página HTML e com estrutura estável
+        search_query = f"{query} cryptocurrency news"
+        encoded_query = urllib.parse.quote(search_query)
+        url = f"https://news.google.com/rss/search?q={encoded_query}&hl=pt-BR&gl=BR&ceid=BR:pt-419"
+
+        response = self._client.get(url, name='news.google.com/rss/search', stream=True)
+        # O span 'http' do cliente vai até os cabeçalhos; o download e o parse do corpo ficam neste
+        with response, tracer.span('http_body', 'news.google.com/rss/search') as span:
+            response.raise_for_status()
+            span['bytes'] = 0
+
+            def chunks():
+                for chunk in response.iter_content(chunk_size=16384):
+                    span['bytes'] += len(chunk)
+                    yield chunk
+
+            items = parse_feed(chunks(), self._max_items)
+            span['items'] = len(items)
+            return items
+
+    def _fetch_headlines(self, query: str) -> List[str]:
+        # Buscar notícias no Google News
+        search_query = f"{query} cryptocurrency news"
+        encoded_query = urllib.parse.quote(search_query)
+        url = f"https://news.google.com/search?q={encoded_query}&hl=pt-BR&gl=BR&ceid=BR:pt-419"
+
+        response = self._client.get(url, name='news.google.com/search')
+        soup = BeautifulSoup(response.content, 'html.parser')
+
+        # Extrair notícias (estrutura pode variar, então vamos ser genéricos)
+        articles = []
+        article_elements = soup.find_all('article')[:5]  # Limitar a 5 notícias
+
+        if not article_elements:
+            # Fallback: procurar por links de notícias
+            links = soup.find_all('a', href=True)
+            news_links = [link for link in links if 'news' in link.get('href', '')][:5]
+
+            for link in news_links:
+                title = link.get_text(strip=True)
+                if title and len(title) > 10:  # Filtrar títulos muito curtos
+                    articles.append(title)
+        else:
+            for article in article_elements:
+                title_elem = article.find('h3') or article.find('h2') or article.find('a')
+                if title_elem:
+                    title = title_elem.get_text(strip=True)
+                    if title and len(title) > 10:
+                        articles.append(title)
+        return articles
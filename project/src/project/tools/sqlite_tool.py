@@ -1,56 +1,58 @@
-import sqlite3
-import os
 import json
 import ast
+import re
 from crewai.tools import BaseTool
 from datetime import datetime
 from typing import Type
 from pydantic import BaseModel, Field
+from project.src.project.artifacts import find_handle, shared_store
+from project.src.project.checkpoints import load_tasks, resumable_run, save_task
+from project.src.project.db import DEFAULT_DB_PATH, get_manager
+from project.src.project.schema import ensure_schema
+from project.src.project.ingest import IngestResult, bulk_insert_moedas, bulk_insert_sentimentos, parse_moedas_text
+from project.src.project.query_guard import QueryRejected, ReadOnlyQueryEngine
+from project.src.project.runs import diff_runs, finish_run, list_runs, resolve_diff_runs, start_run
+from project.src.project.sentiment import shared_engine
+from project.src.project.telemetry import tracer
+from project.src.project.summaries import format_compact, run_deltas, symbol_aggregates, top_movers
+
+# Score por manchete acrescentado pela News Tool ("- título [+0.42]")
+_HEADLINE_SCORE = re.compile(r'\s*\[[+-]?\d+(\.\d+)?\]\s*$')
+_BLOCK_SYMBOL = re.compile(r'\bsobre\s+(\w+)')
 
 
 class SQLiteToolInput(BaseModel):
     """
     Argumentos de entrada para a ferramenta CoinGecko
     """
-    action: str = Field(description="Ação a ser executada no banco SQLite. Use 'save_moedas' para salvar dados de moedas, 'save_sentimento' para sentimentos, ou 'query' para consultas SQL.")
-    data: str = Field(default=None, description="Dados a serem processados pela ação. Pode ser uma string JSON ou texto formatado.")
+    action: str = Field(description="Ação a ser executada no banco SQLite. Use 'save_moedas' para salvar dados de moedas, 'save_sentimento' para sentimentos, 'diff_runs' para comparar dois snapshots, 'list_runs' para listar as coletas, 'top_movers', 'aggregates' ou 'deltas' para leituras compactas, ou 'query' para consultas SQL.")
+    data: str = Field(default=None, description="Dados a serem processados pela ação. Em save_moedas e save_sentimento passe o handle de artefato retornado pela ferramenta de coleta (ex.: art:moedas:3f2a9c01bd); JSON ou texto formatado também são aceitos. Nas leituras aceita JSON com limit, cursor, max_tokens, symbols (lista ou handle de artefato), hours e direction.")
 
 
 class SQLiteTool(BaseTool):
     name: str = "SQLite Tool"
-    description: str = "Persiste e consulta dados em um banco SQLite local. Use 'save_moedas' para salvar dados de moedas, 'save_sentimento' para sentimentos, ou 'query' para consultas SQL."
+    description: str = "Persiste e consulta dados em um banco SQLite local. Use 'save_moedas' para salvar dados de moedas, 'save_sentimento' para sentimentos, 'diff_runs' para a variação por moeda entre duas coletas (padrão: atual vs dia anterior; data opcional: {\"run_a\": id, \"run_b\": id}), 'list_runs' para listar as coletas, ou 'query' para consultas SQL somente leitura (SELECT; resultado e tempo limitados, varreduras completas de tabelas grandes são recusadas). Leituras compactas (tabela colunar paginada): 'top_movers' (maiores variações 24h do último snapshot; direction: up/down/abs), 'aggregates' (agregados por moeda na janela de `hours`) e 'deltas' (diff_runs ordenado pela maior variação). Todas aceitam data JSON com limit, cursor (use o next_cursor retornado) e max_tokens."
     args_schema: Type[BaseTool] = SQLiteToolInput
 
     def __init__(self, db_path=None):
         super().__init__()
-        self._db_path = db_path or os.path.join(os.path.dirname(__file__), '../../../../data/crypto_trend.db')
-        # Criar diretório se não existir
-        os.makedirs(os.path.dirname(self._db_path), exist_ok=True)
+        self._db_path = db_path or DEFAULT_DB_PATH
+        # Conexões persistentes por thread (WAL), compartilhadas com o dashboard
+        self._db = get_manager(self._db_path)
+        # Run de coleta atual: todas as gravações são marcadas com ele
+        self._run_id = None
         self._ensure_tables()
+        self._sentiment = shared_engine(self._db)
+        self._artifacts = shared_store(self._db)
+        # Consultas livres dos agentes: somente leitura, com plano verificado e limites de linhas, bytes e tempo
+        self._queries = ReadOnlyQueryEngine(self._db_path)
+        tracer.bind(self._db_path)
 
     def _ensure_tables(self):
         try:
-            conn = sqlite3.connect(self._db_path)
-            c = conn.cursor()
-            c.execute('''CREATE TABLE IF NOT EXISTS moedas (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                symbol TEXT,
-                name TEXT,
-                price REAL,
-                volume REAL,
-                change_24h REAL,
-                date TEXT
-            )''')
-            c.execute('''CREATE TABLE IF NOT EXISTS sentimento (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                symbol TEXT,
-                sentiment TEXT,
-                score REAL,
-                news_count INTEGER,
-                date TEXT
-            )''')
-            conn.commit()
-            conn.close()
+            applied = ensure_schema(self._db)
+            if applied:
+                print(f"Migrações aplicadas: {applied}")
             print(f"Banco SQLite inicializado em: {self._db_path}")
         except Exception as e:
             print(f"Erro ao inicializar banco SQLite: {e}")
@@ -69,8 +71,18 @@ class SQLiteTool(BaseTool):
                 return self._get_moedas()
             elif action.lower() == "get_sentimentos":
                 return self._get_sentimentos()
+            elif action.lower() == "diff_runs":
+                return self._diff_runs(data)
+            elif action.lower() == "list_runs":
+                return self._list_runs()
+            elif action.lower() == "top_movers":
+                return self._top_movers(data)
+            elif action.lower() == "aggregates":
+                return self._aggregates(data)
+            elif action.lower() == "deltas":
+                return self._deltas(data)
             else:
-                return f"Ação '{action}' não suportada. Use: save_moedas, save_sentimento, query, get_moedas, get_sentimentos"
+                return f"Ação '{action}' não suportada. Use: save_moedas, save_sentimento, query, get_moedas, get_sentimentos, diff_runs, list_runs, top_movers, aggregates, deltas"
         except Exception as e:
             print(f"Erro no SQLiteTool: {e}")
             return f"Erro no SQLite: {e}"
@@ -79,7 +91,10 @@ class SQLiteTool(BaseTool):
         try:
             if not data_str:
                 return "Nenhum dado fornecido para salvar moedas"
-            print(f"Processando dados de moedas: {data_str[:500]}...")
+            # Handle de artefato da CoinGecko Tool: dados estruturados, sem reinterpretar texto
+            handle = find_handle(data_str)
+            if handle:
+                return self.ingest_moedas(self._artifacts.get(handle)).summary("moedas") + f" (artefato {handle})"
             # Tentar processar como JSON
             data = None
             try:
@@ -92,180 +107,206 @@ class SQLiteTool(BaseTool):
             if isinstance(data, dict) and 'coins' in data:
                 data = data['coins']
             if isinstance(data, list):
-                return f"Salvas {self._save_moedas_from_json(data)} moedas no banco de dados (formato lista)."
+                return self.ingest_moedas(data).summary("moedas") + " (formato lista)"
             # Processar como texto (formato: "BTC - Bitcoin ($45000)")
-            lines = data_str.strip().split('\n')
-            saved_count = 0
-            conn = sqlite3.connect(self._db_path)
-            c = conn.cursor()
-            for line in lines:
-                line = line.strip()
-                if not line or line.startswith('Top 50') or line.startswith('#'):
-                    continue
-                print(f"Processando linha: {line}")
-                if ' - ' in line and '$' in line:
-                    parts = line.split(' - ')
-                    if len(parts) >= 2:
-                        symbol = parts[0].strip()
-                        name_price = parts[1].strip()
-                        if '(' in name_price and ')' in name_price:
-                            name = name_price.split('(')[0].strip()
-                            price_str = name_price.split('(')[1].split(')')[0].replace('$', '').replace(',', '')
-                            try:
-                                price = float(price_str)
-                                c.execute('''INSERT INTO moedas (symbol, name, price, date) 
-                                           VALUES (?, ?, ?, ?)''',
-                                          (symbol, name, price, datetime.now().strftime('%Y-%m-%d %H:%M:%S')))
-                                saved_count += 1
-                                print(f"Salvou: {symbol} - {name} (${price})")
-                            except ValueError as ve:
-                                print(f"Erro ao converter preço '{price_str}' para {symbol}: {ve}")
-                                continue
-            conn.commit()
-            conn.close()
-            print(f"Total de moedas salvas: {saved_count}")
-            return f"Salvas {saved_count} moedas no banco de dados."
+            return self.ingest_moedas(parse_moedas_text(data_str)).summary("moedas")
         except Exception as e:
             print(f"Erro ao salvar moedas: {e}")
             return f"Erro ao salvar moedas: {e}"
 
-    def _save_moedas_from_json(self, data_json: list) -> int:
-        """Salva moedas a partir de dados JSON"""
-        saved_count = 0
-        conn = sqlite3.connect(self._db_path)
-        c = conn.cursor()
-
-        for coin in data_json:
-            try:
-                # Mapear campos dos dados recebidos para as colunas da tabela
-                symbol = coin.get('simbolo', coin.get('symbol', '')).upper()
-                name = coin.get('nome', coin.get('name', ''))
-
-                # Tentar extrair preço de diferentes campos
-                price = 0.0
-                if 'market_cap' in coin and coin['market_cap'] != 'N/A':
-                    try:
-                        price_str = str(coin['market_cap']).replace('$', '').replace(',', '')
-                        price = float(price_str)
-                    except:
-                        price = 0.0
-                elif 'current_price' in coin:
-                    price = float(coin['current_price'])
-
-                # Extrair variação percentual se disponível
-                change_24h = 0.0
-                if 'variacao_percentual_24h' in coin:
-                    try:
-                        change_str = str(coin['variacao_percentual_24h']).replace('%', '')
-                        change_24h = float(change_str)
-                    except:
-                        change_24h = 0.0
-                elif 'price_change_percentage_24h' in coin:
-                    change_24h = float(coin['price_change_percentage_24h'])
-
-                # Extrair volume se disponível
-                volume = 0.0
-                if 'volume_negociacao' in coin and coin['volume_negociacao'] != 'N/A':
-                    try:
-                        volume_str = str(coin['volume_negociacao']).replace('$', '').replace(',', '')
-                        volume = float(volume_str)
-                    except:
-                        volume = 0.0
-                elif 'total_volume' in coin:
-                    volume = float(coin['total_volume'])
-
-                if symbol and name:
-                    c.execute('''INSERT INTO moedas (symbol, name, price, volume, change_24h, date) 
-                               VALUES (?, ?, ?, ?, ?, ?)''',
-                              (symbol, name, price, volume, change_24h, datetime.now().strftime('%Y-%m-%d %H:%M:%S')))
-                    saved_count += 1
-                    print(f"Salvou JSON: {symbol} - {name} (${price}, {change_24h}%)")
-            except Exception as e:
-                print(f"Erro ao salvar moeda JSON {coin}: {e}")
-                continue
-
-        conn.commit()
-        conn.close()
-        return saved_count
+    def ingest_moedas(self, rows: list) -> IngestResult:
+        """Ingestão em lote de um snapshot de moedas (uma transação, um timestamp)."""
+        return bulk_insert_moedas(self._db, rows, run_id=self._run_id)
 
-    def _save_sentimento(self, data_str: str) -> str:
-        try:
-            if not data_str:
-                return "Nenhum dado fornecido para salvar sentimento"
+    def ingest_sentimentos(self, rows: list) -> IngestResult:
+        """Ingestão em lote de um snapshot de sentimentos (uma transação, um timestamp)."""
+        return bulk_insert_sentimentos(self._db, rows, run_id=self._run_id)
 
-            print(f"Processando dados de sentimento: {data_str[:500]}...")
+    @property
+    def run_id(self):
+        """Run aberto nesta instância (None fora de um run)."""
+        return self._run_id
 
-            # Parsear dados de sentimento (formato: "Notícias recentes sobre BTC: - título1 - título2")
-            lines = data_str.strip().split('\n')
-            symbol = "UNKNOWN"
-            news_count = 0
+    def start_run(self, kind: str = 'crew') -> int:
+        """Abre um run de coleta; as gravações seguintes são marcadas com o seu id."""
+        self._run_id = start_run(self._db, kind)
+        tracer.run_id = self._run_id
+        return self._run_id
 
-            # Extrair símbolo da primeira linha
-            if lines and 'sobre' in lines[0]:
-                symbol_part = lines[0].split('sobre')
-                if len(symbol_part) > 1:
-                    symbol = symbol_part[1].split(':')[0].strip()
+    def resume_run(self, run_id: int = None) -> tuple:
+        """
+        Reabre um run do crew (padrão: o último não concluído) e retorna (id, saídas das
+        tarefas já concluídas nele por nome). Sem run a retomar, retorna (None, {}).
+        """
+        run_id = resumable_run(self._db, run_id)
+        if run_id is None:
+            return None, {}
+        self._run_id = run_id
+        tracer.run_id = run_id
+        return run_id, load_tasks(self._db, run_id)
 
-            # Contar notícias
-            news_count = len([line for line in lines if line.strip().startswith('-')])
+    def checkpoint_task(self, output):
+        """Grava o checkpoint da tarefa concluída (TaskOutput) no run atual."""
+        if self._run_id is not None and output.name:
+            save_task(self._db, self._run_id, output)
 
-            # Calcular score simples baseado na quantidade de notícias
-            score = min(news_count * 0.1, 1.0)  # Score de 0 a 1 baseado na quantidade de notícias
-            sentiment = "positivo" if score > 0.5 else "neutro" if score > 0.2 else "negativo"
+    def finish_run(self, status: str = 'ok'):
+        if self._run_id is not None:
+            finish_run(self._db, self._run_id, status)
+            # Os spans pendentes do run são gravados ao fim dele
+            tracer.flush(self._db_path)
+            self._run_id = None
 
-            print(f"Salvando sentimento para {symbol}: {sentiment} (score: {score:.2f}, {news_count} notícias)")
+    def _save_sentimento(self, data_str: str) -> str:
+        try:
+            if not data_str:
+                return "Nenhum dado fornecido para salvar sentimento"
 
-            conn = sqlite3.connect(self._db_path)
-            c = conn.cursor()
-            c.execute('''INSERT INTO sentimento (symbol, sentiment, score, news_count, date) 
-                       VALUES (?, ?, ?, ?, ?)''',
-                      (symbol, sentiment, score, news_count, datetime.now().strftime('%Y-%m-%d %H:%M:%S')))
-            conn.commit()
-            conn.close()
+            # Handle de artefato da News Tool: sentimento já agregado por símbolo
+            handle = find_handle(data_str)
+            if handle:
+                results = self._artifacts.get(handle)
+                rows = [result['sentiment'] for result in results.values() if result.get('sentiment')]
+                return self._sentimento_resumo(rows)
 
-            return f"Salvo sentimento para {symbol}: {sentiment} (score: {score:.2f}, {news_count} notícias)"
+            # A News Tool em lote devolve um bloco por símbolo, separados por linha em branco
+            blocks = [block for block in data_str.strip().split('\n\n') if block.strip()]
+            rows = [self._parse_sentimento_bloco(block) for block in blocks]
+            return self._sentimento_resumo(rows)
 
         except Exception as e:
             print(f"Erro ao salvar sentimento: {e}")
             return f"Erro ao salvar sentimento: {e}"
 
+    def _sentimento_resumo(self, rows: list) -> str:
+        result = self.ingest_sentimentos(rows)
+        lines = [f"Salvo sentimento para {r['symbol']}: {r['sentiment']} "
+                 f"(score: {r['score']:.2f}, {r['news_count']} notícias)" for r in rows]
+        if result.errors or not rows:
+            lines.append(result.summary("sentimentos"))
+        return "\n".join(lines)
+
+    def _parse_sentimento_bloco(self, block: str) -> dict:
+        # Parsear dados de sentimento (formato: "Notícias recentes sobre BTC: - título1 - título2")
+        lines = block.strip().split('\n')
+        symbol = "UNKNOWN"
+
+        # Extrair símbolo da primeira linha: só a palavra após "sobre" (ex.: "sobre BTC (5 já vistas).")
+        match = _BLOCK_SYMBOL.search(lines[0]) if lines else None
+        if match:
+            symbol = match.group(1)
+
+        # Pontuar o texto das manchetes com o motor léxico; sem manchetes o sentimento é neutro (score 0.5)
+        titles = [_HEADLINE_SCORE.sub('', line.strip()[1:]).strip() for line in lines if line.strip().startswith('-')]
+        return self._sentiment.aggregate(symbol, titles)
+
     def _execute_query(self, query: str) -> str:
         try:
-            conn = sqlite3.connect(self._db_path)
-            c = conn.cursor()
-            if query.lower().startswith('select'):
-                c.execute(query)
-                result = c.fetchall()
-                conn.close()
-                return str(result)
-            else:
-                c.execute(query)
-                conn.commit()
-                conn.close()
-                return "Operação realizada com sucesso."
+            columns, rows, cut = self._queries.execute(query)
+            text = format_compact("Resultado", columns, rows, has_more=cut is not None)
+            return text + (f"\n(resultado cortado: {cut}; refine a consulta)" if cut else '')
+        except QueryRejected as e:
+            return f"Consulta rejeitada: {e}"
         except Exception as e:
             return f"Erro na query: {e}"
 
     def _get_moedas(self) -> str:
         try:
-            conn = sqlite3.connect(self._db_path)
+            conn = self._db.connection()
             c = conn.cursor()
-            c.execute("SELECT symbol, name, price, date FROM moedas ORDER BY date DESC LIMIT 50")
-            result = c.fetchall()
-            conn.close()
-            return f"Moedas encontradas: {len(result)}\n" + "\n".join(
-                [f"{r[0]} - {r[1]} (${r[2]}) - {r[3]}" for r in result])
+            c.execute("SELECT symbol, name, price, date FROM moedas ORDER BY ts DESC LIMIT 50")
+            return format_compact("Moedas encontradas", ['symbol', 'name', 'price', 'date'], c.fetchall())
         except Exception as e:
             return f"Erro ao buscar moedas: {e}"
 
     def _get_sentimentos(self) -> str:
         try:
-            conn = sqlite3.connect(self._db_path)
+            conn = self._db.connection()
             c = conn.cursor()
-            c.execute("SELECT symbol, sentiment, score, news_count, date FROM sentimento ORDER BY date DESC LIMIT 50")
-            result = c.fetchall()
-            conn.close()
-            return f"Sentimentos encontrados: {len(result)}\n" + "\n".join(
-                [f"{r[0]} - {r[1]} (score: {r[2]:.2f}, {r[3]} notícias) - {r[4]}" for r in result])
+            c.execute("SELECT symbol, sentiment, score, news_count, date FROM sentimento ORDER BY ts DESC LIMIT 50")
+            return format_compact("Sentimentos encontrados", ['symbol', 'sentiment', 'score', 'news', 'date'], c.fetchall())
         except Exception as e:
             return f"Erro ao buscar sentimentos: {e}"
+
+    def _read_params(self, data_str: str = None) -> dict:
+        """
+        Parâmetros das leituras compactas (JSON); entrada vazia ou inválida usa os padrões.
+        Um handle de artefato (sozinho ou em `symbols`) restringe a leitura aos símbolos dele.
+        """
+        if not data_str or not data_str.strip():
+            return {}
+        try:
+            params = json.loads(data_str)
+        except ValueError:
+            params = {'symbols': data_str} if find_handle(data_str) else {}
+        if not isinstance(params, dict):
+            return {}
+        if params.get('symbols') is not None:
+            params['symbols'] = self._artifacts.resolve_symbols(params['symbols'])
+        return params
+
+    def _top_movers(self, data_str: str = None) -> str:
+        try:
+            p = self._read_params(data_str)
+            cursor = int(p.get('cursor', 0))
+            columns, rows, more = top_movers(self._db, p.get('limit'), cursor, p.get('direction', 'abs'), p.get('symbols'))
+            if not rows and not cursor:
+                return "Nenhum snapshot de moedas encontrado. Execute a coleta primeiro."
+            return format_compact("Maiores variações 24h (último snapshot)", columns, rows, cursor, more, p.get('max_tokens'))
+        except Exception as e:
+            return f"Erro ao buscar maiores variações: {e}"
+
+    def _aggregates(self, data_str: str = None) -> str:
+        try:
+            p = self._read_params(data_str)
+            cursor, hours = int(p.get('cursor', 0)), float(p.get('hours', 24))
+            columns, rows, more = symbol_aggregates(self._db, hours, p.get('limit'), cursor, p.get('symbols'))
+            return format_compact(f"Agregados por moeda (últimas {hours:g}h)", columns, rows, cursor, more, p.get('max_tokens'))
+        except Exception as e:
+            return f"Erro ao calcular agregados: {e}"
+
+    def _deltas(self, data_str: str = None) -> str:
+        try:
+            p = self._read_params(data_str)
+            cursor = int(p.get('cursor', 0))
+            run_a, run_b = resolve_diff_runs(self._db, p.get('run_a'), p.get('run_b'))
+            if run_a is None or run_b is None:
+                return "São necessárias ao menos duas coletas com moedas para comparar. Use 'list_runs'."
+            columns, rows, more = run_deltas(self._db, run_a, run_b, p.get('limit'), cursor)
+            return format_compact(f"Variação run {run_a} -> run {run_b}", columns, rows, cursor, more, p.get('max_tokens'))
+        except Exception as e:
+            return f"Erro ao calcular variações: {e}"
+
+    def _diff_runs(self, data_str: str = None) -> str:
+        try:
+            run_a = run_b = None
+            if data_str and data_str.strip():
+                try:
+                    params = json.loads(data_str)
+                    run_a, run_b = params.get('run_a'), params.get('run_b')
+                except (ValueError, AttributeError):
+                    ids = [int(part) for part in data_str.replace(';', ',').split(',') if part.strip()]
+                    run_a, run_b = (ids + [None, None])[:2]
+            run_a, run_b = resolve_diff_runs(self._db, run_a, run_b)
+            if run_a is None or run_b is None:
+                return "São necessárias ao menos duas coletas com moedas para comparar. Use 'list_runs'."
+            rows = diff_runs(self._db, run_a, run_b)
+
+            def fmt(value, pattern):
+                return pattern.format(value) if value is not None else "n/d"
+
+            return f"Comparação run {run_a} -> run {run_b} ({len(rows)} moedas)\n" + "\n".join(
+                [f"{r[0]}: preço {fmt(r[1], '{:.6g}')} -> {fmt(r[2], '{:.6g}')} ({fmt(r[3], '{:+.2f}%')}), "
+                 f"volume {fmt(r[6], '{:+.1f}%')}, sentimento {fmt(r[7], '{:.2f}')} -> {fmt(r[8], '{:.2f}')}"
+                 for r in rows])
+        except Exception as e:
+            return f"Erro ao comparar runs: {e}"
+
+    def _list_runs(self) -> str:
+        try:
+            rows = list_runs(self._db)
+            return f"Runs encontrados: {len(rows)}\n" + "\n".join(
+                [f"run {r[0]} ({r[1]}, {r[2]}) - {datetime.fromtimestamp(r[3]).strftime('%Y-%m-%d %H:%M:%S')}: "
+                 f"{r[4]} moedas, {r[5]} sentimentos" for r in rows])
+        except Exception as e:
+            return f"Erro ao listar runs: {e}"
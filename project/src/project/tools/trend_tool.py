@@ -0,0 +1,58 @@
+import time
+import numpy as np
+from crewai.tools import BaseTool
+from typing import List, Optional, Type
+from pydantic import BaseModel, Field
+from project.src.project.analytics import compute_trends, format_trend_table, load_history, resample_hourly
+from project.src.project.artifacts import shared_store
+from project.src.project.collector import fetch_window
+from project.src.project.db import get_manager
+from project.src.project.schema import ensure_schema
+
+
+def _covers(window: dict, since: int) -> bool:
+    """Se a janela do coletor alcança `since` (com a capacidade padrão ela guarda só ~12h)."""
+    ts = window['ts'][window['ts'] > 0]
+    return ts.size > 0 and int(ts.min()) <= since
+
+
+class TrendToolInput(BaseModel):
+    """
+    Argumentos de entrada para a ferramenta de tendências
+    """
+    symbols: Optional[List[str]] = Field(default=None, description="Símbolos a analisar. Vazio para todas as moedas coletadas.")
+    artifact: Optional[str] = Field(default=None, description="Handle de artefato (ex.: art:moedas:3f2a9c01bd) cujas moedas serão analisadas, no lugar de symbols.")
+    hours: int = Field(default=72, description="Janela de histórico em horas.")
+    limit: int = Field(default=30, description="Quantidade máxima de moedas na tabela.")
+    sort_by: str = Field(default="return_pct", description="Coluna de ordenação (por valor absoluto): return_pct, change_24h, zscore ou volume_ratio.")
+
+
+class TrendTool(BaseTool):
+    name: str = "Trend Tool"
+    description: str = "Calcula de forma determinística retornos, médias móveis, z-score, picos de volume e a tendência (alta, baixa, consolidação) de todas as moedas a partir do histórico no SQLite. Retorna uma tabela compacta já calculada."
+    args_schema: Type[BaseTool] = TrendToolInput
+
+    def __init__(self, db_path=None):
+        super().__init__()
+        self._db = get_manager(db_path)
+        ensure_schema(self._db)
+        self._artifacts = shared_store(self._db)
+
+    def _run(self, symbols: List[str] = None, hours: int = 72, limit: int = 30, sort_by: str = "return_pct",
+             artifact: str = None) -> str:
+        try:
+            if artifact:
+                symbols = self._artifacts.resolve_symbols(artifact)
+            # Janela em memória do coletor contínuo, se estiver rodando sobre este banco e cobrir as
+            # `hours` pedidas; senão o SQLite. Os dois caminhos dão baldes horários.
+            since = int(time.time() - hours * 3600)
+            raw = fetch_window(symbols, points=None, db_path=self._db.db_path)
+            if raw is not None and _covers(raw, since):
+                raw['ts'] = np.where(raw['ts'] >= since, raw['ts'], 0)
+                history = resample_hourly(raw, window=hours)
+            else:
+                history = load_history(self._db, hours=hours, symbols=symbols)
+            report = compute_trends(history)
+            return format_trend_table(report, limit=limit, sort_by=sort_by)
+        except Exception as e:
+            return f"Erro ao calcular tendências: {e}"
@@ -0,0 +1,8 @@
+import os
+import sys
+
+# Raiz do repositório no path para importar o pacote do projeto (como em dashboard/app.py)
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+os.environ.setdefault('TELEMETRY', '0')
+os.environ.setdefault('CREWAI_DISABLE_TELEMETRY', 'true')
+os.environ.setdefault('OTEL_SDK_DISABLED', 'true')
@@ -0,0 +1,47 @@
+import time
+
+import numpy as np
+
+from project.src.project import rollups
+from project.src.project.analytics import compute_trends, load_history, resample_hourly
+from project.src.project.collector import PriceWindow
+from project.src.project.db import get_manager
+from project.src.project.schema import ensure_schema
+
+
+def _minute_points(hours: int):
+    """Um ponto por minuto nas últimas `hours` horas; o preço sobe 1 por hora."""
+    now = int(time.time())
+    end = now - now % 3600 - 1  # último segundo da hora anterior: cada hora tem 60 pontos
+    return [(end - minute * 60, 100.0 + hours - 1 - minute // 60) for minute in range(hours * 60 - 1, -1, -1)]
+
+
+def test_load_history_uses_hourly_buckets(tmp_path):
+    db = get_manager(str(tmp_path / 'trends.db'))
+    ensure_schema(db)
+    points = _minute_points(24)
+    with db.connection() as conn:
+        conn.executemany("INSERT INTO moedas (symbol, name, price, volume, change_24h, ts) VALUES ('BTC', 'Bitcoin', ?, 1.0, ?, ?)",
+                         [(price, price - 100, ts) for ts, price in points])
+        rollups.rollup_moedas_table(conn, 'moedas')
+
+    history = load_history(db, hours=24)
+    assert history['price'].shape == (1, 24)
+    # 24 baldes, um por hora, e não os últimos 24 minutos
+    assert int(history['points'][0]) == 24
+    assert np.all(np.diff(history['price'][0]) == 1.0)
+
+    report = compute_trends(history)
+    assert report['trend'][0] == 'alta'
+    assert report['change_24h'][0] == 23.0  # do último snapshot
+
+
+def test_resample_hourly_matches_collector_window():
+    window = PriceWindow(capacity=24 * 60)
+    for ts, price in _minute_points(12):
+        window.append(ts, [('ETH', 'Ethereum', price, 1.0, 0.0)])
+
+    history = resample_hourly(window.history(points=None), window=12)
+    assert list(history['symbols']) == ['ETH']
+    assert int(history['points'][0]) == 12
+    assert np.all(np.diff(history['price'][0]) == 1.0)
@@ -0,0 +1,99 @@
+import threading
+
+import pytest
+
+from project.src.project import batch
+from project.src.project import crew as crew_module
+from project.src.project.cache import FetchMemo
+from project.src.project.telemetry import tracer
+
+
+def test_normalize_inputs_dedupes_symbols_and_names():
+    inputs = batch.normalize_inputs([
+        {'name': 'blue-chips', 'watchlist': 'btc, ETH,btc,'},
+        {'name': 'blue-chips', 'watchlist': ['sol']},
+        [],
+        {'current_year': '2020'},
+    ])
+    assert [item['name'] for item in inputs] == ['blue-chips', 'blue-chips-2', 'lista-3', 'lista-4']
+    assert inputs[0]['symbols'] == ['BTC', 'ETH']
+    assert inputs[0]['watchlist'] == 'BTC, ETH'
+    # Sem lista, a tarefa recebe o texto padrão; os demais inputs do item prevalecem sobre os padrões
+    assert inputs[2]['watchlist'] == crew_module.DEFAULT_INPUTS['watchlist']
+    assert inputs[3]['current_year'] == '2020'
+
+
+def test_fetch_memo_single_flight():
+    memo, started, release = FetchMemo(), threading.Event(), threading.Event()
+    calls, results = [], []
+
+    def fetch():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return ['BTC']
+
+    first = threading.Thread(target=lambda: results.append(memo.get_or_fetch('markets', {'n': 50}, fetch)))
+    first.start()
+    started.wait(5)
+    second = threading.Thread(target=lambda: results.append(memo.get_or_fetch('markets', {'n': 50}, fetch)))
+    second.start()
+    release.set()
+    first.join(5)
+    second.join(5)
+
+    assert len(calls) == 1
+    assert results == [['BTC'], ['BTC']]
+    assert memo.stats() == {'fetches': 1, 'shared': 1}
+
+
+def test_fetch_memo_does_not_keep_errors():
+    memo = FetchMemo()
+
+    def failing():
+        raise OSError('timeout')
+
+    with pytest.raises(OSError):
+        memo.get_or_fetch('markets', None, failing)
+    # A próxima chamada busca de novo em vez de repetir o erro
+    assert memo.get_or_fetch('markets', None, lambda: ['ETH']) == ['ETH']
+    assert memo.stats()['fetches'] == 2
+
+
+def test_each_crew_tags_its_tasks_with_its_own_run(tmp_path, monkeypatch):
+    monkeypatch.setenv('OPENAI_API_KEY', 'sk-test')
+    memo = FetchMemo()
+    crews = [crew_module.CryptoTrendCrew(tools=crew_module.build_tools(str(tmp_path / 'batch.db'), memo))
+             for _ in range(2)]
+    seen = {}
+
+    def open_run(index):
+        crews[index].crew()
+        crews[index].abrir_run({})
+        seen[index] = tracer.run_id
+
+    threads = [threading.Thread(target=open_run, args=(i,)) for i in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(30)
+
+    first, second = (crew.run_id for crew in crews)
+    assert first != second
+    # Cada thread vê o próprio run, e as tarefas de cada crew apontam para ele
+    assert seen == {0: first, 1: second}
+    assert {tracer.task_run(task) for task in crews[0].tasks} == {first}
+    assert {tracer.task_run(task) for task in crews[1].tasks} == {second}
+    for crew in crews:
+        crew._tools['sqlite'].finish_run('ok')
+
+
+class FailingMarket:
+    def fetch_markets(self, top_n):
+        raise OSError('429 Too Many Requests')
+
+
+def test_prefetch_reports_market_errors():
+    summary = batch.prefetch({'coingecko': FailingMarket()}, [])
+    assert summary['moedas'] == 0
+    assert '429 Too Many Requests' in summary['erro']
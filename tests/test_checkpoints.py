@@ -0,0 +1,37 @@
+from crewai.tasks.task_output import TaskOutput
+
+from project.src.project.artifacts import shared_store
+from project.src.project.tools.sqlite_tool import SQLiteTool
+
+
+def _output(name: str) -> TaskOutput:
+    return TaskOutput(name=name, description=name, raw=f"saída de {name}", agent='Analista\n')
+
+
+def test_resume_restores_finished_tasks_of_failed_run(tmp_path):
+    db_path = str(tmp_path / 'resume.db')
+    tool = SQLiteTool(db_path)
+    run_id = tool.start_run('crew')
+    shared_store(tool._db).put('moedas', [{'symbol': 'BTC'}], run_id=run_id, task='coletar')
+    tool.checkpoint_task(_output('coletar'))
+    tool.checkpoint_task(_output('armazenar'))
+    tool.finish_run('error')
+
+    # Handle que não existe mais: a tarefa volta a ser pendente
+    tool._db.connection().execute(
+        "UPDATE task_checkpoints SET artifacts = '[\"art:moedas:0000000000\"]' WHERE task = 'armazenar'")
+    tool._db.connection().commit()
+
+    resumed, done = SQLiteTool(db_path).resume_run()
+    assert resumed == run_id
+    assert list(done) == ['coletar']
+    assert done['coletar']['raw'] == 'saída de coletar'
+    assert done['coletar']['agent'] == 'Analista\n'
+
+
+def test_nothing_to_resume_after_successful_run(tmp_path):
+    tool = SQLiteTool(str(tmp_path / 'ok.db'))
+    tool.start_run('crew')
+    tool.checkpoint_task(_output('coletar'))
+    tool.finish_run('ok')
+    assert SQLiteTool(str(tmp_path / 'ok.db')).resume_run() == (None, {})
@@ -0,0 +1,23 @@
+import pytest
+
+from project.src.project.collector import PriceCollector
+
+
+class FailingDb(Exception):
+    pass
+
+
+def test_run_keeps_loop_error_when_final_flush_fails(tmp_path, monkeypatch):
+    collector = PriceCollector(str(tmp_path / 'stream.db'), interval=0, tool=object())
+
+    def interrupted_poll():
+        raise KeyboardInterrupt
+
+    def failing_flush():
+        raise FailingDb('database is locked')
+
+    monkeypatch.setattr(collector, 'poll_once', interrupted_poll)
+    monkeypatch.setattr(collector, 'flush', failing_flush)
+    with pytest.raises(KeyboardInterrupt):
+        collector.run(iterations=1)
+    assert collector.stats()['last_error'] == 'database is locked'
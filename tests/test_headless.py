@@ -0,0 +1,24 @@
+import pytest
+
+from project.src.project import headless
+
+
+class LockAcquired(Exception):
+    pass
+
+
+def _stop_after_lock(db_path):
+    # Chamado logo depois de obter o lock: interrompe a ingestão antes de qualquer coleta
+    raise LockAcquired(db_path)
+
+
+def test_ingest_lock_is_per_database(tmp_path, monkeypatch):
+    monkeypatch.setattr(headless, 'SQLiteTool', _stop_after_lock)
+    first, second = str(tmp_path / 'a.db'), str(tmp_path / 'b.db')
+
+    with headless._exclusive_lock(first + '.lock'):
+        # Outro banco não é bloqueado pela ingestão em andamento
+        with pytest.raises(LockAcquired):
+            headless.run_ingest(db_path=second)
+        with pytest.raises(headless.IngestAlreadyRunning):
+            headless.run_ingest(db_path=first)
@@ -0,0 +1,11 @@
+from project.src.project.ingest import normalize_moedas, normalize_sentimentos
+
+
+def test_non_dict_rows_are_rejected_not_raised():
+    valid, errors = normalize_sentimentos([['BTC', 0.4], {'symbol': 'btc', 'sentiment': 'positivo', 'score': '0.4'}, None])
+    assert valid == [('BTC', 'positivo', 0.4, 0)]
+    assert errors == ['linha 0: formato inválido', 'linha 2: formato inválido']
+
+    valid, errors = normalize_moedas(['BTC', {'symbol': 'eth', 'name': 'Ethereum', 'current_price': 3000}])
+    assert [row[0] for row in valid] == ['ETH']
+    assert errors == ['linha 0: formato inválido']
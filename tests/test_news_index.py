@@ -0,0 +1,21 @@
+from project.src.project.tools.news_index import SeenIndex
+from project.src.project.tools.news_tool import NewsTool
+
+ARTICLE = {'title': 'Bitcoin e Ethereum sobem com entrada de ETFs', 'url': 'https://example.com/etf'}
+
+
+def test_article_shared_by_two_symbols_is_new_for_both(tmp_path, monkeypatch):
+    db_path = str(tmp_path / 'news.db')
+    tool = NewsTool(db_path=db_path)
+    monkeypatch.setattr(tool, '_fetch_feed', lambda query: [dict(ARTICLE)])
+
+    results = tool.collect_batch(['BTC', 'ETH'])
+    assert [item['title'] for item in results['BTC']['items']] == [ARTICLE['title']]
+    assert [item['title'] for item in results['ETH']['items']] == [ARTICLE['title']]
+    assert results['BTC']['sentiment']['news_count'] == results['ETH']['sentiment']['news_count']
+
+    # Já vista para os dois símbolos; ainda nova para um terceiro
+    index = SeenIndex(db_path)
+    assert index.filter_new('BTC', [dict(ARTICLE)]) == []
+    assert index.filter_new('ETH', [dict(ARTICLE, url='https://example.com/etf?ref=rss')]) == []
+    assert len(index.filter_new('SOL', [dict(ARTICLE)])) == 1
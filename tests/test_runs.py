@@ -0,0 +1,52 @@
+import time
+
+from project.src.project.backfill import run_backfill
+from project.src.project.db import get_manager
+from project.src.project.ingest import bulk_insert_moedas
+from project.src.project.runs import resolve_diff_runs
+from project.src.project.summaries import top_movers
+from project.src.project.tools.sqlite_tool import SQLiteTool
+
+COINS = [{'id': 'bitcoin', 'symbol': 'btc', 'name': 'Bitcoin'},
+         {'id': 'ethereum', 'symbol': 'eth', 'name': 'Ethereum'}]
+
+
+class FakeCoinGecko:
+    """Mercado e histórico fixos; o último ponto de cada moeda cai numa hora diferente."""
+
+    def fetch_markets(self, top_n=50):
+        return COINS[:top_n]
+
+    def fetch_market_chart_range(self, coin_id, start, end):
+        offset = 3600 if coin_id == 'bitcoin' else 7200
+        points = range(start, end - offset + 1, 3600)
+        return {'prices': [[ts * 1000, 1.0] for ts in points], 'total_volumes': [[ts * 1000, 10.0] for ts in points]}
+
+
+def _crew_snapshot(tool: SQLiteTool, price: float, ts: int) -> int:
+    run_id = tool.start_run('crew')
+    bulk_insert_moedas(tool._db, [{'symbol': c['symbol'], 'name': c['name'], 'current_price': price,
+                                   'total_volume': 1000.0, 'price_change_percentage_24h': 1.0} for c in COINS],
+                       ts=ts, run_id=run_id)
+    tool.finish_run('ok')
+    return run_id
+
+
+def test_backfill_is_not_the_current_run(tmp_path):
+    db_path = str(tmp_path / 'runs.db')
+    tool = SQLiteTool(db_path)
+    now = int(time.time())
+    first = _crew_snapshot(tool, 100.0, now - 86400)
+    second = _crew_snapshot(tool, 110.0, now - 60)
+
+    summary = run_backfill(days=2, top_n=2, db_path=db_path, tool=FakeCoinGecko(), now=now)
+    assert summary['run_id'] > second and summary['linhas'] > 0
+
+    db = get_manager(db_path)
+    assert resolve_diff_runs(db) == (first, second)
+    output = tool._run('deltas')
+    assert f"run {first} -> run {second}" in output
+    assert 'BTC' in output and 'ETH' in output
+
+    _, rows, _ = top_movers(db)
+    assert sorted(row[0] for row in rows) == ['BTC', 'ETH']
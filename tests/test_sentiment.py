@@ -0,0 +1,33 @@
+from project.src.project.db import get_manager
+from project.src.project.schema import ensure_schema
+from project.src.project.sentiment import SentimentEngine, label
+
+
+def test_headline_polarity_and_negation():
+    up, down, negated = SentimentEngine().score([
+        'Bitcoin dispara e renova recorde',
+        'Ethereum despenca após ataque hacker',
+        'Bitcoin não sobe',
+    ])
+    assert up > 0.05 and label(up) == 'positivo'
+    assert down < -0.05 and label(down) == 'negativo'
+    assert negated < 0
+
+
+def test_scores_are_cached_across_engines(tmp_path):
+    db = get_manager(str(tmp_path / 'sentiment.db'))
+    ensure_schema(db)
+    titles = ['Solana sobe com forte volume', 'Solana sobe com forte volume']
+    first = SentimentEngine(db)
+    assert first.aggregate('SOL', titles)['news_count'] == 2
+    assert first.stats()['misses'] == 1
+
+    # Outro processo (engine sem memória) lê o score da tabela `manchetes`
+    second = SentimentEngine(db)
+    assert second.score(titles[:1]) == first.score(titles[:1])
+    assert second.stats()['misses'] == 0
+
+
+def test_no_headlines_is_neutral():
+    row = SentimentEngine().aggregate('BTC', [])
+    assert (row['sentiment'], row['score'], row['news_count']) == ('neutro', 0.5, 0)
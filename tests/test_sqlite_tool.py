@@ -0,0 +1,14 @@
+from project.src.project.tools.sqlite_tool import SQLiteTool
+
+
+def test_news_blocks_without_headlines_are_neutral(tmp_path):
+    tool = SQLiteTool(str(tmp_path / 'sentiment.db'))
+    text = ("Nenhuma notícia nova sobre BTC (5 já vistas).\n\n"
+            "Notícias recentes sobre ETH:\n- Ethereum dispara com forte alta após aprovação de ETF [+0.60]")
+    tool._save_sentimento(text)
+
+    rows = tool._db.connection().execute(
+        'SELECT symbol, sentiment, score, news_count FROM sentimento ORDER BY symbol').fetchall()
+    assert [row[0] for row in rows] == ['BTC', 'ETH']
+    assert rows[0][1:] == ('neutro', 0.5, 0)
+    assert rows[1][3] == 1
@@ -0,0 +1,42 @@
+import time
+
+from project.src.project.collector import PriceWindow
+from project.src.project.tools import trend_tool
+from project.src.project.tools.trend_tool import TrendTool
+
+
+def _collector_window(hours: int) -> dict:
+    """Janela do coletor com um ponto por minuto nas últimas `hours` horas."""
+    window = PriceWindow(capacity=hours * 60)
+    now = int(time.time())
+    for minute in range(hours * 60 - 1, -1, -1):
+        window.append(now - minute * 60, [('BTC', 'Bitcoin', 100.0, 1.0, 0.0)])
+    return window.history(points=None)
+
+
+def _spy_history(monkeypatch):
+    calls = []
+
+    def load_history(db, hours, symbols=None):
+        calls.append(hours)
+        return trend_tool.resample_hourly(_collector_window(1), window=hours)
+
+    monkeypatch.setattr(trend_tool, 'load_history', load_history)
+    return calls
+
+
+def test_uses_collector_window_when_it_covers_the_hours(tmp_path, monkeypatch):
+    monkeypatch.setattr(trend_tool, 'fetch_window', lambda *args, **kwargs: _collector_window(13))
+    calls = _spy_history(monkeypatch)
+
+    table = TrendTool(db_path=str(tmp_path / 'trend.db'))._run(hours=12)
+    assert calls == []
+    assert table.splitlines()[2].startswith('BTC|12|')
+
+
+def test_falls_back_to_sqlite_when_hours_exceed_collector_window(tmp_path, monkeypatch):
+    monkeypatch.setattr(trend_tool, 'fetch_window', lambda *args, **kwargs: _collector_window(12))
+    calls = _spy_history(monkeypatch)
+
+    TrendTool(db_path=str(tmp_path / 'trend.db'))._run(hours=72)
+    assert calls == [72]